@@ -1,3 +1,258 @@
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "jkn050214"
+"""
+Backend settings.
+
+Every setting below can be overridden by an environment variable of the same
+name, or by a TOML file named by `AKB_CONFIG_FILE` whose top-level keys are
+the same names. Environment variables win over the file, the file wins over
+the defaults here. Values that fail to parse are collected in CONFIG_ERRORS
+and reported by `validate_neo4j_config()` at driver creation, so a bad value
+fails startup instead of import.
+"""
+
+import os
+import tomllib
+from typing import Any, Callable, Dict, List, Optional
+
+CONFIG_ERRORS: List[str] = []
+
+
+def _load_config_file() -> Dict[str, Any]:
+    path = os.environ.get("AKB_CONFIG_FILE")
+    if not path:
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        CONFIG_ERRORS.append(f"AKB_CONFIG_FILE {path!r}: {e}")
+        return {}
+
+
+_CONFIG_FILE = _load_config_file()
+
+
+def _optional(parse: Callable[[str], Any]) -> Callable[[Any], Any]:
+    def parse_optional(value: Any) -> Any:
+        if value is None or str(value).strip().lower() in ("", "none"):
+            return None
+        return parse(value)
+
+    return parse_optional
+
+
+def _bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    if str(value).strip().lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _setting(name: str, default: Any, parse: Callable[[Any], Any] = str) -> Any:
+    """Read a setting from the environment, then the config file, then the default."""
+    if name in os.environ:
+        value = os.environ[name]
+    elif name in _CONFIG_FILE:
+        value = _CONFIG_FILE[name]
+    else:
+        return default
+    try:
+        return parse(value)
+    except (TypeError, ValueError) as e:
+        CONFIG_ERRORS.append(f"{name}={value!r}: {e}")
+        return default
+
+
+NEO4J_URI = _setting("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = _setting("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = _setting("NEO4J_PASSWORD", "jkn050214")
+# None uses the server's default database
+NEO4J_DATABASE: Optional[str] = _setting("NEO4J_DATABASE", None, _optional(str))
+
+# Driver connection pool; size it to at least the number of request threads
+# per process, since each in-flight query holds one connection
+NEO4J_MAX_CONNECTION_POOL_SIZE = _setting("NEO4J_MAX_CONNECTION_POOL_SIZE", 100, int)
+# Seconds to wait for a free pooled connection before failing the query
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = _setting(
+    "NEO4J_CONNECTION_ACQUISITION_TIMEOUT", 60.0, float
+)
+# Seconds to wait for a new TCP connection to open
+NEO4J_CONNECTION_TIMEOUT = _setting("NEO4J_CONNECTION_TIMEOUT", 30.0, float)
+# Seconds after which pooled connections are closed and replaced
+NEO4J_MAX_CONNECTION_LIFETIME = _setting("NEO4J_MAX_CONNECTION_LIFETIME", 3600.0, float)
+# Connections idle for longer than this many seconds are pinged before reuse;
+# None disables the check
+NEO4J_LIVENESS_CHECK_TIMEOUT: Optional[float] = _setting(
+    "NEO4J_LIVENESS_CHECK_TIMEOUT", None, _optional(float)
+)
+# Records pulled per batch from the server; -1 pulls everything at once
+NEO4J_FETCH_SIZE = _setting("NEO4J_FETCH_SIZE", 1000, int)
+
+# Cache encoded JSON bodies of hot GET endpoints next to the entities they render
+RESPONSE_CACHE_ENABLED = _setting("RESPONSE_CACHE_ENABLED", True, _bool)
+# Also keep a gzip copy for bodies of at least RESPONSE_CACHE_GZIP_MIN_BYTES
+RESPONSE_CACHE_GZIP = _setting("RESPONSE_CACHE_GZIP", True, _bool)
+RESPONSE_CACHE_GZIP_MIN_BYTES = _setting("RESPONSE_CACHE_GZIP_MIN_BYTES", 1024, int)
+
+# Bound on the driver's own retries of transient errors, in seconds
+NEO4J_MAX_TRANSACTION_RETRY_TIME = _setting(
+    "NEO4J_MAX_TRANSACTION_RETRY_TIME", 5.0, float
+)
+# Consecutive failures to reach Neo4j after which queries fail fast, and
+# seconds to wait before letting one probe query through again
+NEO4J_CIRCUIT_FAILURE_THRESHOLD = _setting("NEO4J_CIRCUIT_FAILURE_THRESHOLD", 5, int)
+NEO4J_CIRCUIT_RESET_TIMEOUT = _setting("NEO4J_CIRCUIT_RESET_TIMEOUT", 10.0, float)
+# Seconds past their TTL that cached reads may still be served while Neo4j
+# is unreachable
+CACHE_STALE_TTL = _setting("CACHE_STALE_TTL", 3600.0, float)
+# Seconds a read replica may lag behind the leader: values read that soon
+# after a write to one of their entities are not cached, so a lagging read
+# never replaces the entry the write put back
+CACHE_REPLICA_LAG = _setting("CACHE_REPLICA_LAG", 2.0, float)
+
+# Seconds a request may spend on Neo4j queries, unless its endpoint sets its
+# own budget; clients may ask for a different one with the X-Request-Timeout
+# header, capped at REQUEST_TIMEOUT_MAX
+REQUEST_TIMEOUT = _setting("REQUEST_TIMEOUT", 10.0, float)
+REQUEST_TIMEOUT_MAX = _setting("REQUEST_TIMEOUT_MAX", 120.0, float)
+
+# Seconds after a paper write during which a search that finds nothing
+# waits for the eventually consistent full-text index to refresh
+FULLTEXT_INDEX_LAG_WINDOW = _setting("FULLTEXT_INDEX_LAG_WINDOW", 2.0, float)
+
+# Search totals are counted exactly up to SEARCH_TOTAL_EXACT_LIMIT hits and
+# reported as a lower bound above it; facets are counted over those hits and
+# list the SEARCH_FACET_SIZE most frequent values
+SEARCH_TOTAL_EXACT_LIMIT = _setting("SEARCH_TOTAL_EXACT_LIMIT", 10000, int)
+SEARCH_FACET_SIZE = _setting("SEARCH_FACET_SIZE", 10, int)
+
+# Approximate length in characters of the abstract snippets of search hits
+SEARCH_SNIPPET_LENGTH = _setting("SEARCH_SNIPPET_LENGTH", 200, int)
+
+# Search backend: "neo4j" (the full-text index) or "local", an in-process
+# BM25 index (needs numpy) built from a snapshot of all papers in the
+# background and rebuilt every SEARCH_LOCAL_REFRESH_INTERVAL seconds (0:
+# never) to pick up writes made by other processes. Until it is built,
+# searches use Neo4j.
+SEARCH_BACKEND = _setting("SEARCH_BACKEND", "neo4j").lower()
+SEARCH_LOCAL_REFRESH_INTERVAL = _setting("SEARCH_LOCAL_REFRESH_INTERVAL", 900.0, float)
+# BM25 parameters of the local backend; a title word counts
+# SEARCH_BM25_TITLE_BOOST times an abstract word
+SEARCH_BM25_K1 = _setting("SEARCH_BM25_K1", 1.2, float)
+SEARCH_BM25_B = _setting("SEARCH_BM25_B", 0.75, float)
+SEARCH_BM25_TITLE_BOOST = _setting("SEARCH_BM25_TITLE_BOOST", 2.0, float)
+
+# "Similar papers" (needs numpy): hashed TF-IDF vectors of SIMILAR_DIMENSIONS
+# dimensions, in a memory-mapped matrix under SIMILAR_INDEX_DIR (None: a
+# directory in the system temp dir) shared by the processes of one host and
+# rebuilt every SIMILAR_REFRESH_INTERVAL seconds (0: never). With
+# SIMILAR_IVF_LISTS > 0, a query scans only the SIMILAR_IVF_PROBES closest of
+# that many k-means lists instead of every paper.
+SIMILAR_INDEX_DIR: Optional[str] = _setting("SIMILAR_INDEX_DIR", None, _optional(str))
+SIMILAR_DIMENSIONS = _setting("SIMILAR_DIMENSIONS", 256, int)
+SIMILAR_REFRESH_INTERVAL = _setting("SIMILAR_REFRESH_INTERVAL", 3600.0, float)
+SIMILAR_IVF_LISTS = _setting("SIMILAR_IVF_LISTS", 0, int)
+SIMILAR_IVF_PROBES = _setting("SIMILAR_IVF_PROBES", 8, int)
+
+# Per-process admission budgets of expensive endpoint classes: requests in
+# flight, and requests allowed to queue for a slot. Queued requests hold a
+# worker thread too, so keep concurrency + queue of all classes below the
+# worker thread count; cheap lookups then always find a thread.
+ADMISSION_HEAVY_CONCURRENCY = _setting("ADMISSION_HEAVY_CONCURRENCY", 2, int)
+ADMISSION_HEAVY_QUEUE = _setting("ADMISSION_HEAVY_QUEUE", 2, int)
+ADMISSION_BULK_CONCURRENCY = _setting("ADMISSION_BULK_CONCURRENCY", 1, int)
+ADMISSION_BULK_QUEUE = _setting("ADMISSION_BULK_QUEUE", 1, int)
+# Seconds a request may wait in an admission queue
+ADMISSION_QUEUE_TIMEOUT = _setting("ADMISSION_QUEUE_TIMEOUT", 5.0, float)
+
+# Time every query; those taking at least SLOW_QUERY_THRESHOLD_MS are logged
+# to "akb.slow_query". For SLOW_QUERY_PLAN_SAMPLE_RATE of them the plan is
+# captured in the background with SLOW_QUERY_PLAN_MODE (EXPLAIN or PROFILE;
+# writes always use EXPLAIN). The last SLOW_QUERY_LOG_SIZE are kept.
+SLOW_QUERY_LOG_ENABLED = _setting("SLOW_QUERY_LOG_ENABLED", True, _bool)
+SLOW_QUERY_THRESHOLD_MS = _setting("SLOW_QUERY_THRESHOLD_MS", 200.0, float)
+SLOW_QUERY_PLAN_SAMPLE_RATE = _setting("SLOW_QUERY_PLAN_SAMPLE_RATE", 0.1, float)
+SLOW_QUERY_PLAN_MODE = _setting("SLOW_QUERY_PLAN_MODE", "EXPLAIN").upper()
+SLOW_QUERY_LOG_SIZE = _setting("SLOW_QUERY_LOG_SIZE", 100, int)
+
+# Operator endpoints (cache and query statistics, cache invalidation) need
+# the header `X-Admin-Token: <ADMIN_TOKEN>`; unset, they are refused
+ADMIN_TOKEN: Optional[str] = _setting("ADMIN_TOKEN", None, _optional(str))
+
+_NEO4J_SCHEMES = ("bolt", "bolt+s", "bolt+ssc", "neo4j", "neo4j+s", "neo4j+ssc")
+
+
+def validate_neo4j_config():
+    """Raise ValueError listing every invalid Neo4j setting."""
+    errors = list(CONFIG_ERRORS)
+    if NEO4J_URI.split("://", 1)[0] not in _NEO4J_SCHEMES:
+        errors.append(f"NEO4J_URI={NEO4J_URI!r}: scheme must be one of {_NEO4J_SCHEMES}")
+    if NEO4J_MAX_CONNECTION_POOL_SIZE < 1:
+        errors.append("NEO4J_MAX_CONNECTION_POOL_SIZE must be at least 1")
+    for name, value in (
+        ("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", NEO4J_CONNECTION_ACQUISITION_TIMEOUT),
+        ("NEO4J_CONNECTION_TIMEOUT", NEO4J_CONNECTION_TIMEOUT),
+        ("NEO4J_MAX_CONNECTION_LIFETIME", NEO4J_MAX_CONNECTION_LIFETIME),
+        ("NEO4J_CIRCUIT_RESET_TIMEOUT", NEO4J_CIRCUIT_RESET_TIMEOUT),
+        ("REQUEST_TIMEOUT", REQUEST_TIMEOUT),
+        ("REQUEST_TIMEOUT_MAX", REQUEST_TIMEOUT_MAX),
+    ):
+        if value <= 0:
+            errors.append(f"{name} must be positive")
+    if ADMISSION_HEAVY_CONCURRENCY < 1 or ADMISSION_BULK_CONCURRENCY < 1:
+        errors.append("ADMISSION_*_CONCURRENCY must be at least 1")
+    if ADMISSION_HEAVY_QUEUE < 0 or ADMISSION_BULK_QUEUE < 0:
+        errors.append("ADMISSION_*_QUEUE must not be negative")
+    if NEO4J_MAX_TRANSACTION_RETRY_TIME < 0:
+        errors.append("NEO4J_MAX_TRANSACTION_RETRY_TIME must not be negative")
+    if CACHE_REPLICA_LAG < 0:
+        errors.append("CACHE_REPLICA_LAG must not be negative")
+    if FULLTEXT_INDEX_LAG_WINDOW < 0:
+        errors.append("FULLTEXT_INDEX_LAG_WINDOW must not be negative")
+    if SEARCH_TOTAL_EXACT_LIMIT < 1 or SEARCH_FACET_SIZE < 1:
+        errors.append("SEARCH_TOTAL_EXACT_LIMIT and SEARCH_FACET_SIZE must be at least 1")
+    if SEARCH_SNIPPET_LENGTH < 20:
+        errors.append("SEARCH_SNIPPET_LENGTH must be at least 20")
+    if SEARCH_BACKEND not in ("neo4j", "local"):
+        errors.append("SEARCH_BACKEND must be neo4j or local")
+    if SEARCH_LOCAL_REFRESH_INTERVAL < 0:
+        errors.append("SEARCH_LOCAL_REFRESH_INTERVAL must not be negative")
+    if SEARCH_BM25_K1 < 0 or not 0 <= SEARCH_BM25_B <= 1:
+        errors.append("SEARCH_BM25_K1 must not be negative, SEARCH_BM25_B must be 0-1")
+    if SEARCH_BM25_TITLE_BOOST <= 0:
+        errors.append("SEARCH_BM25_TITLE_BOOST must be positive")
+    if SIMILAR_DIMENSIONS < 1 or SIMILAR_IVF_PROBES < 1:
+        errors.append("SIMILAR_DIMENSIONS and SIMILAR_IVF_PROBES must be at least 1")
+    if SIMILAR_IVF_LISTS < 0 or SIMILAR_REFRESH_INTERVAL < 0:
+        errors.append(
+            "SIMILAR_IVF_LISTS and SIMILAR_REFRESH_INTERVAL must not be negative"
+        )
+    if SLOW_QUERY_PLAN_MODE not in ("EXPLAIN", "PROFILE"):
+        errors.append("SLOW_QUERY_PLAN_MODE must be EXPLAIN or PROFILE")
+    if not 0 <= SLOW_QUERY_PLAN_SAMPLE_RATE <= 1:
+        errors.append("SLOW_QUERY_PLAN_SAMPLE_RATE must be between 0 and 1")
+    if SLOW_QUERY_LOG_SIZE < 1:
+        errors.append("SLOW_QUERY_LOG_SIZE must be at least 1")
+    if NEO4J_CIRCUIT_FAILURE_THRESHOLD < 1:
+        errors.append("NEO4J_CIRCUIT_FAILURE_THRESHOLD must be at least 1")
+    if NEO4J_LIVENESS_CHECK_TIMEOUT is not None and NEO4J_LIVENESS_CHECK_TIMEOUT < 0:
+        errors.append("NEO4J_LIVENESS_CHECK_TIMEOUT must not be negative")
+    if NEO4J_FETCH_SIZE < 1 and NEO4J_FETCH_SIZE != -1:
+        errors.append("NEO4J_FETCH_SIZE must be positive, or -1 to fetch all")
+    if errors:
+        raise ValueError("Invalid Neo4j configuration: " + "; ".join(errors))
+
+
+def neo4j_driver_options() -> Dict[str, Any]:
+    """Keyword arguments for `GraphDatabase.driver` built from the settings."""
+    return {
+        "max_connection_pool_size": NEO4J_MAX_CONNECTION_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        "connection_timeout": NEO4J_CONNECTION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+        "liveness_check_timeout": NEO4J_LIVENESS_CHECK_TIMEOUT,
+        "fetch_size": NEO4J_FETCH_SIZE,
+        "max_transaction_retry_time": NEO4J_MAX_TRANSACTION_RETRY_TIME,
+    }
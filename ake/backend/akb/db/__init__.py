@@ -1,5 +1,20 @@
 from .meta import *
 from .neo4j_connection import get_neo4j_db
+from .async_neo4j_connection import get_async_neo4j_db
+from .causal import get_raw_bookmarks, set_raw_bookmarks
+from .circuit_breaker import (
+    Neo4jUnavailable,
+    get_circuit_breaker,
+    neo4j_unavailable,
+    clear_unavailable,
+)
+from .deadline import (
+    DeadlineExceeded,
+    start_deadline,
+    remaining_time,
+    deadline_exceeded,
+)
+from .query_log import get_query_log
 from .cache_manager import (
     CacheType,
     get_cache_manager,
@@ -0,0 +1,96 @@
+from contextlib import asynccontextmanager
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from ..config import (
+    NEO4J_URI,
+    NEO4J_USER,
+    NEO4J_PASSWORD,
+    NEO4J_DATABASE,
+    validate_neo4j_config,
+    neo4j_driver_options,
+)
+from .causal import current_bookmarks, record_bookmarks
+from .deadline import AsyncDeadlineSession
+from .circuit_breaker import get_circuit_breaker
+from .query_log import timed_async
+
+
+class AsyncGuardedSession(AsyncDeadlineSession):
+    """Async twin of GuardedSession."""
+
+    async def execute_read(self, transaction_function, *args, **kwargs):
+        return await get_circuit_breaker().call_async(
+            super().execute_read,
+            timed_async(transaction_function, write=False),
+            *args,
+            **kwargs,
+        )
+
+    async def execute_write(self, transaction_function, *args, **kwargs):
+        return await get_circuit_breaker().call_async(
+            super().execute_write,
+            timed_async(transaction_function, write=True),
+            *args,
+            **kwargs,
+        )
+
+
+class AsyncNeo4jConnection:
+    """
+    Asyncio twin of Neo4jConnection.
+
+    The driver is bound to the event loop it is first used on, so it is
+    created lazily on the first session rather than at construction.
+    """
+
+    _instance = None
+    _driver = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            validate_neo4j_config()
+            cls._instance = super(AsyncNeo4jConnection, cls).__new__(cls)
+        return cls._instance
+
+    def get_driver(self):
+        if AsyncNeo4jConnection._driver is None:
+            AsyncNeo4jConnection._driver = AsyncGraphDatabase.driver(
+                NEO4J_URI,
+                auth=(NEO4J_USER, NEO4J_PASSWORD),
+                **neo4j_driver_options(),
+            )
+        return AsyncNeo4jConnection._driver
+
+    def session(self, **kwargs):
+        """Open a session on the configured database; see Neo4jConnection.session."""
+        if NEO4J_DATABASE is not None:
+            kwargs.setdefault("database", NEO4J_DATABASE)
+        return AsyncGuardedSession(self.get_driver().session(**kwargs))
+
+    def read_session(self, **kwargs):
+        """Open a session for reads, starting from the caller's last write."""
+        bookmarks = current_bookmarks()
+        if bookmarks is not None:
+            kwargs.setdefault("bookmarks", bookmarks)
+        return self.session(default_access_mode=READ_ACCESS, **kwargs)
+
+    @asynccontextmanager
+    async def write_session(self, **kwargs):
+        """Open a session for writes, recording its bookmarks for later reads."""
+        bookmarks = current_bookmarks()
+        if bookmarks is not None:
+            kwargs.setdefault("bookmarks", bookmarks)
+        async with self.session(default_access_mode=WRITE_ACCESS, **kwargs) as session:
+            yield session
+            record_bookmarks(await session.last_bookmarks())
+
+    async def close(self):
+        if AsyncNeo4jConnection._driver is not None:
+            await AsyncNeo4jConnection._driver.close()
+            print("Async Neo4j connection closed.")
+            AsyncNeo4jConnection._driver = None
+            AsyncNeo4jConnection._instance = None
+
+
+# Singleton instance
+def get_async_neo4j_db():
+    return AsyncNeo4jConnection()
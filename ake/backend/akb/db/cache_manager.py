@@ -1,8 +1,11 @@
 import enum
+import sys
 import time
 import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Set
+from ..config import CACHE_REPLICA_LAG, CACHE_STALE_TTL
 
 
 class CacheType(enum.Enum):
@@ -11,6 +14,7 @@ class CacheType(enum.Enum):
     PAPER = enum.auto()
     CATEGORY = enum.auto()
     OVERVIEW = enum.auto()
+    RESPONSE = enum.auto()
 
 
 @dataclass
@@ -24,25 +28,145 @@ class CacheEntry:
     accessed_at: float
     ttl: float
     dependencies: Set[str]  # IDs of entities this cache depends on
+    # Type of the entry this one was derived from, e.g. the PAPER entry behind
+    # a cached RESPONSE; invalidating that type drops derived entries too
+    source_type: Optional[CacheType] = None
+    size: int = 0  # Estimated bytes held by data
+
+
+_STAT_NAMES = ("hits", "misses", "stale_hits", "evictions", "invalidations")
+
+# Upper bounds (seconds) of the entry age histogram in stats
+AGE_BUCKETS = (10, 60, 300, 1800, float("inf"))
+
+# Sequences longer than this are sized from a sample of their items
+_SIZE_SAMPLE = 64
+
+# Values read from the database over more than this many seconds are not
+# cached, which bounds how long write times must be remembered
+_MAX_READ_TIME = 300.0
+
+
+def _estimate_size(obj: Any, _seen: Optional[Set[int]] = None) -> int:
+    """Roughly estimate the memory held by a cached object, in bytes."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        sample = items[:_SIZE_SAMPLE]
+        sampled = sum(_estimate_size(k, _seen) + _estimate_size(v, _seen) for k, v in sample)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = list(obj)
+        sample = items[:_SIZE_SAMPLE]
+        sampled = sum(_estimate_size(item, _seen) for item in sample)
+    elif hasattr(obj, "__dict__"):
+        return size + _estimate_size(vars(obj), _seen)
+    elif hasattr(type(obj), "__slots__"):
+        slots = [getattr(obj, name, None) for name in type(obj).__slots__]
+        return size + sum(_estimate_size(value, _seen) for value in slots)
+    else:
+        return size
+
+    if sample:
+        size += sampled * len(items) // len(sample)
+    return size
+
+
+class _TimedLock:
+    """A lock that accounts for time spent waiting for and holding it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.wait_seconds = 0.0
+        self.hold_seconds = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        self.wait_seconds += self._acquired_at - start
+        return self
+
+    def __exit__(self, *exc_info):
+        self.hold_seconds += time.perf_counter() - self._acquired_at
+        self._lock.release()
+
+
+class _CacheShard:
+    """A lock-protected slice of the cache, kept in LRU order."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.lock = _TimedLock()
+        # cache type -> stat name -> count
+        self.stats = {
+            cache_type: dict.fromkeys(_STAT_NAMES, 0) for cache_type in CacheType
+        }
+
+
+class _DependencyStripe:
+    """A lock-protected slice of the entity_id -> dependent entries index."""
+
+    def __init__(self):
+        # entity_id -> {cache key: entry registered under that key}
+        self.index: Dict[str, Dict[str, CacheEntry]] = {}
+        # entity_id -> time.monotonic() of its last invalidation
+        self.written: Dict[str, float] = {}
+        self.pruned_at = time.monotonic()
+        self.lock = _TimedLock()
 
 
 class CacheManager:
     """
     Intelligent cache manager that automatically invalidates cache entries
     when related data changes in the database.
+
+    Entries are spread over `num_shards` lock-striped shards by key hash, and
+    the dependency index is striped by entity id, so readers of different
+    keys do not contend on a single lock. No code path holds more than one
+    lock at a time.
+
+    Expired entries are kept for `stale_ttl` more seconds (unless evicted or
+    invalidated) so `get_stale` can serve them while the database is down.
+
+    A value read from the database is put with the `begin_read()` time taken
+    before the read. It is not cached if one of its entities, or its type,
+    was invalidated while the read ran or less than `replica_lag` seconds
+    before it started: a replica may not have had that write yet, and the
+    value must not replace the entry the writer put back.
     """
 
-    def __init__(self, max_size: int = 10000, default_ttl: float = 300):
+    def __init__(
+        self,
+        max_size: int = 10000,
+        default_ttl: float = 300,
+        num_shards: int = 16,
+        stale_ttl: float = 0,
+        replica_lag: float = 0,
+    ):
         self.max_size = max_size
         self.default_ttl = default_ttl
-        self._cache: Dict[str, CacheEntry] = {}
-        self._lock = threading.RLock()
+        self.stale_ttl = stale_ttl
+        self.replica_lag = replica_lag
+        self.num_shards = max(1, num_shards)
 
-        # Statistics
-        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        shard_size = max(1, -(-max_size // self.num_shards))
+        self._shards = [_CacheShard(shard_size) for _ in range(self.num_shards)]
 
-        # Dependency tracking: entity_id -> set of cache keys that depend on it
-        self._dependencies: Dict[str, Set[str]] = {}
+        # Dependency tracking: entity_id -> cache entries that depend on it
+        self._dependencies = [_DependencyStripe() for _ in range(self.num_shards)]
+        # cache type -> time.monotonic() of its last invalidate_by_type/clear
+        self._type_written: Dict[CacheType, float] = {}
+        self._type_lock = threading.Lock()
 
     def _generate_key(self, cache_type: CacheType, *args, **kwargs) -> str:
         """Generate a cache key from arguments."""
@@ -56,30 +180,69 @@ class CacheManager:
         # Use built-in hash for simplicity and speed
         return hash(key_string)
 
+    def _shard_for(self, key: str) -> _CacheShard:
+        return self._shards[hash(key) % self.num_shards]
+
+    def _stripe_for(self, entity_id: str) -> _DependencyStripe:
+        return self._dependencies[hash(entity_id) % self.num_shards]
+
     def get(self, cache_type: CacheType, *args, **kwargs) -> Optional[Any]:
         """Get a value from cache."""
         key = self._generate_key(cache_type, *args, **kwargs)
+        shard = self._shard_for(key)
 
-        with self._lock:
-            entry = self._cache.get(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
 
             if entry is None:
-                self._stats["misses"] += 1
+                shard.stats[cache_type]["misses"] += 1
                 return None
 
             # Check if expired
             current_time = time.time()
-            if current_time - entry.created_at > entry.ttl:
-                del self._cache[key]
-                self._remove_dependencies(key)
-                self._stats["misses"] += 1
-                return None
+            age = current_time - entry.created_at
+            if age > entry.ttl:
+                shard.stats[cache_type]["misses"] += 1
+                if age <= entry.ttl + self.stale_ttl:
+                    # Kept for get_stale
+                    return None
+                del shard.entries[key]
+                expired = entry
+            else:
+                # Update access time
+                entry.accessed_at = current_time
+                shard.entries.move_to_end(key)
+                shard.stats[cache_type]["hits"] += 1
+                return entry.data
+
+        self._remove_dependencies(expired)
+        return None
+
+    def get_stale(self, cache_type: CacheType, *args, **kwargs) -> Optional[Any]:
+        """Get a value even if it expired less than `stale_ttl` seconds ago."""
+        key = self._generate_key(cache_type, *args, **kwargs)
+        shard = self._shard_for(key)
 
-            # Update access time
-            entry.accessed_at = current_time
-            self._stats["hits"] += 1
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.created_at > entry.ttl + self.stale_ttl:
+                return None
+            shard.stats[cache_type]["stale_hits"] += 1
             return entry.data
 
+    def peek(self, cache_type: CacheType, *args, **kwargs) -> Optional[CacheEntry]:
+        """Get a live cache entry with its metadata, without touching stats or LRU order."""
+        key = self._generate_key(cache_type, *args, **kwargs)
+        shard = self._shard_for(key)
+
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None or time.time() - entry.created_at > entry.ttl:
+                return None
+            return entry
+
     def put(
         self,
         cache_type: CacheType,
@@ -87,9 +250,17 @@ class CacheManager:
         dependencies: Optional[List[str]] = None,
         ttl: Optional[float] = None,
         *args,
+        source_type: Optional[CacheType] = None,
+        read_started: Optional[float] = None,
         **kwargs,
-    ) -> str:
-        """Put a value in cache with optional dependencies."""
+    ) -> Optional[str]:
+        """
+        Put a value in cache with optional dependencies.
+
+        Values read from the database pass the `begin_read()` time taken
+        before the read as `read_started`; values a write returned pass none.
+        Returns None if a value read too close to a write was not cached.
+        """
         key = self._generate_key(cache_type, *args, **kwargs)
 
         if ttl is None:
@@ -107,118 +278,321 @@ class CacheManager:
             accessed_at=current_time,
             ttl=ttl,
             dependencies=set(dependencies),
+            source_type=source_type,
+            size=_estimate_size(data),
         )
 
-        with self._lock:
-            # Remove old entry if exists
-            if key in self._cache:
-                self._remove_dependencies(key)
-
-            # Check cache size and evict if necessary
-            if len(self._cache) >= self.max_size:
-                self._evict_lru()
+        # Register dependencies before the entry becomes visible, so an
+        # invalidation racing with this put can always find it
+        for dep_id in entry.dependencies:
+            stripe = self._stripe_for(dep_id)
+            with stripe.lock:
+                stripe.index.setdefault(dep_id, {})[key] = entry
+
+        # An invalidation from here on drops the registered entry, so one
+        # that came before is seen by its recorded time
+        if read_started is not None and self._written_since(entry, read_started):
+            self._remove_dependencies(entry)
+            return None
+
+        shard = self._shard_for(key)
+        dropped = []
+        with shard.lock:
+            # Replace old entry if exists
+            old_entry = shard.entries.pop(key, None)
+            if old_entry is not None:
+                dropped.append(old_entry)
+
+            # Check shard size and evict if necessary
+            while len(shard.entries) >= shard.max_size:
+                _, lru_entry = shard.entries.popitem(last=False)
+                dropped.append(lru_entry)
+                shard.stats[lru_entry.cache_type]["evictions"] += 1
 
             # Add new entry
-            self._cache[key] = entry
+            shard.entries[key] = entry
+
+        for old in dropped:
+            self._remove_dependencies(old)
+
+        # If a dependency was invalidated between registration and insertion,
+        # the invalidation could not see the entry yet; drop it ourselves
+        for dep_id in entry.dependencies:
+            stripe = self._stripe_for(dep_id)
+            with stripe.lock:
+                still_registered = stripe.index.get(dep_id, {}).get(key) is entry
+            if not still_registered:
+                self._discard_entry(entry)
+                return None
 
-            # Update dependency tracking
-            for dep_id in dependencies:
-                if dep_id not in self._dependencies:
-                    self._dependencies[dep_id] = set()
-                self._dependencies[dep_id].add(key)
+        # invalidate_by_type may have scanned the shard before the insertion
+        if read_started is not None and self._written_since(entry, read_started):
+            self._discard_entry(entry)
+            return None
 
         return key
 
+    def put_derived(
+        self, origin: CacheEntry, cache_type: CacheType, data: Any, *args, **kwargs
+    ) -> Optional[str]:
+        """
+        Put a value computed from the `origin` entry, with its dependencies and
+        at most its remaining TTL.
+
+        Nothing is cached if a write has replaced or dropped `origin` since it
+        was read, as the value would then be stale under the new entry.
+        """
+        if not self._is_current(origin):
+            return None
+        remaining_ttl = origin.ttl - (time.time() - origin.created_at)
+        key = self.put(
+            cache_type,
+            data,
+            list(origin.dependencies),
+            remaining_ttl,
+            *args,
+            source_type=origin.cache_type,
+            **kwargs,
+        )
+        if key is None:
+            return None
+
+        # The derived entry's dependencies are registered by now, so a later
+        # invalidation of the origin drops it too; one that came in between
+        # the check above and the put is caught here
+        if not self._is_current(origin):
+            shard = self._shard_for(key)
+            with shard.lock:
+                entry = shard.entries.get(key)
+            if entry is not None:
+                self._discard_entry(entry)
+            return None
+        return key
+
+    def begin_read(self) -> float:
+        """The `read_started` to put a value with that is read from now on."""
+        return time.monotonic()
+
+    def _written_since(self, entry: CacheEntry, read_started: float) -> bool:
+        """Whether a write may be missing from a value read from `read_started`."""
+        now = time.monotonic()
+        if now - read_started > _MAX_READ_TIME:
+            return True
+        since = read_started - self.replica_lag
+        with self._type_lock:
+            if self._type_written.get(entry.cache_type, since - 1) >= since:
+                return True
+        for dep_id in entry.dependencies:
+            stripe = self._stripe_for(dep_id)
+            with stripe.lock:
+                if stripe.written.get(dep_id, since - 1) >= since:
+                    return True
+        return False
+
+    def _record_write(self, stripe: _DependencyStripe, entity_id: str):
+        """Record an invalidation of `entity_id`; the caller holds the stripe lock."""
+        now = time.monotonic()
+        stripe.written[entity_id] = now
+        # Forget writes no read that may still be put can have missed
+        horizon = self.replica_lag + _MAX_READ_TIME
+        if now - stripe.pruned_at > horizon:
+            stripe.written = {
+                dep_id: written
+                for dep_id, written in stripe.written.items()
+                if now - written <= horizon
+            }
+            stripe.pruned_at = now
+
+    def _is_current(self, entry: CacheEntry) -> bool:
+        shard = self._shard_for(entry.key)
+        with shard.lock:
+            return shard.entries.get(entry.key) is entry
+
     def invalidate_by_entity(self, entity_id: str):
         """Invalidate all cache entries that depend on a specific entity."""
-        with self._lock:
-            if entity_id in self._dependencies:
-                keys_to_invalidate = self._dependencies[entity_id].copy()
+        stripe = self._stripe_for(entity_id)
+        with stripe.lock:
+            self._record_write(stripe, entity_id)
+            dependents = stripe.index.pop(entity_id, None)
 
-                for key in keys_to_invalidate:
-                    if key in self._cache:
-                        del self._cache[key]
-                        self._remove_dependencies(key)
-                        self._stats["invalidations"] += 1
+        if not dependents:
+            return
 
-                del self._dependencies[entity_id]
+        for entry in dependents.values():
+            self._discard_entry(entry)
 
     def invalidate_by_type(self, cache_type: CacheType):
-        """Invalidate all cache entries of a specific type."""
-        with self._lock:
-            keys_to_remove = [
-                key
-                for key, entry in self._cache.items()
-                if entry.cache_type == cache_type
-            ]
-
-            for key in keys_to_remove:
-                del self._cache[key]
-                self._remove_dependencies(key)
-                self._stats["invalidations"] += 1
+        """Invalidate all cache entries of a specific type, and entries derived from them."""
+        with self._type_lock:
+            self._type_written[cache_type] = time.monotonic()
+
+        removed = []
+        # Scan one shard at a time so readers of other shards keep going
+        for shard in self._shards:
+            with shard.lock:
+                keys_to_remove = [
+                    key
+                    for key, entry in shard.entries.items()
+                    if entry.cache_type == cache_type
+                    or entry.source_type == cache_type
+                ]
+
+                for key in keys_to_remove:
+                    entry = shard.entries.pop(key)
+                    shard.stats[entry.cache_type]["invalidations"] += 1
+                    removed.append(entry)
+
+        for entry in removed:
+            self._remove_dependencies(entry)
 
     def clear(self):
         """Clear all cache entries."""
-        with self._lock:
-            self._cache.clear()
-            self._dependencies.clear()
-            self._stats["invalidations"] += len(self._cache)
-
-    def _evict_lru(self):
-        """Evict the least recently used cache entry."""
-        if not self._cache:
-            return
-
-        # Find LRU entry
-        lru_key = min(self._cache.keys(), key=lambda k: self._cache[k].accessed_at)
-
-        del self._cache[lru_key]
-        self._remove_dependencies(lru_key)
-        self._stats["evictions"] += 1
-
-    def _remove_dependencies(self, cache_key: str):
-        """Remove dependency mappings for a cache key."""
-        entry = self._cache.get(cache_key)
-        if entry:
-            for dep_id in entry.dependencies:
-                if dep_id in self._dependencies:
-                    self._dependencies[dep_id].discard(cache_key)
-                    if not self._dependencies[dep_id]:
-                        del self._dependencies[dep_id]
+        now = time.monotonic()
+        with self._type_lock:
+            self._type_written = dict.fromkeys(CacheType, now)
+
+        for shard in self._shards:
+            with shard.lock:
+                for entry in shard.entries.values():
+                    shard.stats[entry.cache_type]["invalidations"] += 1
+                shard.entries.clear()
+        for stripe in self._dependencies:
+            with stripe.lock:
+                stripe.index.clear()
+
+    def _discard_entry(self, entry: CacheEntry):
+        """Remove an entry if it is still the one cached under its key."""
+        shard = self._shard_for(entry.key)
+        with shard.lock:
+            if shard.entries.get(entry.key) is not entry:
+                return
+            del shard.entries[entry.key]
+            shard.stats[entry.cache_type]["invalidations"] += 1
+
+        self._remove_dependencies(entry)
+
+    def _remove_dependencies(self, entry: CacheEntry):
+        """Remove dependency mappings for a cache entry."""
+        for dep_id in entry.dependencies:
+            stripe = self._stripe_for(dep_id)
+            with stripe.lock:
+                dependents = stripe.index.get(dep_id)
+                if dependents is None or dependents.get(entry.key) is not entry:
+                    continue
+                del dependents[entry.key]
+                if not dependents:
+                    del stripe.index[dep_id]
 
     def get_stats(self) -> Dict:
-        """Get cache statistics."""
-        with self._lock:
-            total_requests = self._stats["hits"] + self._stats["misses"]
-            hit_rate = self._stats["hits"] / total_requests if total_requests > 0 else 0
-
-            return {
-                "cache_size": len(self._cache),
-                "max_size": self.max_size,
-                "hit_rate": hit_rate,
-                "hits": self._stats["hits"],
-                "misses": self._stats["misses"],
-                "evictions": self._stats["evictions"],
-                "invalidations": self._stats["invalidations"],
-                "dependency_count": len(self._dependencies),
+        """
+        Get cache statistics, overall and per cache type.
+
+        `by_type` holds per-type counters, live entry counts, estimated bytes
+        and a cumulative entry age histogram keyed by the AGE_BUCKETS upper
+        bounds. `lock` holds the total time spent waiting for and holding the
+        shard and dependency locks.
+        """
+        by_type = {
+            cache_type: {
+                **dict.fromkeys(_STAT_NAMES, 0),
+                "entries": 0,
+                "estimated_bytes": 0,
+                "ages": [0] * len(AGE_BUCKETS),
+            }
+            for cache_type in CacheType
+        }
+        lock_wait = lock_hold = 0.0
+
+        for shard in self._shards:
+            with shard.lock:
+                current_time = time.time()
+                for cache_type, counters in shard.stats.items():
+                    for name in _STAT_NAMES:
+                        by_type[cache_type][name] += counters[name]
+                for entry in shard.entries.values():
+                    stats = by_type[entry.cache_type]
+                    stats["entries"] += 1
+                    stats["estimated_bytes"] += entry.size
+                    age = current_time - entry.created_at
+                    for i, bound in enumerate(AGE_BUCKETS):
+                        if age <= bound:
+                            stats["ages"][i] += 1
+                            break
+            lock_wait += shard.lock.wait_seconds
+            lock_hold += shard.lock.hold_seconds
+
+        dependency_count = 0
+        for stripe in self._dependencies:
+            with stripe.lock:
+                dependency_count += len(stripe.index)
+            lock_wait += stripe.lock.wait_seconds
+            lock_hold += stripe.lock.hold_seconds
+
+        totals = dict.fromkeys(_STAT_NAMES, 0)
+        type_stats = {}
+        for cache_type, stats in by_type.items():
+            for name in _STAT_NAMES:
+                totals[name] += stats[name]
+            requests = stats["hits"] + stats["misses"]
+            cumulative = 0
+            age_histogram = {}
+            for bound, count in zip(AGE_BUCKETS, stats.pop("ages")):
+                cumulative += count
+                age_histogram["+Inf" if bound == float("inf") else str(bound)] = (
+                    cumulative
+                )
+            type_stats[cache_type.name] = {
+                **stats,
+                "hit_rate": stats["hits"] / requests if requests > 0 else 0,
+                "age_seconds": age_histogram,
             }
 
+        total_requests = totals["hits"] + totals["misses"]
+        hit_rate = totals["hits"] / total_requests if total_requests > 0 else 0
+
+        return {
+            "cache_size": sum(stats["entries"] for stats in type_stats.values()),
+            "max_size": self.max_size,
+            "num_shards": self.num_shards,
+            "default_ttl": self.default_ttl,
+            "hit_rate": hit_rate,
+            "hits": totals["hits"],
+            "misses": totals["misses"],
+            "stale_hits": totals["stale_hits"],
+            "evictions": totals["evictions"],
+            "invalidations": totals["invalidations"],
+            "dependency_count": dependency_count,
+            "estimated_bytes": sum(
+                stats["estimated_bytes"] for stats in type_stats.values()
+            ),
+            "lock": {"wait_seconds": lock_wait, "hold_seconds": lock_hold},
+            "by_type": type_stats,
+        }
+
     def get_cache_info(self) -> Dict:
         """Get detailed cache information for debugging."""
-        with self._lock:
-            cache_by_type = {}
-            for entry in self._cache.values():
-                cache_type = entry.cache_type.value
-                if cache_type not in cache_by_type:
-                    cache_by_type[cache_type] = 0
-                cache_by_type[cache_type] += 1
-
-            return {
-                "total_entries": len(self._cache),
-                "entries_by_type": cache_by_type,
-                "dependencies": {k: len(v) for k, v in self._dependencies.items()},
-                "stats": self.get_stats(),
-            }
+        cache_by_type = {}
+        total_entries = 0
+        for shard in self._shards:
+            with shard.lock:
+                total_entries += len(shard.entries)
+                for entry in shard.entries.values():
+                    cache_type = entry.cache_type.value
+                    if cache_type not in cache_by_type:
+                        cache_by_type[cache_type] = 0
+                    cache_by_type[cache_type] += 1
+
+        dependencies = {}
+        for stripe in self._dependencies:
+            with stripe.lock:
+                dependencies.update({k: len(v) for k, v in stripe.index.items()})
+
+        return {
+            "total_entries": total_entries,
+            "entries_by_type": cache_by_type,
+            "dependencies": dependencies,
+            "stats": self.get_stats(),
+        }
 
 
 # Global cache manager instance
@@ -229,7 +603,7 @@ def get_cache_manager() -> CacheManager:
     """Get the global cache manager instance."""
     global _CM
     if _CM is None:
-        _CM = CacheManager()
+        _CM = CacheManager(stale_ttl=CACHE_STALE_TTL, replica_lag=CACHE_REPLICA_LAG)
     return _CM
 
 
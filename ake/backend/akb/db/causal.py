@@ -0,0 +1,43 @@
+"""
+Causal consistency across requests.
+
+The bookmarks of a caller's last write are kept in a context variable for
+the duration of a request. Read sessions start from them, so once reads are
+routed to replicas a caller still reads their own writes. The web layer
+loads and saves the raw bookmark strings per client; this module does not
+know where they are persisted.
+"""
+
+from contextvars import ContextVar
+from typing import FrozenSet, Iterable, Optional
+from neo4j import Bookmarks
+
+_bookmarks: ContextVar[Optional[FrozenSet[str]]] = ContextVar(
+    "neo4j_bookmarks", default=None
+)
+
+
+def current_bookmarks() -> Optional[Bookmarks]:
+    """Bookmarks of the current caller's last write, if any."""
+    raw = _bookmarks.get()
+    if not raw:
+        return None
+    return Bookmarks.from_raw_values(raw)
+
+
+def record_bookmarks(bookmarks: Optional[Bookmarks]):
+    """Remember the bookmarks returned by a write session."""
+    if bookmarks is None:
+        return
+    raw = frozenset(bookmarks.raw_values)
+    if raw:
+        _bookmarks.set(raw)
+
+
+def get_raw_bookmarks() -> Optional[FrozenSet[str]]:
+    return _bookmarks.get()
+
+
+def set_raw_bookmarks(raw: Optional[Iterable[str]]):
+    """Start a caller's context from persisted bookmark strings."""
+    _bookmarks.set(frozenset(raw) if raw else None)
@@ -0,0 +1,154 @@
+"""
+Circuit breaker around Neo4j.
+
+After NEO4J_CIRCUIT_FAILURE_THRESHOLD consecutive failures to reach the
+database, queries fail at once with Neo4jUnavailable instead of each waiting
+on connection attempts. After NEO4J_CIRCUIT_RESET_TIMEOUT seconds one probe
+query is let through; its success closes the circuit again. Readers catch
+Neo4jUnavailable to serve stale cache entries.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from ..config import NEO4J_CIRCUIT_FAILURE_THRESHOLD, NEO4J_CIRCUIT_RESET_TIMEOUT
+from .deadline import DeadlineExceeded
+
+# Errors that mean the database could not serve the query at all, after the
+# driver's own retries
+AVAILABILITY_ERRORS = (ServiceUnavailable, SessionExpired)
+# Transient errors that mean the same; others, such as deadlocks and lock
+# timeouts, come from a server that is up
+UNAVAILABLE_CODES = frozenset(
+    {
+        "Neo.TransientError.General.DatabaseUnavailable",
+        "Neo.TransientError.Database.DatabaseUnavailable",
+        "Neo.TransientError.Cluster.NoLeaderAvailable",
+    }
+)
+
+_unavailable: ContextVar[bool] = ContextVar("neo4j_unavailable", default=False)
+
+
+class Neo4jUnavailable(ServiceUnavailable):
+    """Neo4j is unreachable, or the circuit is open and the query was not sent."""
+
+
+def is_availability_error(error: BaseException) -> bool:
+    """Whether `error` means the database could not serve the query at all."""
+    if isinstance(error, AVAILABILITY_ERRORS):
+        return True
+    return isinstance(error, TransientError) and error.code in UNAVAILABLE_CODES
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe query is let through."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if (
+                self.state == self.OPEN
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                # Let this call through as the probe
+                self.state = self.HALF_OPEN
+                return
+        _unavailable.set(True)
+        raise Neo4jUnavailable("Neo4j is unavailable, not sending the query")
+
+    def _on_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def _on_failure(self):
+        _unavailable.set(True)
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print("\033[31mERROR: Neo4j unavailable, opening circuit\033[0m")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def _on_neutral(self):
+        # Nothing was learned about the database; free the probe slot
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def _after_error(self, error: Exception):
+        if is_availability_error(error):
+            self._on_failure()
+        elif isinstance(error, DeadlineExceeded):
+            self._on_neutral()
+        else:
+            # Any other server error still proves the server is up
+            self._on_success()
+
+    def call(self, fn, *args, **kwargs):
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._after_error(e)
+            if is_availability_error(e):
+                raise Neo4jUnavailable(str(e)) from e
+            raise
+        except BaseException:
+            self._on_neutral()
+            raise
+        self._on_success()
+        return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        self._before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            self._after_error(e)
+            if is_availability_error(e):
+                raise Neo4jUnavailable(str(e)) from e
+            raise
+        except BaseException:
+            self._on_neutral()
+            raise
+        self._on_success()
+        return result
+
+
+# Shared by the sync and async connections, since both reach the same server
+_BREAKER = CircuitBreaker(NEO4J_CIRCUIT_FAILURE_THRESHOLD, NEO4J_CIRCUIT_RESET_TIMEOUT)
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    return _BREAKER
+
+
+def neo4j_unavailable() -> bool:
+    """Whether a query of the current request found Neo4j unavailable."""
+    return _unavailable.get()
+
+
+def clear_unavailable():
+    _unavailable.set(False)
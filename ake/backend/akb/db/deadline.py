@@ -0,0 +1,168 @@
+"""
+Per-request deadlines.
+
+The web layer starts a deadline for each request. Sessions opened through
+Neo4jConnection and AsyncNeo4jConnection run every transaction function
+with the time left as its transaction timeout, so the server cancels a
+query once the request is out of budget. Running out of budget raises
+DeadlineExceeded, which the web layer turns into a 504.
+
+The driver begins each of its retries with the timeout the first attempt
+got. An attempt that starts with noticeably less time left is therefore
+ended and run again with the time left as its timeout.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+from neo4j.exceptions import ClientError
+
+# Absolute time.monotonic() deadline of the current request, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+_exceeded: ContextVar[bool] = ContextVar("request_deadline_exceeded", default=False)
+
+# Seconds a transaction timeout may exceed the time left before the attempt
+# is restarted with a fresh one
+_TIMEOUT_SLACK = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """The current request ran out of its time budget."""
+
+
+class _StaleTimeout(Exception):
+    """Ends a driver attempt whose transaction timeout outlasts the deadline."""
+
+
+def start_deadline(seconds: Optional[float]):
+    """Give the current request `seconds` from now; None means no deadline."""
+    _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    _exceeded.set(False)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the deadline, or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def deadline_exceeded() -> bool:
+    """Whether a query of the current request ran out of budget."""
+    return _exceeded.get()
+
+
+def _raise_exceeded(cause: Optional[BaseException] = None):
+    _exceeded.set(True)
+    raise DeadlineExceeded("Request deadline exceeded") from cause
+
+
+def _is_timeout(error: ClientError) -> bool:
+    return "TransactionTimedOut" in (error.code or "")
+
+
+def _bounded(transaction_function):
+    """
+    Wrap a transaction function so each attempt gets the remaining budget.
+
+    Checked again on every retry, so the driver stops retrying once the
+    deadline has passed. An attempt that began with a timeout more than
+    _TIMEOUT_SLACK longer than the time left, as a retry after a backoff
+    does, raises _StaleTimeout for the session to start over.
+    """
+    if _deadline.get() is None:
+        return transaction_function
+
+    def bounded(*args, **kwargs):
+        left = remaining_time()
+        if left is not None and left <= 0:
+            _raise_exceeded()
+        if bounded.timeout - left > _TIMEOUT_SLACK:
+            raise _StaleTimeout()
+        return transaction_function(*args, **kwargs)
+
+    bounded.timeout = max(remaining_time(), 0.001)
+    return bounded
+
+
+class DeadlineSession:
+    """Session wrapper applying the request deadline to managed transactions."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._session.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def execute_read(self, transaction_function, *args, **kwargs):
+        return self._execute(
+            self._session.execute_read, transaction_function, *args, **kwargs
+        )
+
+    def execute_write(self, transaction_function, *args, **kwargs):
+        return self._execute(
+            self._session.execute_write, transaction_function, *args, **kwargs
+        )
+
+    @staticmethod
+    def _execute(execute, transaction_function, *args, **kwargs):
+        while True:
+            try:
+                return execute(_bounded(transaction_function), *args, **kwargs)
+            except _StaleTimeout:
+                # Start over with the time left as the timeout
+                continue
+            except ClientError as e:
+                if _is_timeout(e):
+                    _raise_exceeded(e)
+                raise
+
+
+class AsyncDeadlineSession:
+    """Async session wrapper applying the request deadline."""
+
+    def __init__(self, session):
+        self._session = session
+
+    async def __aenter__(self):
+        await self._session.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._session.__aexit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    async def execute_read(self, transaction_function, *args, **kwargs):
+        return await self._execute(
+            self._session.execute_read, transaction_function, *args, **kwargs
+        )
+
+    async def execute_write(self, transaction_function, *args, **kwargs):
+        return await self._execute(
+            self._session.execute_write, transaction_function, *args, **kwargs
+        )
+
+    @staticmethod
+    async def _execute(execute, transaction_function, *args, **kwargs):
+        while True:
+            try:
+                return await execute(
+                    _bounded(transaction_function), *args, **kwargs
+                )
+            except _StaleTimeout:
+                # Start over with the time left as the timeout
+                continue
+            except ClientError as e:
+                if _is_timeout(e):
+                    _raise_exceeded(e)
+                raise
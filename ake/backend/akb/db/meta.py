@@ -1,33 +1,51 @@
+import re
+import sys
 from dataclasses import dataclass, field
-from typing import Tuple, List, Optional, Dict
+from typing import Iterable, Tuple, Optional, Dict
 
 
-@dataclass
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern short identifier-like strings repeated across many cached objects."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _paper_refs(
+    papers: Optional[Iterable[Tuple[str, str]]],
+) -> Tuple[Tuple[str, str], ...]:
+    if papers is None:
+        return ()
+    return tuple((_intern(pid), title) for pid, title in papers)
+
+
+# Author, Paper and Category are held by the hundred thousand in caches and
+# listings, so they are slotted, frozen and tuple-backed. Build them through
+# make_meta, which interns ids and names and converts lists to tuples.
+
+
+@dataclass(frozen=True, slots=True)
 class Author:
     name: str
     # (pid, title)
-    papers: List[Tuple[str, str]] = field(default_factory=list)
+    papers: Tuple[Tuple[str, str], ...] = ()
 
     @staticmethod
     def make_meta(
         name: str,
-        papers: Optional[List[Tuple[str, str]]] = None,
+        papers: Optional[Iterable[Tuple[str, str]]] = None,
     ) -> "Author":
-        if papers is None:
-            papers = []
         return Author(
-            name=name,
-            papers=papers,
+            name=_intern(name),
+            papers=_paper_refs(papers),
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Paper:
     pid: str
     title: str
     abstract: str
-    authors: List[str] = field(default_factory=list)
-    categories: List[str] = field(default_factory=list)
+    authors: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = ()
 
     def to_dict(self):
         return {
@@ -43,38 +61,127 @@ class Paper:
         pid: str,
         title: str,
         abstract: str,
-        authors: Optional[List[str]] = None,
-        categories: Optional[List[str]] = None,
+        authors: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
     ) -> "Paper":
-        if authors is None:
-            authors = []
-        if categories is None:
-            categories = []
         return Paper(
-            pid=pid,
+            pid=_intern(pid),
             title=title,
             abstract=abstract,
-            authors=authors,
-            categories=categories,
+            authors=tuple(_intern(author) for author in authors or ()),
+            categories=tuple(_intern(category) for category in categories or ()),
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class SearchHighlight:
+    # HTML-escaped, with the words matching the search in <strong> tags
+    title: str
+    # Part of the abstract around the matching words
+    snippet: str
+
+
+@dataclass(frozen=True, slots=True)
+class SearchPage:
+    papers: Tuple[Paper, ...] = ()
+    # Opaque cursor of the following page, None on the last page
+    next_cursor: Optional[str] = None
+    # One per paper when snippets were requested, else empty
+    highlights: Tuple[SearchHighlight, ...] = ()
+
+
+_MONTH = re.compile(r"^(\d{4})-(0[1-9]|1[0-2])$")
+
+
+def _month_key(month: Optional[str]) -> Optional[str]:
+    """"YYYY-MM" to the sortable "YYYYMM"; ValueError if malformed."""
+    if month is None:
+        return None
+    match = _MONTH.match(month)
+    if match is None:
+        raise ValueError(f"Invalid month {month!r}, expected YYYY-MM")
+    return match.group(1) + match.group(2)
+
+
+@dataclass(frozen=True, slots=True)
+class SearchFilters:
+    # Papers in any of these categories
+    categories: Tuple[str, ...] = ()
+    # Papers with an author whose name contains this, ignoring case
+    author: Optional[str] = None
+    id_prefix: Optional[str] = None
+    # Inclusive bounds on the submission month encoded in arXiv ids, "YYYYMM"
+    month_from: Optional[str] = None
+    month_to: Optional[str] = None
+
+    def __bool__(self):
+        return any(getattr(self, name) for name in self.__slots__)
+
+    def to_params(self) -> Dict[str, object]:
+        return {
+            "categories": list(self.categories) or None,
+            "author": self.author.lower() if self.author else None,
+            "id_prefix": self.id_prefix,
+            "month_from": self.month_from,
+            "month_to": self.month_to,
+        }
+
+    @staticmethod
+    def make_meta(
+        categories: Optional[Iterable[str]] = None,
+        author: Optional[str] = None,
+        id_prefix: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> "SearchFilters":
+        """Build filters from request values; dates are "YYYY-MM"."""
+        return SearchFilters(
+            categories=tuple(sorted({_intern(c) for c in categories or () if c})),
+            author=author or None,
+            id_prefix=id_prefix or None,
+            month_from=_month_key(date_from or None),
+            month_to=_month_key(date_to or None),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SearchStats:
+    # Number of hits; a lower bound when total_exact is False
+    total: int
+    total_exact: bool = True
+    # (name, hits), most frequent first
+    categories: Tuple[Tuple[str, int], ...] = ()
+    authors: Tuple[Tuple[str, int], ...] = ()
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "total_exact": self.total_exact,
+            "facets": {
+                "categories": [
+                    {"name": name, "count": count} for name, count in self.categories
+                ],
+                "authors": [
+                    {"name": name, "count": count} for name, count in self.authors
+                ],
+            },
+        }
+
+
+@dataclass(frozen=True, slots=True)
 class Category:
     name: str
     # (pid, title)
-    papers: List[Tuple[str, str]] = field(default_factory=list)
+    papers: Tuple[Tuple[str, str], ...] = ()
 
     @staticmethod
     def make_meta(
         name: str,
-        papers: Optional[List[Tuple[str, str]]] = None,
+        papers: Optional[Iterable[Tuple[str, str]]] = None,
     ) -> "Category":
-        if papers is None:
-            papers = []
         return Category(
-            name=name,
-            papers=papers,
+            name=_intern(name),
+            papers=_paper_refs(papers),
         )
 
 
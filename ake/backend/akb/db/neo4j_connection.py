@@ -1,27 +1,112 @@
-from neo4j import GraphDatabase
-from ..const import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+import os
+import threading
+from contextlib import contextmanager
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
+from ..config import (
+    NEO4J_URI,
+    NEO4J_USER,
+    NEO4J_PASSWORD,
+    NEO4J_DATABASE,
+    NEO4J_MAX_CONNECTION_POOL_SIZE,
+    validate_neo4j_config,
+    neo4j_driver_options,
+)
+from .causal import current_bookmarks, record_bookmarks
+from .deadline import DeadlineSession
+from .circuit_breaker import get_circuit_breaker
+from .query_log import timed
+
+
+class GuardedSession(DeadlineSession):
+    """Session whose managed transactions are timed and go through the circuit breaker."""
+
+    def execute_read(self, transaction_function, *args, **kwargs):
+        return get_circuit_breaker().call(
+            super().execute_read,
+            timed(transaction_function, write=False),
+            *args,
+            **kwargs,
+        )
+
+    def execute_write(self, transaction_function, *args, **kwargs):
+        return get_circuit_breaker().call(
+            super().execute_write,
+            timed(transaction_function, write=True),
+            *args,
+            **kwargs,
+        )
+
 
 class Neo4jConnection:
+    """
+    Process-wide Neo4j driver.
+
+    The driver is created on first use and creating it does not connect, so
+    importing or constructing services never waits on the database. Use
+    `verify_connectivity()` to actually reach the server.
+    """
+
     _instance = None
     _driver = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
+            validate_neo4j_config()
             cls._instance = super(Neo4jConnection, cls).__new__(cls)
-            try:
-                cls._driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-                # Test the connection
-                with cls._driver.session() as session:
-                    session.run("RETURN 1")
-                print("Successfully connected to Neo4j.")
-            except Exception as e:
-                print(f"Failed to connect to Neo4j: {e}")
-                cls._instance = None
-                raise
         return cls._instance
 
     def get_driver(self):
-        return self._driver
+        if Neo4jConnection._driver is None:
+            with Neo4jConnection._lock:
+                if Neo4jConnection._driver is None:
+                    Neo4jConnection._driver = GraphDatabase.driver(
+                        NEO4J_URI,
+                        auth=(NEO4J_USER, NEO4J_PASSWORD),
+                        **neo4j_driver_options(),
+                    )
+                    print(
+                        "Created Neo4j driver "
+                        f"(pool size {NEO4J_MAX_CONNECTION_POOL_SIZE})."
+                    )
+        return Neo4jConnection._driver
+
+    def verify_connectivity(self):
+        """Raise if the server cannot be reached with the configured credentials."""
+        self.get_driver().verify_connectivity()
+
+    def session(self, **kwargs):
+        """
+        Open a session on the configured database.
+
+        Its transactions are bound by the request deadline and fail fast
+        with Neo4jUnavailable while the circuit breaker is open.
+        """
+        if NEO4J_DATABASE is not None:
+            kwargs.setdefault("database", NEO4J_DATABASE)
+        return GuardedSession(self.get_driver().session(**kwargs))
+
+    def read_session(self, **kwargs):
+        """
+        Open a session for reads.
+
+        With a `neo4j://` URI its queries are routed to read replicas. It
+        starts from the caller's last write bookmarks, so it sees that write.
+        """
+        bookmarks = current_bookmarks()
+        if bookmarks is not None:
+            kwargs.setdefault("bookmarks", bookmarks)
+        return self.session(default_access_mode=READ_ACCESS, **kwargs)
+
+    @contextmanager
+    def write_session(self, **kwargs):
+        """Open a session for writes, recording its bookmarks for later reads."""
+        bookmarks = current_bookmarks()
+        if bookmarks is not None:
+            kwargs.setdefault("bookmarks", bookmarks)
+        with self.session(default_access_mode=WRITE_ACCESS, **kwargs) as session:
+            yield session
+            record_bookmarks(session.last_bookmarks())
 
     def close(self):
         if self._driver is not None:
@@ -30,6 +115,15 @@ class Neo4jConnection:
             Neo4jConnection._driver = None
             Neo4jConnection._instance = None
 
+def _forget_driver_after_fork():
+    # The pooled sockets belong to the parent process; the child opens its own
+    Neo4jConnection._driver = None
+    Neo4jConnection._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_driver_after_fork)
+
+
 # Singleton instance
 def get_neo4j_db():
     return Neo4jConnection()
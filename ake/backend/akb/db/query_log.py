@@ -0,0 +1,323 @@
+"""
+Slow-query log.
+
+Every query run inside a managed transaction is timed. Per query name (the
+transaction function, e.g. `GraphService._find_paper_by_id`) it records the
+number of calls, rows, wall time and the server's own timing. Queries
+slower than SLOW_QUERY_THRESHOLD_MS are written to the `akb.slow_query`
+logger and kept in a short in-memory list. For a sample of them the plan is
+captured by re-running the query under EXPLAIN (or PROFILE for reads) on a
+background thread, so the request that was slow does not wait for it.
+"""
+
+import functools
+import hashlib
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from neo4j import READ_ACCESS
+from ..config import (
+    NEO4J_DATABASE,
+    SLOW_QUERY_LOG_ENABLED,
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_PLAN_SAMPLE_RATE,
+    SLOW_QUERY_PLAN_MODE,
+    SLOW_QUERY_LOG_SIZE,
+)
+
+logger = logging.getLogger("akb.slow_query")
+
+# Plan operators worth calling out in the log
+_SUSPICIOUS_OPERATORS = (
+    "CartesianProduct",
+    "AllNodesScan",
+    "NodeByLabelScan",
+    "Eager",
+)
+
+# Capture the plan of one query text at most once per this many seconds
+_PLAN_INTERVAL = 600
+
+
+def fingerprint(parameters: Dict[str, Any]) -> str:
+    """Short stable digest of query parameters, without logging their values."""
+    items = sorted((k, repr(v)) for k, v in parameters.items())
+    return hashlib.blake2b(repr(items).encode("utf-8"), digest_size=6).hexdigest()
+
+
+class QueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.slow: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        self._planned: Dict[str, float] = {}
+        self._plans: "queue.Queue" = queue.Queue(maxsize=16)
+        self._planner: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        name: str,
+        query: str,
+        parameters: Dict[str, Any],
+        wall_ms: float,
+        rows: int,
+        summary,
+        write: bool,
+    ):
+        server_ms = None
+        if summary is not None and summary.result_available_after is not None:
+            server_ms = summary.result_available_after + (
+                summary.result_consumed_after or 0
+            )
+        slow = wall_ms >= SLOW_QUERY_THRESHOLD_MS
+
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = dict.fromkeys(
+                    ("calls", "rows", "total_ms", "max_ms", "server_ms", "slow"), 0
+                )
+            stats["calls"] += 1
+            stats["rows"] += rows
+            stats["total_ms"] += wall_ms
+            stats["max_ms"] = max(stats["max_ms"], wall_ms)
+            stats["server_ms"] += server_ms or 0
+            stats["slow"] += slow
+
+        if not slow:
+            return
+        entry = {
+            "name": name,
+            "parameters": fingerprint(parameters),
+            "wall_ms": round(wall_ms, 2),
+            "server_ms": server_ms,
+            "rows": rows,
+            "at": time.time(),
+            "plan": None,
+            "suspicious_operators": [],
+        }
+        self.slow.append(entry)
+        logger.warning(
+            "slow query %s params=%s wall=%.1fms server=%sms rows=%d",
+            name,
+            entry["parameters"],
+            wall_ms,
+            server_ms,
+            rows,
+        )
+        self._maybe_capture_plan(entry, query, parameters, write)
+
+    def _maybe_capture_plan(self, entry, query, parameters, write):
+        if random.random() >= SLOW_QUERY_PLAN_SAMPLE_RATE:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._planned.get(query, -_PLAN_INTERVAL) < _PLAN_INTERVAL:
+                return
+            self._planned[query] = now
+            if self._planner is None or not self._planner.is_alive():
+                self._planner = threading.Thread(
+                    target=self._capture_plans, name="query-plan-capture", daemon=True
+                )
+                self._planner.start()
+        try:
+            self._plans.put_nowait((entry, query, parameters, write))
+        except queue.Full:
+            pass
+
+    def _capture_plans(self):
+        # Imported here: the connection module imports this one
+        from .neo4j_connection import get_neo4j_db
+
+        while True:
+            entry, query, parameters, write = self._plans.get()
+            # Never execute a write twice; EXPLAIN only plans it
+            mode = "EXPLAIN" if write else SLOW_QUERY_PLAN_MODE
+            try:
+                kwargs = {"default_access_mode": READ_ACCESS}
+                if NEO4J_DATABASE is not None:
+                    kwargs["database"] = NEO4J_DATABASE
+                # A raw driver session, so capturing is neither timed nor
+                # subject to the request deadline
+                with get_neo4j_db().get_driver().session(**kwargs) as session:
+                    summary = session.run(f"{mode} {query}", parameters).consume()
+                plan = summary.profile or summary.plan
+                entry["plan"] = plan
+                entry["suspicious_operators"] = sorted(
+                    _operators(plan) & set(_SUSPICIOUS_OPERATORS)
+                )
+                logger.warning(
+                    "plan of slow query %s (%s): suspicious operators %s",
+                    entry["name"],
+                    mode,
+                    entry["suspicious_operators"] or "none",
+                )
+            except Exception as e:
+                logger.warning("could not capture plan of %s: %s", entry["name"], e)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / stats["calls"],
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def get_slow(self) -> List[Dict]:
+        return list(self.slow)
+
+
+def _operators(plan) -> set:
+    if not plan:
+        return set()
+    # Operator names carry a runtime suffix, e.g. "NodeByLabelScan@neo4j"
+    found = {plan.get("operatorType", "").split("@")[0]}
+    for child in plan.get("children", ()):
+        found |= _operators(child)
+    return found
+
+
+_QUERY_LOG = QueryLog()
+
+
+def get_query_log() -> QueryLog:
+    return _QUERY_LOG
+
+
+class _TimedResult:
+    """Result wrapper counting the rows the caller reads."""
+
+    def __init__(self, result):
+        self._result = result
+        self.rows = 0
+
+    def __iter__(self):
+        for record in self._result:
+            self.rows += 1
+            yield record
+
+    def single(self, *args, **kwargs):
+        record = self._result.single(*args, **kwargs)
+        self.rows += record is not None
+        return record
+
+    def fetch(self, n):
+        records = self._result.fetch(n)
+        self.rows += len(records)
+        return records
+
+    def data(self, *keys):
+        data = self._result.data(*keys)
+        self.rows += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+
+class _AsyncTimedResult(_TimedResult):
+    async def __aiter__(self):
+        async for record in self._result:
+            self.rows += 1
+            yield record
+
+    async def single(self, *args, **kwargs):
+        record = await self._result.single(*args, **kwargs)
+        self.rows += record is not None
+        return record
+
+    async def fetch(self, n):
+        records = await self._result.fetch(n)
+        self.rows += len(records)
+        return records
+
+    async def data(self, *keys):
+        data = await self._result.data(*keys)
+        self.rows += len(data)
+        return data
+
+
+class _TimedTransaction:
+    """Transaction wrapper timing each `run`."""
+
+    def __init__(self, tx):
+        self._tx = tx
+        # (query, parameters, started, result), in run order
+        self.runs = []
+
+    def run(self, query, parameters=None, **kwargs):
+        started = time.perf_counter()
+        args = (query,) if parameters is None else (query, parameters)
+        result = _TimedResult(self._tx.run(*args, **kwargs))
+        self.runs.append((query, {**(parameters or {}), **kwargs}, started, result))
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class _AsyncTimedTransaction(_TimedTransaction):
+    async def run(self, query, parameters=None, **kwargs):
+        started = time.perf_counter()
+        args = (query,) if parameters is None else (query, parameters)
+        result = _AsyncTimedResult(await self._tx.run(*args, **kwargs))
+        self.runs.append((query, {**(parameters or {}), **kwargs}, started, result))
+        return result
+
+
+def _walls(runs, finished: float):
+    # A query is charged until the next one starts, or the function returns
+    ends = [run[2] for run in runs[1:]] + [finished]
+    return [(end - run[2]) * 1000 for run, end in zip(runs, ends)]
+
+
+def timed(transaction_function, write: bool):
+    """Wrap a transaction function so every query it runs is recorded."""
+    if not SLOW_QUERY_LOG_ENABLED:
+        return transaction_function
+    name = getattr(transaction_function, "__qualname__", repr(transaction_function))
+
+    @functools.wraps(transaction_function)
+    def timed_function(tx, *args, **kwargs):
+        timed_tx = _TimedTransaction(tx)
+        value = transaction_function(timed_tx, *args, **kwargs)
+        finished = time.perf_counter()
+        for (query, parameters, _, result), wall_ms in zip(
+            timed_tx.runs, _walls(timed_tx.runs, finished)
+        ):
+            summary = result.consume()
+            _QUERY_LOG.record(
+                name, query, parameters, wall_ms, result.rows, summary, write
+            )
+        return value
+
+    return timed_function
+
+
+def timed_async(transaction_function, write: bool):
+    """Async variant of `timed`."""
+    if not SLOW_QUERY_LOG_ENABLED:
+        return transaction_function
+    name = getattr(transaction_function, "__qualname__", repr(transaction_function))
+
+    @functools.wraps(transaction_function)
+    async def timed_function(tx, *args, **kwargs):
+        timed_tx = _AsyncTimedTransaction(tx)
+        value = await transaction_function(timed_tx, *args, **kwargs)
+        finished = time.perf_counter()
+        for (query, parameters, _, result), wall_ms in zip(
+            timed_tx.runs, _walls(timed_tx.runs, finished)
+        ):
+            summary = await result.consume()
+            _QUERY_LOG.record(
+                name, query, parameters, wall_ms, result.rows, summary, write
+            )
+        return value
+
+    return timed_function
@@ -1 +1,10 @@
 from .graph_service import GraphService
+from .async_graph_service import AsyncGraphService
+from .registry import (
+    ServiceRegistry,
+    get_registry,
+    get_graph_service,
+    get_async_graph_service,
+    get_user_service,
+    get_recommendation_service,
+)
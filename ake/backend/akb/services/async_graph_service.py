@@ -0,0 +1,370 @@
+import asyncio
+import time
+from typing import Optional, List, Dict, Tuple
+from .. import db
+from ..db import CacheType
+from ..config import SEARCH_TOTAL_EXACT_LIMIT, SEARCH_FACET_SIZE
+from .index_lag import get_index_lag_tracker
+from .search_query import normalize_search_query
+from .registry import get_graph_service
+from .graph_service import (
+    _GraphServiceBase,
+    FIND_AUTHOR_QUERY,
+    FIND_PAPER_QUERY,
+    FIND_PAPERS_QUERY,
+    FIND_CATEGORY_QUERY,
+    SEARCH_HITS_QUERY,
+    SEARCH_HIGHER_HITS_QUERY,
+    SEARCH_STATS_QUERY,
+    AWAIT_INDEX_REFRESH_QUERY,
+    CHECK_INDEX_QUERY,
+    ALL_AUTHORS_QUERY,
+    ALL_PAPERS_QUERY,
+    ALL_CATEGORIES_QUERY,
+    OVERVIEW_QUERY,
+)
+
+
+class AsyncGraphService(_GraphServiceBase):
+    """
+    Read side of GraphService on the asyncio driver.
+
+    Runs the same queries and shares the same cache and cache keys, so a
+    write made through GraphService invalidates what this service cached.
+    Writes stay on GraphService.
+    """
+
+    def __init__(self):
+        self.db = db.get_async_neo4j_db()
+        self.fulltext_index_name = "paper_fulltext_index"
+        # Unknown until check_fulltext_index_exists() is awaited
+        self.fulltext_index_exists = None
+
+        # Get the global cache manager
+        self.cache_manager = db.get_cache_manager()
+
+        # The local search index is shared with GraphService, which keeps it
+        # current; the snapshot is read with its sync driver
+        self._open_search_index(lambda: get_graph_service().get_all_papers())
+
+    async def close(self):
+        await self.db.close()
+
+    async def find_author_info(self, name: str) -> Optional[db.Author]:
+        # Try cache first
+        cached_result = self.cache_manager.get(CacheType.AUTHOR, name=name)
+        if cached_result is not None:
+            return cached_result
+
+        # Cache miss - query database
+        read_started = self.cache_manager.begin_read()
+        try:
+            async with self.db.read_session() as session:
+                result = await session.execute_read(self._find_author_info, name)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.AUTHOR, name=name)
+
+        self._cache_author(result, read_started)
+
+        return result
+
+    @staticmethod
+    async def _find_author_info(tx, name: str) -> Optional[db.Author]:
+        result = await tx.run(FIND_AUTHOR_QUERY, name=name)
+        return AsyncGraphService._record_to_author(await result.single())
+
+    async def find_paper_by_id(self, paper_id: str) -> Optional[db.Paper]:
+        """Find paper by ID with caching."""
+        # Try cache first
+        cached_result = self.cache_manager.get(CacheType.PAPER, paper_id=paper_id)
+        if cached_result is not None:
+            return cached_result
+
+        # Cache miss - query database
+        read_started = self.cache_manager.begin_read()
+        try:
+            async with self.db.read_session() as session:
+                result = await session.execute_read(self._find_paper_by_id, paper_id)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.PAPER, paper_id=paper_id)
+
+        self._cache_paper(result, read_started)
+
+        return result
+
+    @staticmethod
+    async def _find_paper_by_id(tx, paper_id: str) -> Optional[db.Paper]:
+        result = await tx.run(FIND_PAPER_QUERY, paper_id=paper_id)
+        return AsyncGraphService._record_to_paper(await result.single())
+
+    async def find_papers_by_ids(
+        self, paper_ids: List[str]
+    ) -> List[Optional[db.Paper]]:
+        """Find several papers, reading the uncached ones in one query; keeps order."""
+        found, missing = self._cached_papers(paper_ids)
+        if missing:
+            read_started = self.cache_manager.begin_read()
+            async with self.db.read_session() as session:
+                papers = await session.execute_read(self._find_papers, missing)
+            self._add_read_papers(found, papers, read_started)
+
+        return [found.get(paper_id) for paper_id in paper_ids]
+
+    async def find_category(self, name: str) -> Optional[db.Category]:
+        """Find category with caching."""
+        # Try cache first
+        cached_result = self.cache_manager.get(CacheType.CATEGORY, name=name)
+        if cached_result is not None:
+            return cached_result
+
+        # Cache miss - query database
+        read_started = self.cache_manager.begin_read()
+        try:
+            async with self.db.read_session() as session:
+                result = await session.execute_read(self._find_category, name)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.CATEGORY, name=name)
+
+        self._cache_category(result, read_started)
+
+        return result
+
+    @staticmethod
+    async def _find_category(tx, name: str) -> Optional[db.Category]:
+        result = await tx.run(FIND_CATEGORY_QUERY, name=name)
+        return AsyncGraphService._record_to_category(await result.single())
+
+    async def search_papers(
+        self,
+        query_string: str,
+        limit: int = 50,
+        skip: int = 0,
+        filters: Optional[db.SearchFilters] = None,
+    ) -> List[db.Paper]:
+        """Search papers using the full-text index; see GraphService.search_papers."""
+        page = await self.search_papers_page(
+            query_string, limit, skip=skip, filters=filters
+        )
+        return list(page.papers)
+
+    async def search_papers_page(
+        self,
+        query_string: str,
+        limit: int = 50,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[db.SearchFilters] = None,
+        snippets: bool = False,
+    ) -> db.SearchPage:
+        """Search one page of papers; see GraphService.search_papers_page."""
+        query_string = normalize_search_query(query_string)
+        if not query_string:
+            return db.SearchPage()
+        filters = filters or db.SearchFilters()
+        index = self._local_search_index()
+        key = dict(
+            query_string=query_string,
+            limit=limit,
+            skip=skip,
+            cursor=cursor,
+            filters=filters,
+            snippets=snippets,
+        )
+
+        cached_result = self.cache_manager.get(CacheType.SEARCH, **key)
+        if cached_result:
+            return cached_result
+
+        read_started = self.cache_manager.begin_read()
+        if snippets:
+            # Highlighted from the plain page, itself cached for plain requests
+            page = await self.search_papers_page(
+                query_string, limit, skip, cursor, filters
+            )
+            return self._highlight_search_page(page, read_started, **key)
+
+        try:
+            if index is not None:
+                result = await self._search_papers_locally(
+                    index, query_string, limit, skip, cursor, filters
+                )
+            else:
+                params = self._search_params(query_string, limit, skip, cursor, filters)
+                async with self.db.read_session() as session:
+                    hits = await session.execute_read(self._search_hits, params)
+
+                    # A paper written a moment ago may not be indexed yet; only
+                    # then is an empty first page worth waiting for the index
+                    first_page = skip == 0 and cursor is None
+                    index_lag = get_index_lag_tracker()
+                    if not hits and first_page and index_lag.lagging():
+                        refresh_started = time.monotonic()
+                        await session.execute_read(self._await_index_refresh)
+                        index_lag.record_refresh(refresh_started)
+                        hits = await session.execute_read(self._search_hits, params)
+
+                papers = await self.find_papers_by_ids(
+                    [hit[0] for hit in hits[:limit]]
+                )
+                result = self._hits_to_search_page(hits, papers, limit)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.SEARCH, **key)
+
+        self._cache_search(result, read_started, **key)
+
+        return result
+
+    @staticmethod
+    async def _search_hits(tx, params: Dict) -> List[Tuple[str, float, int]]:
+        result = await tx.run(SEARCH_HITS_QUERY, params)
+        records = await result.fetch(-1)
+        rows = [(record["pid"], record["score"]) for record in records]
+        tied_before = AsyncGraphService._tied_before(params, rows)
+        if tied_before is None:
+            result = await tx.run(SEARCH_HIGHER_HITS_QUERY, params, score=rows[0][1])
+            tied_before = params["skip"] - (await result.single())["higher"]
+        return AsyncGraphService._number_ties(rows, tied_before)
+
+    async def _search_papers_locally(
+        self,
+        index,
+        query_string: str,
+        limit: int,
+        skip: int,
+        cursor: Optional[str],
+        filters: db.SearchFilters,
+    ) -> db.SearchPage:
+        """Rank with the local index off the event loop, then read the page."""
+        hits = await asyncio.to_thread(
+            self._local_search_hits, index, query_string, limit, skip, cursor, filters
+        )
+        papers = await self.find_papers_by_ids([pid for pid, _ in hits[:limit]])
+        return self._hits_to_search_page(hits, papers, limit)
+
+    @staticmethod
+    async def _find_papers(tx, paper_ids: List[str]) -> List[db.Paper]:
+        result = await tx.run(FIND_PAPERS_QUERY, paper_ids=paper_ids)
+        return AsyncGraphService._records_to_papers(await result.fetch(-1))
+
+    async def search_stats(
+        self, query_string: str, filters: Optional[db.SearchFilters] = None
+    ) -> db.SearchStats:
+        """Count and facet the hits of a search; see GraphService.search_stats."""
+        query_string = normalize_search_query(query_string)
+        if not query_string:
+            return db.SearchStats(total=0)
+        filters = filters or db.SearchFilters()
+        index = self._local_search_index()
+        key = dict(
+            query_string=query_string,
+            filters=filters,
+        )
+        params = self._search_stats_params(query_string, filters)
+        cached_result = self.cache_manager.get(CacheType.SEARCH, stats=True, **key)
+        if cached_result:
+            return cached_result
+
+        read_started = self.cache_manager.begin_read()
+        if index is not None:
+            result = await asyncio.to_thread(
+                index.stats,
+                query_string,
+                filters,
+                SEARCH_TOTAL_EXACT_LIMIT,
+                SEARCH_FACET_SIZE,
+            )
+            self._cache_search_stats(result, read_started, **key)
+            return result
+
+        try:
+            async with self.db.read_session() as session:
+                result = await session.execute_read(self._search_stats, params)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.SEARCH, stats=True, **key)
+
+        self._cache_search_stats(result, read_started, **key)
+        return result
+
+    @staticmethod
+    async def _search_stats(tx, params: Dict) -> db.SearchStats:
+        result = await tx.run(SEARCH_STATS_QUERY, params)
+        return AsyncGraphService._record_to_search_stats(
+            await result.single(), params["max_hits"]
+        )
+
+    @staticmethod
+    async def _await_index_refresh(tx):
+        await (await tx.run(AWAIT_INDEX_REFRESH_QUERY)).consume()
+
+    async def check_fulltext_index_exists(self) -> bool:
+        async with self.db.read_session() as session:
+            self.fulltext_index_exists = await session.execute_read(
+                self._check_fulltext_index_exists, self.fulltext_index_name
+            )
+        return self.fulltext_index_exists
+
+    @staticmethod
+    async def _check_fulltext_index_exists(tx, index_name: str) -> bool:
+        result = await tx.run(CHECK_INDEX_QUERY, name=index_name)
+        return await result.single() is not None
+
+    async def get_all_authors(self) -> List[db.Author]:
+        async with self.db.read_session() as session:
+            return await session.execute_read(self._get_all_authors)
+
+    @staticmethod
+    async def _get_all_authors(tx) -> List[db.Author]:
+        result = await tx.run(ALL_AUTHORS_QUERY)
+        return [
+            author
+            for author in map(
+                AsyncGraphService._record_to_author, await result.fetch(-1)
+            )
+            if author is not None
+        ]
+
+    async def get_all_papers(self) -> List[db.Paper]:
+        # Try cache first
+        cached_result = self.cache_manager.get(CacheType.PAPER, listing="all")
+        if cached_result is not None:
+            return cached_result
+
+        read_started = self.cache_manager.begin_read()
+        try:
+            async with self.db.read_session() as session:
+                result = await session.execute_read(self._get_all_papers)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.PAPER, listing="all")
+
+        self._cache_paper_listing(result, read_started)
+
+        return result
+
+    @staticmethod
+    async def _get_all_papers(tx) -> List[db.Paper]:
+        result = await tx.run(ALL_PAPERS_QUERY)
+        return AsyncGraphService._records_to_papers(await result.fetch(-1))
+
+    async def get_all_categories(self) -> List[db.Category]:
+        async with self.db.read_session() as session:
+            return await session.execute_read(self._get_all_categories)
+
+    @staticmethod
+    async def _get_all_categories(tx) -> List[db.Category]:
+        result = await tx.run(ALL_CATEGORIES_QUERY)
+        return [
+            category
+            for category in map(
+                AsyncGraphService._record_to_category, await result.fetch(-1)
+            )
+            if category is not None
+        ]
+
+    async def get_overview_info(self) -> db.OverviewInfo:
+        async with self.db.read_session() as session:
+            return await session.execute_read(self._get_overview_info)
+
+    @staticmethod
+    async def _get_overview_info(tx) -> db.OverviewInfo:
+        result = await tx.run(OVERVIEW_QUERY)
+        return AsyncGraphService._record_to_overview(await result.single())
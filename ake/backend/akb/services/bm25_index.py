@@ -0,0 +1,607 @@
+"""
+In-process BM25 index over paper titles and abstracts.
+
+An alternative to the Neo4j full-text index, selected with
+SEARCH_BACKEND=local, so search scoring runs in the web process instead of
+on the database. Text is split into lowercase word tokens, like the
+`standard-no-stop-words` analyzer of the Neo4j index. The canonical query
+is evaluated like a Lucene boolean query: a paper must match every required
+clause (+ or AND) and no prohibited one (-, ! or NOT), and at least one
+optional clause if none is required; it is scored on the words of the
+clauses it can match. Postings hold no positions, so a phrase matches
+papers containing all of its words, in any order; field names, wildcards
+and fuzziness and boost suffixes are ignored. A title occurrence counts
+SEARCH_BM25_TITLE_BOOST times an abstract one, in both term frequency and
+document length.
+
+Each term's posting list is stored compressed: slot numbers delta-encoded
+in the narrowest unsigned integer type that fits, and title and abstract
+term frequencies as bytes. A query decodes only the posting lists of its
+own terms and scores them with NumPy over a dense score array.
+
+Papers get a new slot whenever they are written. Slots of deleted or
+rewritten papers are masked out, and dropped from a posting list when the
+postings added since it was encoded are folded into it, the next time one
+of its terms is searched. A search takes a view of the corpus under the
+index lock and scores it without holding the lock: writers replace the
+arrays and link lists they change rather than editing them, and append
+postings only past the view's end. The lists a search folded are kept
+unless a write added to them meanwhile.
+
+The index is built from a snapshot of all papers, kept current from
+GraphService's write hooks, and rebuilt in the background every
+SEARCH_LOCAL_REFRESH_INTERVAL seconds to pick up writes made by other
+processes. Authors and categories are kept per paper for the structured
+search filters and facets.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .. import db
+from ..config import (
+    SEARCH_BM25_K1,
+    SEARCH_BM25_B,
+    SEARCH_BM25_TITLE_BOOST,
+    SEARCH_LOCAL_REFRESH_INTERVAL,
+)
+from .search_query import Clause, Query, parse_search_query
+from .suggest_index import AUTHOR
+
+_TOKEN = re.compile(r"\w+")
+
+# Delta widths, narrowest first
+_DELTA_TYPES = (np.uint8, np.uint16, np.uint32)
+
+# Term frequencies are stored as bytes
+_MAX_TF = 255
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.casefold()) if text else []
+
+
+def _words(clause: Clause) -> List[str]:
+    body = clause.body
+    return tokenize(" ".join(body) if isinstance(body, tuple) else body)
+
+
+def arxiv_month(paper_id: str) -> str:
+    """Submission month "YYYYMM" of an arXiv id, like `_ARXIV_MONTH` in Cypher."""
+    yymm = (paper_id.split("/")[1] if "/" in paper_id else paper_id)[:4]
+    return ("19" if yymm >= "91" else "20") + yymm
+
+
+def _encode(slots: np.ndarray, tfs: np.ndarray) -> Tuple[bytes, bytes]:
+    deltas = np.diff(slots, prepend=0)
+    top = int(deltas.max(initial=0))
+    dtype = next(t for t in _DELTA_TYPES if top <= np.iinfo(t).max)
+    return deltas.astype(dtype).tobytes(), tfs.astype(np.uint8).tobytes()
+
+
+def _decode(posting: Tuple[bytes, bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    deltas, tfs = posting
+    tfs = np.frombuffer(tfs, dtype=np.uint8).reshape(-1, 2)
+    dtype = _DELTA_TYPES[[1, 2, 4].index(len(deltas) // len(tfs))]
+    slots = np.frombuffer(deltas, dtype=dtype).cumsum(dtype=np.int64)
+    return slots, tfs
+
+
+class _Corpus:
+    """One generation of the index; BM25Index swaps in a new one on rebuild."""
+
+    def __init__(self, k1: float, b: float, title_boost: float):
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+        # slot -> paper id; pid -> live slot
+        self.pids: List[str] = []
+        self.slots: Dict[str, int] = {}
+        self.authors: List[Tuple[str, ...]] = []
+        self.categories: List[Tuple[str, ...]] = []
+        self.lengths = np.zeros(1024, dtype=np.float32)
+        self.live = np.zeros(1024, dtype=bool)
+        self.total_length = 0.0
+        # term -> (deltas, title and abstract tfs), and postings added since
+        self.postings: Dict[str, Tuple[bytes, bytes]] = {}
+        self.tails: Dict[str, List[int]] = defaultdict(list)
+
+    def add(self, pid, title, abstract, authors=(), categories=()):
+        self.remove(pid)
+        slot = len(self.pids)
+        if slot == len(self.live):
+            self.lengths = np.concatenate((self.lengths, np.zeros_like(self.lengths)))
+            self.live = np.concatenate((self.live, np.zeros_like(self.live)))
+        title_tf = Counter(tokenize(title))
+        abstract_tf = Counter(tokenize(abstract))
+        length = self.title_boost * title_tf.total() + abstract_tf.total()
+        # Flat slot, title tf, abstract tf triples; tfs are capped when folded
+        for term, count in abstract_tf.items():
+            self.tails[term] += (slot, title_tf.pop(term, 0), count)
+        for term, count in title_tf.items():
+            self.tails[term] += (slot, count, 0)
+        self.pids.append(pid)
+        self.slots[pid] = slot
+        self.authors.append(tuple(authors))
+        self.categories.append(tuple(categories))
+        self.lengths[slot] = length
+        self.live[slot] = True
+        self.total_length += length
+
+    def remove(self, pid):
+        slot = self.slots.pop(pid, None)
+        if slot is not None:
+            self.live = self.live.copy()
+            self.live[slot] = False
+            self.total_length -= float(self.lengths[slot])
+
+    def clear(self):
+        self.slots = {}
+        self.live = np.zeros_like(self.live)
+        self.total_length = 0.0
+
+    def set_links(self, pid, authors, categories):
+        slot = self.slots.get(pid)
+        if slot is not None:
+            self.authors = list(self.authors)
+            self.categories = list(self.categories)
+            self.authors[slot] = tuple(authors)
+            self.categories[slot] = tuple(categories)
+
+    def rename_link(self, kind, old_name, new_name):
+        # Rare enough (renames and deletes) to scan every paper
+        names = list(self.authors if kind == AUTHOR else self.categories)
+        for slot, linked in enumerate(names):
+            if old_name in linked:
+                names[slot] = tuple(
+                    new_name if name == old_name else name
+                    for name in linked
+                    if name != old_name or new_name is not None
+                )
+        if kind == AUTHOR:
+            self.authors = names
+        else:
+            self.categories = names
+
+    def fold(self, term) -> Tuple[np.ndarray, np.ndarray]:
+        """Decoded postings of `term`, with new ones folded in and dead ones dropped."""
+        posting = self.postings.get(term)
+        tail = self.tails.pop(term, None)
+        slots, tfs, changed = _merge(posting, tail or (), self.live)
+        if changed:
+            self._install(term, slots, tfs)
+        return slots, tfs
+
+    def fold_all(self):
+        for term in list(self.tails):
+            self.fold(term)
+
+    def _install(self, term, slots, tfs):
+        if len(slots):
+            self.postings[term] = _encode(slots, tfs)
+        else:
+            self.postings.pop(term, None)
+
+    def view(self, terms: Iterable[str]) -> "_View":
+        # Caller holds the index lock
+        return _View(self, terms)
+
+    def install(self, view: "_View"):
+        """Keep the posting lists `view` folded, unless written to since."""
+        # Caller holds the index lock
+        for term, (posting, tail, count) in view.captured.items():
+            folded = view.folded.get(term)
+            if (
+                folded is None
+                or self.postings.get(term) is not posting
+                or self.tails.get(term) is not tail
+                or len(tail or ()) != count
+            ):
+                continue
+            self.tails.pop(term, None)
+            self._install(term, *folded)
+
+
+def _merge(posting, tail, live) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """
+    Postings decoded, with tail triples folded in and dead slots dropped,
+    and whether that changed them.
+    """
+    slots, tfs = (
+        _decode(posting)
+        if posting is not None
+        else (np.empty(0, np.int64), np.empty((0, 2), np.uint8))
+    )
+    if len(tail):
+        added = np.array(tail, dtype=np.int64).reshape(-1, 3)
+        slots = np.concatenate((slots, added[:, 0]))
+        tfs = np.concatenate((tfs, np.minimum(added[:, 1:], _MAX_TF).astype(np.uint8)))
+    keep = live[slots]
+    changed = len(tail) > 0 or not keep.all()
+    if changed:
+        slots, tfs = slots[keep], tfs[keep]
+    return slots, tfs, changed
+
+
+class _View:
+    """
+    What a search reads of a corpus, taken under the index lock and read
+    without it. Writers replace the arrays and lists they change, and only
+    append past the view's end, so the view stays as it was taken.
+    """
+
+    def __init__(self, corpus: _Corpus, terms: Iterable[str]):
+        self.k1 = corpus.k1
+        self.b = corpus.b
+        self.title_boost = corpus.title_boost
+        self.size = len(corpus.pids)
+        self.papers = len(corpus.slots)
+        self.pids = corpus.pids
+        self.authors = corpus.authors
+        self.categories = corpus.categories
+        self.lengths = corpus.lengths
+        self.live = corpus.live[: self.size]
+        self.total_length = corpus.total_length
+        # term -> (posting, tail, tail length); the tail is only appended to
+        self.captured = {
+            term: (
+                corpus.postings.get(term),
+                corpus.tails.get(term),
+                len(corpus.tails.get(term, ())),
+            )
+            for term in set(terms)
+        }
+        # term -> postings the view folded, for the corpus to keep
+        self.folded: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._decoded: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def postings(self, term) -> Tuple[np.ndarray, np.ndarray]:
+        decoded = self._decoded.get(term)
+        if decoded is None:
+            posting, tail, count = self.captured[term]
+            slots, tfs, changed = _merge(
+                posting, tail[:count] if count else (), self.live
+            )
+            decoded = (slots, tfs)
+            if changed:
+                self.folded[term] = decoded
+            self._decoded[term] = decoded
+        return decoded
+
+    def containing(self, words: Iterable[str]) -> np.ndarray:
+        """Mask over slots of the live papers containing every word."""
+        mask = self.live.copy()
+        for word in set(words):
+            found = np.zeros_like(mask)
+            found[self.postings(word)[0]] = True
+            mask &= found
+        return mask
+
+    def matching(self, query: Query) -> np.ndarray:
+        """Mask over slots of the live papers matching the query."""
+        required = self.live.copy()
+        optional = np.zeros_like(required)
+        any_required = False
+        for occur, clause in query.occurs():
+            if isinstance(clause.body, Query):
+                found = self.matching(clause.body)
+            else:
+                words = _words(clause)
+                if not words:
+                    # Like a clause the analyzer leaves no tokens of
+                    continue
+                found = self.containing(words)
+            if occur == "-":
+                required &= ~found
+            elif occur == "+":
+                required &= found
+                any_required = True
+            else:
+                optional |= found
+        return required if any_required else required & optional
+
+    def score(
+        self, terms: Iterable[str], matched: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Slots of the papers in the `matched` mask, and their BM25 scores."""
+        n = self.papers
+        scores = np.zeros(self.size, dtype=np.float32)
+        if n == 0:
+            return np.empty(0, np.int64), scores[:0]
+        average_length = max(self.total_length / n, 1.0)
+        for term in set(terms):
+            slots, tfs = self.postings(term)
+            if not len(slots):
+                continue
+            idf = math.log(1 + (n - len(slots) + 0.5) / (len(slots) + 0.5))
+            tf = self.title_boost * tfs[:, 0] + tfs[:, 1].astype(np.float32)
+            norm = self.k1 * (
+                1 - self.b + self.b * self.lengths[slots] / average_length
+            )
+            scores[slots] += idf * tf * (self.k1 + 1) / (tf + norm)
+        matched = np.flatnonzero(matched)
+        return matched, scores[matched]
+
+    def keep(self, slot: int, filters: db.SearchFilters) -> bool:
+        pid = self.pids[slot]
+        if filters.id_prefix and not pid.startswith(filters.id_prefix):
+            return False
+        if filters.month_from or filters.month_to:
+            month = arxiv_month(pid)
+            if filters.month_from and month < filters.month_from:
+                return False
+            if filters.month_to and month > filters.month_to:
+                return False
+        if filters.categories and not any(
+            category in filters.categories for category in self.categories[slot]
+        ):
+            return False
+        if filters.author:
+            author = filters.author.lower()
+            return any(author in name.lower() for name in self.authors[slot])
+        return True
+
+
+class BM25Index:
+    NOT_BUILT = "not_built"
+    BUILDING = "building"
+    READY = "ready"
+
+    def __init__(
+        self,
+        k1: float = SEARCH_BM25_K1,
+        b: float = SEARCH_BM25_B,
+        title_boost: float = SEARCH_BM25_TITLE_BOOST,
+        refresh_interval: float = SEARCH_LOCAL_REFRESH_INTERVAL,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+        self.refresh_interval = refresh_interval
+        self.state = self.NOT_BUILT
+        self._corpus: Optional[_Corpus] = None
+        self._load: Optional[Callable[[], Iterable[db.Paper]]] = None
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Changes made while (re)building, replayed on the new corpus
+        self._pending: List[Callable[[_Corpus], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def start_build(self, load: Callable[[], Iterable[db.Paper]]):
+        """Build the index in the background from a snapshot of all papers."""
+        with self._lock:
+            if self.state != self.NOT_BUILT:
+                return
+            self.state = self.BUILDING
+            self._load = load
+            self._start_rebuild()
+
+    def _start_rebuild(self):
+        # Caller holds self._lock
+        self._rebuilding = True
+        threading.Thread(
+            target=self._build, name="bm25-index-build", daemon=True
+        ).start()
+
+    def _build(self):
+        try:
+            corpus = _Corpus(self.k1, self.b, self.title_boost)
+            for paper in self._load():
+                corpus.add(
+                    paper.pid,
+                    paper.title,
+                    paper.abstract,
+                    paper.authors,
+                    paper.categories,
+                )
+            corpus.fold_all()
+        except Exception as e:
+            print(f"\033[31mERROR: Failed to build BM25 index: {e}\033[0m")
+            with self._lock:
+                if self.state == self.BUILDING:
+                    self.state = self.NOT_BUILT
+                self._rebuilding = False
+                self._built_at = time.monotonic()
+                self._pending.clear()
+            return
+
+        with self._lock:
+            for change in self._pending:
+                change(corpus)
+            self._pending.clear()
+            self._corpus = corpus
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+            self.state = self.READY
+
+    def _apply(self, change: Callable[[_Corpus], None]):
+        with self._lock:
+            if self._corpus is not None:
+                change(self._corpus)
+            if self._rebuilding:
+                self._pending.append(change)
+
+    def _current(self) -> _Corpus:
+        # Caller holds self._lock; the index is ready
+        if (
+            self.refresh_interval
+            and not self._rebuilding
+            and time.monotonic() - self._built_at > self.refresh_interval
+        ):
+            self._start_rebuild()
+        return self._corpus
+
+    # Write hooks
+
+    def add(self, paper: db.Paper):
+        """Index a new or rewritten paper."""
+        self._apply(
+            lambda corpus: corpus.add(
+                paper.pid, paper.title, paper.abstract, paper.authors, paper.categories
+            )
+        )
+
+    def remove(self, paper_id: str):
+        self._apply(lambda corpus: corpus.remove(paper_id))
+
+    def set_links(self, paper: db.Paper):
+        """Record the current authors and categories of a paper."""
+        self._apply(
+            lambda corpus: corpus.set_links(paper.pid, paper.authors, paper.categories)
+        )
+
+    def rename_link(self, kind: str, old_name: str, new_name: Optional[str]):
+        """Rename an author or category on every paper; None removes it."""
+        self._apply(lambda corpus: corpus.rename_link(kind, old_name, new_name))
+
+    def clear(self):
+        self._apply(lambda corpus: corpus.clear())
+
+    # Reads
+
+    def _view(self, query: Query) -> Tuple[_Corpus, _View]:
+        """The current corpus, and a view of it holding the query's words."""
+        words = []
+        queries = [query]
+        while queries:
+            for _, clause in queries.pop().occurs():
+                if isinstance(clause.body, Query):
+                    queries.append(clause.body)
+                else:
+                    words += _words(clause)
+        with self._lock:
+            corpus = self._current()
+            return corpus, corpus.view(words)
+
+    def _keep_folded(self, corpus: _Corpus, view: _View):
+        if view.folded:
+            with self._lock:
+                corpus.install(view)
+
+    @staticmethod
+    def _hits(view, query, filters, after=None):
+        slots, scores = view.score(
+            (word for clause in query.terms() for word in _words(clause)),
+            view.matching(query),
+        )
+        if after is not None:
+            after_score, after_id = after
+            keep = scores < after_score
+            for i in np.flatnonzero(scores == after_score):
+                keep[i] = view.pids[slots[i]] > after_id
+            slots, scores = slots[keep], scores[keep]
+        if filters:
+            keep = np.fromiter(
+                (view.keep(slot, filters) for slot in slots.tolist()),
+                dtype=bool,
+                count=len(slots),
+            )
+            slots, scores = slots[keep], scores[keep]
+        return slots, scores
+
+    @staticmethod
+    def _top(view, slots, scores, k: int) -> List[Tuple[str, float]]:
+        """The `k` best hits as (paper id, score), by score desc then paper id."""
+        if k < len(slots):
+            # Everything scoring at least the k-th best, so ties at the cut are
+            # broken by paper id like the rest
+            cut = np.partition(scores, len(scores) - k)[len(scores) - k]
+            best = scores >= cut
+            slots, scores = slots[best], scores[best]
+        hits = sorted(
+            zip((view.pids[slot] for slot in slots.tolist()), scores.tolist()),
+            key=lambda hit: (-hit[1], hit[0]),
+        )
+        return hits[:k]
+
+    def search(
+        self,
+        query_string: str,
+        limit: int,
+        skip: int = 0,
+        after: Optional[Tuple[float, str]] = None,
+        filters: db.SearchFilters = db.SearchFilters(),
+    ) -> List[Tuple[str, float]]:
+        """
+        Hits as (paper id, score), best first, from `skip` on after the
+        (score, paper id) position `after`; at most `limit` of them.
+        """
+        query = parse_search_query(query_string)
+        corpus, view = self._view(query)
+        slots, scores = self._hits(view, query, filters, after)
+        hits = self._top(view, slots, scores, skip + limit)[skip:]
+        self._keep_folded(corpus, view)
+        return hits
+
+    def stats(
+        self,
+        query_string: str,
+        filters: db.SearchFilters,
+        max_hits: int,
+        facet_size: int,
+    ) -> db.SearchStats:
+        """Exact hit count, with facets over the `max_hits` best hits."""
+        query = parse_search_query(query_string)
+        corpus, view = self._view(query)
+        slots, scores = self._hits(view, query, filters)
+        total = len(scores)
+        if len(slots) > max_hits:
+            slots = slots[np.argpartition(-scores, max_hits - 1)[:max_hits]]
+        categories = Counter()
+        authors = Counter()
+        for slot in slots.tolist():
+            categories.update(view.categories[slot])
+            authors.update(view.authors[slot])
+        self._keep_folded(corpus, view)
+
+        def top(counter):
+            return tuple(
+                sorted(counter.items(), key=lambda item: (-item[1], item[0]))[
+                    :facet_size
+                ]
+            )
+
+        return db.SearchStats(
+            total=total, categories=top(categories), authors=top(authors)
+        )
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            corpus = self._corpus
+            return {
+                "state": self.state,
+                "papers": len(corpus.slots) if corpus else 0,
+                "slots": len(corpus.pids) if corpus else 0,
+                "terms": len(corpus.postings) if corpus else 0,
+                "posting_bytes": (
+                    sum(len(d) + len(t) for d, t in corpus.postings.values())
+                    if corpus
+                    else 0
+                ),
+            }
+
+
+_INDEX = BM25Index()
+
+
+def _reset_after_fork():
+    # A build thread started in the parent did not survive
+    global _INDEX
+    _INDEX = BM25Index()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_bm25_index() -> BM25Index:
+    """The process-wide index, shared by the sync and async services."""
+    return _INDEX
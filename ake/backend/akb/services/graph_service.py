@@ -1,31 +1,616 @@
 import re
+import threading
 import time
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict, Iterable, Tuple, Union
 from .. import db
 from ..db import CacheType
+from ..config import (
+    SEARCH_BACKEND,
+    SEARCH_TOTAL_EXACT_LIMIT,
+    SEARCH_FACET_SIZE,
+    SEARCH_SNIPPET_LENGTH,
+)
 from ..const import RelationType
+from .search_cursor import encode_search_cursor, decode_search_cursor
+from .search_query import normalize_search_query
+from .index_lag import get_index_lag_tracker
+from .highlight import highlight_page
+from .suggest_index import (
+    SuggestIndex,
+    AUTHOR,
+    CATEGORY,
+    PAPER,
+    KINDS,
+    suggestion_rows,
+)
+
+# Dependency of cached results that list every paper
+PAPER_LISTING_DEPENDENCY = "paper:*"
+
+# Projects a matched `p` into the columns consumed by `_record_to_paper`.
+_PAPER_PROJECTION = f"""
+OPTIONAL MATCH (p)-[:{RelationType.AUTHORED_BY.name}]->(a:Author)
+WITH p, COLLECT(DISTINCT a.name) AS authors
+OPTIONAL MATCH (p)-[:{RelationType.BELONGS_TO.name}]->(c:Category)
+WITH p, authors, COLLECT(DISTINCT c.name) AS categories
+RETURN p.id AS pid, p.title AS title, p.abstract AS abstract, authors, categories
+"""
+
+# Read queries, shared by GraphService and AsyncGraphService
+FIND_AUTHOR_QUERY = f"""
+MATCH (a:Author {{name: $name}})
+OPTIONAL MATCH (a)-[:{RelationType.HAS_PAPER.name}]->(p:Paper)
+RETURN a.name as name, COLLECT(p.id) as pids, COLLECT(p.title) as paper_titles
+"""
+
+FIND_PAPER_QUERY = f"""
+MATCH (p:Paper {{id: $paper_id}})
+{_PAPER_PROJECTION}
+"""
+
+# Papers by id, in no particular order
+FIND_PAPERS_QUERY = f"""
+UNWIND $paper_ids AS paper_id
+MATCH (p:Paper {{id: paper_id}})
+{_PAPER_PROJECTION}
+"""
+
+FIND_CATEGORY_QUERY = f"""
+MATCH (c:Category {{name: $name}})
+OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
+RETURN c.name as name, COLLECT(p.id) as pids, COLLECT(p.title) as paper_titles
+"""
+
+# Submission month of a paper as "YYYYMM", from its arXiv id: "2101.00001"
+# or "cs/0701001". arXiv ids start in 1991.
+_ARXIV_YYMM = 'left(coalesce(split(p.id, "/")[1], p.id), 4)'
+_ARXIV_MONTH = (
+    f'(CASE WHEN {_ARXIV_YYMM} >= "91" THEN "19" ELSE "20" END + {_ARXIV_YYMM})'
+)
+
+# Structured filters on a full-text hit `p`, checked in the query before
+# hits are ordered, counted or expanded. Each is skipped when its parameter
+# is null.
+_SEARCH_FILTERS = f"""(
+    ($categories IS NULL OR EXISTS {{
+        MATCH (p)-[:{RelationType.BELONGS_TO.name}]->(c:Category)
+        WHERE c.name IN $categories
+    }})
+    AND ($author IS NULL OR EXISTS {{
+        MATCH (p)-[:{RelationType.AUTHORED_BY.name}]->(a:Author)
+        WHERE toLower(a.name) CONTAINS $author
+    }})
+    AND ($id_prefix IS NULL OR p.id STARTS WITH $id_prefix)
+    AND ($month_from IS NULL OR {_ARXIV_MONTH} >= $month_from)
+    AND ($month_to IS NULL OR {_ARXIV_MONTH} <= $month_to)
+)"""
+
+# Full-text search hits, in the score order the index yields them, which
+# is never sorted again. A page starts after a cursor (at its score, past
+# the hits with that score already shown, which $skip then counts) or at
+# $skip for page numbers. Without a cursor or filters, $index_options
+# also tells the index how many hits to produce at all. Returns ids and
+# scores only; the papers on the page are read by id afterwards, from
+# cache where possible. Fetches one row past the page to tell whether
+# another page follows.
+SEARCH_HITS_QUERY = f"""
+CALL db.index.fulltext.queryNodes(
+    "paper_fulltext_index", $query_string, $index_options
+)
+YIELD node AS p, score
+WHERE ($after_score IS NULL OR score <= $after_score)
+  AND {_SEARCH_FILTERS}
+WITH p, score
+SKIP $skip
+LIMIT $limit + 1
+RETURN p.id AS pid, score
+"""
+
+# Hits scoring above $score, to number the tied hits of a deep page
+SEARCH_HIGHER_HITS_QUERY = f"""
+CALL db.index.fulltext.queryNodes("paper_fulltext_index", $query_string)
+YIELD node AS p, score
+WHERE score > $score
+  AND {_SEARCH_FILTERS}
+RETURN count(p) AS higher
+"""
+
+# Hit count and facets of a full-text search, over at most $max_hits
+# matching hits; one extra hit tells whether the count is exact
+SEARCH_STATS_QUERY = f"""
+CALL db.index.fulltext.queryNodes("paper_fulltext_index", $query_string)
+YIELD node AS p
+WHERE {_SEARCH_FILTERS}
+WITH p
+LIMIT $max_hits + 1
+WITH collect(p) AS hits
+WITH size(hits) AS total, hits[..$max_hits] AS hits
+CALL {{
+    WITH hits
+    UNWIND hits AS p
+    MATCH (p)-[:{RelationType.BELONGS_TO.name}]->(c:Category)
+    WITH c.name AS name, count(*) AS count
+    ORDER BY count DESC, name
+    LIMIT $facet_size
+    RETURN collect([name, count]) AS categories
+}}
+CALL {{
+    WITH hits
+    UNWIND hits AS p
+    MATCH (p)-[:{RelationType.AUTHORED_BY.name}]->(a:Author)
+    WITH a.name AS name, count(*) AS count
+    ORDER BY count DESC, name
+    LIMIT $facet_size
+    RETURN collect([name, count]) AS authors
+}}
+RETURN total, categories, authors
+"""
+
+# Blocks until eventually consistent full-text indexes have applied all
+# committed writes
+AWAIT_INDEX_REFRESH_QUERY = (
+    "CALL db.index.fulltext.awaitEventuallyConsistentIndexRefresh()"
+)
+
+CHECK_INDEX_QUERY = "SHOW INDEXES YIELD name WHERE name = $name"
+
+ALL_AUTHORS_QUERY = f"""
+MATCH (a:Author)
+OPTIONAL MATCH (a)-[:{RelationType.HAS_PAPER.name}]->(p:Paper)
+RETURN a.name AS name, COLLECT(p.id) AS pids, COLLECT(p.title) AS paper_titles
+"""
+
+ALL_PAPERS_QUERY = f"""
+MATCH (p:Paper)
+{_PAPER_PROJECTION}
+"""
+
+ALL_CATEGORIES_QUERY = f"""
+MATCH (c:Category)
+OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
+RETURN c.name AS name, COLLECT(p.id) AS pids, COLLECT(p.title) AS paper_titles
+"""
+
+OVERVIEW_QUERY = f"""
+MATCH (a:Author)
+WITH COUNT(a) AS total_authors
+MATCH (p:Paper)
+WITH total_authors, COUNT(p) AS total_papers
+MATCH (c:Category)
+WITH total_authors, total_papers, COUNT(c) AS total_categories
+OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
+WITH total_authors, total_papers, total_categories, c.name AS category_name, COUNT(p) AS num_papers
+RETURN total_authors, total_papers, total_categories, COLLECT({{category: category_name, num_papers: num_papers}}) AS papers_per_category
+"""
+
+
+class _GraphServiceBase:
+    """Cache bookkeeping and record mapping shared by the sync and async services."""
 
+    def clear_search_cache(self):
+        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+
+    def _invalidate_listings(self):
+        """Invalidate cached search results and the full paper listing."""
+        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self.cache_manager.invalidate_by_entity(PAPER_LISTING_DEPENDENCY)
+
+    def _serve_stale(self, error: Exception, cache_type: CacheType, **key):
+        """While Neo4j is unavailable, answer from an expired cache entry if any."""
+        stale = self.cache_manager.get_stale(cache_type, **key)
+        if stale is None:
+            raise error
+        return stale
+
+    def _cache_paper(
+        self, paper: Optional[db.Paper], read_started: Optional[float] = None
+    ):
+        """
+        Put a paper in cache with its author and category dependencies.
+
+        Reads pass the `begin_read()` time taken before reading; see
+        CacheManager. The same goes for the other _cache_* helpers.
+        """
+        if not paper:
+            return
+        dependencies = [f"paper:{paper.pid}"]
+        # Add author dependencies
+        dependencies.extend(f"author:{author}" for author in paper.authors)
+        # Add category dependencies
+        dependencies.extend(f"category:{category}" for category in paper.categories)
+
+        self.cache_manager.put(
+            CacheType.PAPER,
+            paper,
+            dependencies=dependencies,
+            read_started=read_started,
+            paper_id=paper.pid,
+        )
+
+    def _cache_author(
+        self, author: Optional[db.Author], read_started: Optional[float] = None
+    ):
+        """Put an author in cache with its paper dependencies."""
+        if not author:
+            return
+        dependencies = [f"author:{author.name}"]
+        # Add paper dependencies
+        dependencies.extend(f"paper:{pid}" for pid, _ in author.papers)
+
+        self.cache_manager.put(
+            CacheType.AUTHOR,
+            author,
+            dependencies=dependencies,
+            read_started=read_started,
+            name=author.name,
+        )
+
+    def _cache_category(
+        self, category: Optional[db.Category], read_started: Optional[float] = None
+    ):
+        """Put a category in cache with its paper dependencies."""
+        if not category:
+            return
+        dependencies = [f"category:{category.name}"]
+        # Add paper dependencies
+        dependencies.extend(f"paper:{pid}" for pid, _ in category.papers)
+
+        self.cache_manager.put(
+            CacheType.CATEGORY,
+            category,
+            dependencies=dependencies,
+            read_started=read_started,
+            name=category.name,
+        )
+
+    @staticmethod
+    def _record_to_author(record) -> Optional[db.Author]:
+        if record and record["name"]:
+            return db.Author.make_meta(
+                name=record["name"],
+                papers=[
+                    (pid, title)
+                    for pid, title in zip(record["pids"], record["paper_titles"])
+                    if pid is not None and title is not None
+                ],
+            )
+        return None
+
+    @staticmethod
+    def _record_to_paper(record) -> Optional[db.Paper]:
+        if record and record["pid"]:
+            # Filter out null authors/categories if none are linked
+            authors = [author for author in record["authors"] if author is not None]
+            categories = [
+                category for category in record["categories"] if category is not None
+            ]
+            return db.Paper.make_meta(
+                pid=record["pid"],
+                title=record["title"],
+                abstract=record["abstract"],
+                authors=authors,
+                categories=categories,
+            )
+        return None
+
+    @staticmethod
+    def _records_to_papers(records) -> List[db.Paper]:
+        papers = []
+        for record in records:
+            paper = _GraphServiceBase._record_to_paper(record)
+            if paper is not None:
+                papers.append(paper)
+        return papers
+
+    @staticmethod
+    def _record_to_category(record) -> Optional[db.Category]:
+        if record and record["name"]:
+            return db.Category.make_meta(
+                name=record["name"],
+                papers=[
+                    (pid, title)
+                    for pid, title in zip(record["pids"], record["paper_titles"])
+                    if pid is not None and title is not None
+                ],
+            )
+        return None
+
+    @staticmethod
+    def _record_to_overview(record) -> db.OverviewInfo:
+        if record:
+            num_papers_per_category = {
+                item["category"]: item["num_papers"]
+                for item in record["papers_per_category"]
+                if item["category"] is not None
+            }
+            return db.OverviewInfo(
+                total_authors=record["total_authors"],
+                total_papers=record["total_papers"],
+                total_categories=record["total_categories"],
+                num_papers_per_category=num_papers_per_category,
+            )
+        return db.OverviewInfo(
+            total_authors=0,
+            total_papers=0,
+            total_categories=0,
+            num_papers_per_category={},
+        )
+
+    def _cached_papers(
+        self, paper_ids: List[str]
+    ) -> Tuple[Dict[str, db.Paper], List[str]]:
+        """Papers of `paper_ids` found in cache, by id, and the ids not found."""
+        found = {}
+        missing = []
+        for paper_id in paper_ids:
+            paper = self.cache_manager.get(CacheType.PAPER, paper_id=paper_id)
+            if paper is not None:
+                found[paper_id] = paper
+            else:
+                missing.append(paper_id)
+        return found, missing
+
+    def _add_read_papers(
+        self,
+        found: Dict[str, db.Paper],
+        papers: List[db.Paper],
+        read_started: float,
+    ):
+        """Cache papers read for `_cached_papers` misses and add them to `found`."""
+        for paper in papers:
+            self._cache_paper(paper, read_started)
+            found[paper.pid] = paper
+
+    def _open_search_index(self, load: Callable[[], List[db.Paper]]):
+        """Use the local BM25 index if SEARCH_BACKEND=local, building it from `load`."""
+        self.search_index = None
+        self._searched_locally = False
+        if SEARCH_BACKEND == "local":
+            # Needs numpy, so only imported when selected
+            from .bm25_index import get_bm25_index
+
+            self.search_index = get_bm25_index()
+            self.search_index.start_build(load)
+
+    def _local_search_index(self):
+        """The local BM25 index if it is the search backend and built, else None."""
+        index = self.search_index
+        if index is None or not index.ready:
+            return None
+        if not self._searched_locally:
+            # Pages cached until now carry Neo4j cursors
+            self._searched_locally = True
+            self.clear_search_cache()
+        return index
+
+    @staticmethod
+    def _local_search_hits(
+        index,
+        query_string: str,
+        limit: int,
+        skip: int,
+        cursor: Optional[str],
+        filters: db.SearchFilters,
+    ) -> List[Tuple[str, float]]:
+        # One hit past the page tells whether another page follows
+        after = None
+        if cursor is not None:
+            after = _GraphServiceBase._decode_cursor(cursor, skip)
+            if not isinstance(after[1], str):
+                raise ValueError("Invalid search cursor")
+        return index.search(query_string, limit + 1, skip, after, filters)
+
+    @staticmethod
+    def _decode_cursor(cursor: str, skip: int) -> Tuple[float, Union[int, str]]:
+        """(score, position) of a cursor; a page after a cursor cannot skip."""
+        if skip:
+            raise ValueError("skip cannot be combined with a search cursor")
+        return decode_search_cursor(cursor)
+
+    @staticmethod
+    def _tied_before(params: Dict, rows: List[Tuple[str, float]]) -> Optional[int]:
+        """
+        Hits with the first row's score that precede the page, or None if
+        only SEARCH_HIGHER_HITS_QUERY can tell and the cursor needs it.
+        """
+        if not rows:
+            return 0
+        first = rows[0][1]
+        if params["after_score"] is not None:
+            return params["skip"] if first == params["after_score"] else 0
+        limit = params["limit"]
+        if params["skip"] == 0 or len(rows) <= limit or rows[limit - 1][1] != first:
+            return 0
+        return None
+
+    @staticmethod
+    def _number_ties(
+        rows: List[Tuple[str, float]], tied_before: int
+    ) -> List[Tuple[str, float, int]]:
+        """
+        (paper id, score, n) for each row, n counting the hits with that
+        score up to this one; the cursor after a hit holds its score and n.
+        """
+        hits = []
+        count = tied_before
+        previous = rows[0][1] if rows else None
+        for pid, score in rows:
+            if score != previous:
+                count = 0
+                previous = score
+            count += 1
+            hits.append((pid, score, count))
+        return hits
+
+    @staticmethod
+    def _hits_to_search_page(
+        hits: List[Tuple], papers: List[Optional[db.Paper]], limit: int
+    ) -> db.SearchPage:
+        """
+        Page of hits, in hit order, without papers deleted since.
+
+        Hits are (paper id, score) from the local index or (paper id, score,
+        n) from Neo4j, as numbered by `_number_ties`; the cursor holds n if
+        there is one, else the paper id.
+        """
+        by_id = {paper.pid: paper for paper in papers if paper is not None}
+        next_cursor = None
+        if len(hits) > limit:
+            last = hits[limit - 1]
+            position = last[2] if len(last) > 2 else last[0]
+            next_cursor = encode_search_cursor(last[1], position)
+        return db.SearchPage(
+            papers=tuple(by_id[hit[0]] for hit in hits[:limit] if hit[0] in by_id),
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    def _search_params(
+        query_string: str,
+        limit: int,
+        skip: int,
+        cursor: Optional[str],
+        filters: db.SearchFilters,
+    ) -> Dict:
+        if cursor is None:
+            after_score = None
+            # Without filters, the index need not produce hits past the page
+            index_options = {} if filters else {"limit": skip + limit + 1}
+        else:
+            after_score, skip = _GraphServiceBase._decode_cursor(cursor, skip)
+            if not isinstance(skip, int) or skip < 0:
+                raise ValueError("Invalid search cursor")
+            index_options = {}
+        return {
+            "query_string": query_string,
+            "index_options": index_options,
+            "limit": limit,
+            "skip": skip,
+            "after_score": after_score,
+            **filters.to_params(),
+        }
+
+    @staticmethod
+    def _search_stats_params(query_string: str, filters: db.SearchFilters) -> Dict:
+        return {
+            "query_string": query_string,
+            "max_hits": SEARCH_TOTAL_EXACT_LIMIT,
+            "facet_size": SEARCH_FACET_SIZE,
+            **filters.to_params(),
+        }
+
+    def _cache_search(
+        self, result: db.SearchPage, read_started: Optional[float] = None, **key
+    ):
+        """Put a search page in cache; it depends on every paper it lists."""
+        # Search results depend on all papers in the result set
+        dependencies = [f"paper:{paper.pid}" for paper in result.papers]
+        dependencies.append("search:global")  # Global search dependency
 
-class GraphService:
+        self.cache_manager.put(
+            CacheType.SEARCH,
+            result,
+            dependencies=dependencies,
+            read_started=read_started,
+            **key,
+        )
+
+    def _highlight_search_page(
+        self, page: db.SearchPage, read_started: float, **key
+    ) -> db.SearchPage:
+        """Highlight a search page for its query and cache it under `key`."""
+        result = highlight_page(page, key["query_string"], SEARCH_SNIPPET_LENGTH)
+        self._cache_search(result, read_started, **key)
+        return result
+
+    @staticmethod
+    def _record_to_search_stats(record, max_hits: int) -> db.SearchStats:
+        if record is None:
+            return db.SearchStats(total=0)
+        return db.SearchStats(
+            total=min(record["total"], max_hits),
+            total_exact=record["total"] <= max_hits,
+            categories=tuple((name, count) for name, count in record["categories"]),
+            authors=tuple((name, count) for name, count in record["authors"]),
+        )
+
+    def _cache_search_stats(self, result: db.SearchStats, read_started: float, **key):
+        # Any paper or relationship write invalidates all SEARCH entries
+        self.cache_manager.put(
+            CacheType.SEARCH,
+            result,
+            dependencies=["search:global"],
+            read_started=read_started,
+            stats=True,
+            **key,
+        )
+
+    def _cache_paper_listing(self, result: List[db.Paper], read_started: float):
+        # Any paper write invalidates the listing as a whole
+        self.cache_manager.put(
+            CacheType.PAPER,
+            result,
+            dependencies=[PAPER_LISTING_DEPENDENCY],
+            read_started=read_started,
+            listing="all",
+        )
+
+
+class GraphService(_GraphServiceBase):
     def __init__(self):
         self.db = db.get_neo4j_db()
-        self.driver = self.db.get_driver()
         self.fulltext_index_name = "paper_fulltext_index"
-        self.fulltext_index_exists = self.check_fulltext_index_exists()
 
         # Get the global cache manager
         self.cache_manager = db.get_cache_manager()
 
+        # Check the index off the construction path; readers of
+        # fulltext_index_exists wait for the result
+        self._fulltext_index_exists = False
+        self._index_checked = threading.Event()
+        threading.Thread(
+            target=self._check_fulltext_index_in_background,
+            name="fulltext-index-check",
+            daemon=True,
+        ).start()
+
+        # Typeahead index, built on first use and kept current by the writes
+        # below
+        self.suggest_index = SuggestIndex()
+
+        # Local search backend, if selected; searches use Neo4j until it is
+        # built
+        self._open_search_index(self.get_all_papers)
+
+        # Content vectors for similar papers, built on first use
+        self.similarity_index = None
+
+    @property
+    def fulltext_index_exists(self) -> bool:
+        self._index_checked.wait()
+        return self._fulltext_index_exists
+
+    @fulltext_index_exists.setter
+    def fulltext_index_exists(self, exists: bool):
+        self._fulltext_index_exists = exists
+        self._index_checked.set()
+
+    def _check_fulltext_index_in_background(self):
+        try:
+            self.check_fulltext_index_exists()
+        except Exception as e:
+            print(f"\033[31mERROR: Failed to check full-text index: {e}\033[0m")
+            self.fulltext_index_exists = False
+
     def close(self):
         self.db.close()
 
-    def clear_search_cache(self):
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
-
     def add_author(self, name: str):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             result = session.execute_write(self._create_author, name)
 
+        self.suggest_index.add(AUTHOR, name, name)
+
         # Invalidate author cache
         self.cache_manager.invalidate_by_entity(f"author:{name}")
 
@@ -39,14 +624,25 @@ class GraphService:
         return result.single()[0]
 
     def add_paper(self, paper_id: str, title: str, abstract: Optional[str] = None):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             result = session.execute_write(
                 self._create_paper, paper_id, title, abstract
             )
 
+        get_index_lag_tracker().record_write()
+        self.suggest_index.add(PAPER, paper_id, title)
+        if self.search_index is not None or self.similarity_index is not None:
+            paper = db.Paper.make_meta(
+                pid=paper_id, title=title, abstract=abstract or ""
+            )
+            if self.search_index is not None:
+                self.search_index.add(paper)
+            if self.similarity_index is not None:
+                self.similarity_index.add(paper)
+
         # Invalidate paper and search cache
         self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
 
         return result
 
@@ -62,9 +658,11 @@ class GraphService:
         return result.single()[0]
 
     def add_category(self, name: str):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             result = session.execute_write(self._create_category, name)
 
+        self.suggest_index.add(CATEGORY, name, name)
+
         # Invalidate category cache
         self.cache_manager.invalidate_by_entity(f"category:{name}")
 
@@ -77,254 +675,285 @@ class GraphService:
         )
         return result.single()[0]
 
-    def link_author_to_paper(self, author_name: str, paper_id: str):
-        with self.driver.session() as session:
-            session.execute_write(self._create_author_paper_link, author_name, paper_id)
+    def link_author_to_paper(
+        self, author_name: str, paper_id: str
+    ) -> Optional[db.Paper]:
+        with self.db.write_session() as session:
+            paper = session.execute_write(
+                self._create_author_paper_link, author_name, paper_id
+            )
+        if paper is not None:
+            self.suggest_index.bump(AUTHOR, author_name, 1)
+            if self.search_index is not None:
+                self.search_index.set_links(paper)
 
-        # Invalidate related cache
+        # Invalidate related cache, then write the linked paper back
         self.cache_manager.invalidate_by_entity(f"author:{author_name}")
         self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
+        self._cache_paper(paper)
+
+        return paper
 
     @staticmethod
-    def _create_author_paper_link(tx, author_name: str, paper_id: str):
-        tx.run(
-            f"""
+    def _create_author_paper_link(
+        tx, author_name: str, paper_id: str
+    ) -> Optional[db.Paper]:
+        query = f"""
         MATCH (a:Author {{name: $author_name}})
         MATCH (p:Paper {{id: $paper_id}})
         MERGE (a)-[:{RelationType.HAS_PAPER.name}]->(p)
         MERGE (p)-[:{RelationType.AUTHORED_BY.name}]->(a)
-        """,
-            author_name=author_name,
-            paper_id=paper_id,
-        )
-
-    def link_paper_to_category(self, paper_id: str, category_name: str):
-        with self.driver.session() as session:
-            session.execute_write(
+        WITH DISTINCT p
+        {_PAPER_PROJECTION}
+        """
+        result = tx.run(query, author_name=author_name, paper_id=paper_id)
+        return GraphService._record_to_paper(result.single())
+
+    def link_paper_to_category(
+        self, paper_id: str, category_name: str
+    ) -> Optional[db.Paper]:
+        with self.db.write_session() as session:
+            paper = session.execute_write(
                 self._create_paper_category_link, paper_id, category_name
             )
+        if paper is not None:
+            self.suggest_index.bump(CATEGORY, category_name, 1)
+            if self.search_index is not None:
+                self.search_index.set_links(paper)
 
-        # Invalidate related cache
+        # Invalidate related cache, then write the linked paper back
         self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
         self.cache_manager.invalidate_by_entity(f"category:{category_name}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
+        self._cache_paper(paper)
+
+        return paper
 
     @staticmethod
-    def _create_paper_category_link(tx, paper_id: str, category_name: str):
-        tx.run(
-            f"""
+    def _create_paper_category_link(
+        tx, paper_id: str, category_name: str
+    ) -> Optional[db.Paper]:
+        query = f"""
         MATCH (p:Paper {{id: $paper_id}})
         MATCH (c:Category {{name: $category_name}})
         MERGE (p)-[:{RelationType.BELONGS_TO.name}]->(c)
         MERGE (c)-[:{RelationType.CONTAINS.name}]->(p)
-        """,
-            paper_id=paper_id,
-            category_name=category_name,
-        )
+        WITH DISTINCT p
+        {_PAPER_PROJECTION}
+        """
+        result = tx.run(query, paper_id=paper_id, category_name=category_name)
+        return GraphService._record_to_paper(result.single())
+
+    def unlink_author_from_paper(
+        self, author_name: str, paper_id: str
+    ) -> Optional[db.Paper]:
+        with self.db.write_session() as session:
+            paper = session.execute_write(
+                self._delete_author_paper_link, author_name, paper_id
+            )
+        if paper is not None:
+            self.suggest_index.bump(AUTHOR, author_name, -1)
+            if self.search_index is not None:
+                self.search_index.set_links(paper)
+
+        # Invalidate related cache, then write the unlinked paper back
+        self.cache_manager.invalidate_by_entity(f"author:{author_name}")
+        self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
+        self._invalidate_listings()
+        self._cache_paper(paper)
 
-    def unlink_author_from_paper(self, author_name: str, paper_id: str):
-        with self.driver.session() as session:
-            session.execute_write(self._delete_author_paper_link, author_name, paper_id)
+        return paper
 
     @staticmethod
-    def _delete_author_paper_link(tx, author_name: str, paper_id: str):
-        tx.run(
-            f"""
-        MATCH (a:Author {{name: $author_name}})-[r1:{RelationType.HAS_PAPER.name}]->(p:Paper {{id: $paper_id}})
-        MATCH (p)-[r2:{RelationType.AUTHORED_BY.name}]->(a)
+    def _delete_author_paper_link(
+        tx, author_name: str, paper_id: str
+    ) -> Optional[db.Paper]:
+        query = f"""
+        MATCH (p:Paper {{id: $paper_id}})
+        OPTIONAL MATCH (a:Author {{name: $author_name}})-[r1:{RelationType.HAS_PAPER.name}]->(p)
+        OPTIONAL MATCH (p)-[r2:{RelationType.AUTHORED_BY.name}]->(a)
         DELETE r1, r2
-        """,
-            author_name=author_name,
-            paper_id=paper_id,
-        )
-
-    def unlink_paper_from_category(self, paper_id: str, category_name: str):
-        with self.driver.session() as session:
-            session.execute_write(
+        WITH DISTINCT p
+        {_PAPER_PROJECTION}
+        """
+        result = tx.run(query, author_name=author_name, paper_id=paper_id)
+        return GraphService._record_to_paper(result.single())
+
+    def unlink_paper_from_category(
+        self, paper_id: str, category_name: str
+    ) -> Optional[db.Paper]:
+        with self.db.write_session() as session:
+            paper = session.execute_write(
                 self._delete_paper_category_link, paper_id, category_name
             )
+        if paper is not None:
+            self.suggest_index.bump(CATEGORY, category_name, -1)
+            if self.search_index is not None:
+                self.search_index.set_links(paper)
+
+        # Invalidate related cache, then write the unlinked paper back
+        self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
+        self.cache_manager.invalidate_by_entity(f"category:{category_name}")
+        self._invalidate_listings()
+        self._cache_paper(paper)
+
+        return paper
 
     @staticmethod
-    def _delete_paper_category_link(tx, paper_id: str, category_name: str):
-        tx.run(
-            f"""
-        MATCH (p:Paper {{id: $paper_id}})-[r1:{RelationType.BELONGS_TO.name}]->(c:Category {{name: $category_name}})
-        MATCH (c)-[r2:{RelationType.CONTAINS.name}]->(p)
+    def _delete_paper_category_link(
+        tx, paper_id: str, category_name: str
+    ) -> Optional[db.Paper]:
+        query = f"""
+        MATCH (p:Paper {{id: $paper_id}})
+        OPTIONAL MATCH (p)-[r1:{RelationType.BELONGS_TO.name}]->(c:Category {{name: $category_name}})
+        OPTIONAL MATCH (c)-[r2:{RelationType.CONTAINS.name}]->(p)
         DELETE r1, r2
-        """,
-            paper_id=paper_id,
-            category_name=category_name,
-        )
+        WITH DISTINCT p
+        {_PAPER_PROJECTION}
+        """
+        result = tx.run(query, paper_id=paper_id, category_name=category_name)
+        return GraphService._record_to_paper(result.single())
 
     def find_author_info(self, name: str) -> Optional[db.Author]:
         # Try cache first
-        cached_result = self.cache_manager.get(CacheType.AUTHOR, name)
+        cached_result = self.cache_manager.get(CacheType.AUTHOR, name=name)
         if cached_result is not None:
             return cached_result
 
         # Cache miss - query database
-        with self.driver.session() as session:
-            result = session.execute_read(self._find_author_info, name)
+        read_started = self.cache_manager.begin_read()
+        try:
+            with self.db.read_session() as session:
+                result = session.execute_read(self._find_author_info, name)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.AUTHOR, name=name)
 
         # Cache the result with dependencies
-        if result:
-            dependencies = [f"author:{name}"]
-            # Add paper dependencies
-            dependencies.extend(f"paper:{pid}" for pid, _ in result.papers)
-
-            self.cache_manager.put(
-                CacheType.AUTHOR, result, dependencies=dependencies, name=name
-            )
+        self._cache_author(result, read_started)
 
         return result
 
     @staticmethod
     def _find_author_info(tx, name: str) -> Optional[db.Author]:
-        query = f"""
-        MATCH (a:Author {{name: $name}})
-        OPTIONAL MATCH (a)-[:{RelationType.HAS_PAPER.name}]->(p:Paper)
-        RETURN a.name as name, COLLECT(p.id) as pids, COLLECT(p.title) as paper_titles
-        """
-        result = tx.run(query, name=name)
-        record = result.single()
-        if record and record["name"]:
-            return db.Author.make_meta(
-                name=record["name"],
-                papers=[
-                    (pid, title)
-                    for pid, title in zip(record["pids"], record["paper_titles"])
-                    if pid is not None and title is not None
-                ],
-            )
-        return None
+        result = tx.run(FIND_AUTHOR_QUERY, name=name)
+        return GraphService._record_to_author(result.single())
 
     def find_paper_by_id(self, paper_id: str) -> Optional[db.Paper]:
         """Find paper by ID with caching."""
         # Try cache first
-        cached_result = self.cache_manager.get(CacheType.PAPER, paper_id)
+        cached_result = self.cache_manager.get(CacheType.PAPER, paper_id=paper_id)
         if cached_result is not None:
             return cached_result
 
         # Cache miss - query database
-        with self.driver.session() as session:
-            result = session.execute_read(self._find_paper_by_id, paper_id)
+        read_started = self.cache_manager.begin_read()
+        try:
+            with self.db.read_session() as session:
+                result = session.execute_read(self._find_paper_by_id, paper_id)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.PAPER, paper_id=paper_id)
 
         # Cache the result with dependencies
-        if result:
-            dependencies = [f"paper:{paper_id}"]
-            # Add author dependencies
-            dependencies.extend(f"author:{author}" for author in result.authors)
-            # Add category dependencies
-            dependencies.extend(
-                f"category:{category}" for category in result.categories
-            )
-
-            self.cache_manager.put(
-                CacheType.PAPER, result, dependencies=dependencies, paper_id=paper_id
-            )
+        self._cache_paper(result, read_started)
 
         return result
 
     @staticmethod
     def _find_paper_by_id(tx, paper_id: str) -> Optional[db.Paper]:
-        query = f"""
-        MATCH (p:Paper {{id: $paper_id}})
-        OPTIONAL MATCH (p)-[:{RelationType.AUTHORED_BY.name}]->(a:Author)
-        WITH p, COLLECT(DISTINCT a.name) AS authors
-        OPTIONAL MATCH (p)-[:{RelationType.BELONGS_TO.name}]->(c:Category)
-        WITH p, authors, COLLECT(DISTINCT c.name) AS categories
-        RETURN p.id AS pid, p.title AS title, p.abstract AS abstract, authors, categories
-        """
-        result = tx.run(query, paper_id=paper_id)
-        record = result.single()
-        if record and record["pid"]:
-            # Filter out null authors/categories if none are linked
-            authors = [author for author in record["authors"] if author is not None]
-            categories = [
-                category for category in record["categories"] if category is not None
-            ]
-            return db.Paper.make_meta(
-                pid=record["pid"],
-                title=record["title"],
-                abstract=record["abstract"],
-                authors=authors,
-                categories=categories,
-            )
-        return None
+        result = tx.run(FIND_PAPER_QUERY, paper_id=paper_id)
+        return GraphService._record_to_paper(result.single())
+
+    def find_papers_by_ids(self, paper_ids: List[str]) -> List[Optional[db.Paper]]:
+        """Find several papers, reading the uncached ones in one query; keeps order."""
+        found, missing = self._cached_papers(paper_ids)
+        if missing:
+            read_started = self.cache_manager.begin_read()
+            with self.db.read_session() as session:
+                papers = session.execute_read(self._find_papers, missing)
+            self._add_read_papers(found, papers, read_started)
+
+        return [found.get(paper_id) for paper_id in paper_ids]
 
     def find_category(self, name: str) -> Optional[db.Category]:
         """Find category with caching."""
         # Try cache first
-        cached_result = self.cache_manager.get(CacheType.CATEGORY, name)
+        cached_result = self.cache_manager.get(CacheType.CATEGORY, name=name)
         if cached_result is not None:
             return cached_result
 
         # Cache miss - query database
-        with self.driver.session() as session:
-            result = session.execute_read(self._find_category, name)
+        read_started = self.cache_manager.begin_read()
+        try:
+            with self.db.read_session() as session:
+                result = session.execute_read(self._find_category, name)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.CATEGORY, name=name)
 
         # Cache the result with dependencies
-        if result:
-            dependencies = [f"category:{name}"]
-            # Add paper dependencies
-            dependencies.extend(f"paper:{pid}" for pid, _ in result.papers)
-
-            self.cache_manager.put(
-                CacheType.CATEGORY, result, dependencies=dependencies, name=name
-            )
+        self._cache_category(result, read_started)
 
         return result
 
     @staticmethod
     def _find_category(tx, name: str) -> Optional[db.Category]:
-        query = f"""
-        MATCH (c:Category {{name: $name}})
-        OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
-        RETURN c.name as name, COLLECT(p.id) as pids, COLLECT(p.title) as paper_titles
-        """
-        result = tx.run(query, name=name)
-        record = result.single()
-        if record and record["name"]:
-            return db.Category.make_meta(
-                name=record["name"],
-                papers=[
-                    (pid, title)
-                    for pid, title in zip(record["pids"], record["paper_titles"])
-                    if pid is not None and title is not None
-                ],
-            )
-        return None
-
-    def update_author(self, old_name: str, new_name: str):
-        with self.driver.session() as session:
-            session.execute_write(self._update_author, old_name, new_name)
-
-        # Invalidate both old and new author cache
+        result = tx.run(FIND_CATEGORY_QUERY, name=name)
+        return GraphService._record_to_category(result.single())
+
+    def update_author(self, old_name: str, new_name: str) -> Optional[db.Author]:
+        with self.db.write_session() as session:
+            author = session.execute_write(self._update_author, old_name, new_name)
+        if author is not None:
+            self.suggest_index.rename(AUTHOR, old_name, new_name, new_name)
+            if self.search_index is not None:
+                self.search_index.rename_link(AUTHOR, old_name, new_name)
+
+        # Invalidate both old and new author cache, then write the renamed
+        # author back so the next read is a hit
         self.cache_manager.invalidate_by_entity(f"author:{old_name}")
         self.cache_manager.invalidate_by_entity(f"author:{new_name}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
+        self._cache_author(author)
+
+        return author
 
     @staticmethod
-    def _update_author(tx, old_name: str, new_name: str):
-        tx.run(
-            "MATCH (a:Author {name: $old_name}) SET a.name = $new_name",
-            old_name=old_name,
-            new_name=new_name,
-        )
+    def _update_author(tx, old_name: str, new_name: str) -> Optional[db.Author]:
+        query = f"""
+        MATCH (a:Author {{name: $old_name}})
+        SET a.name = $new_name
+        WITH a
+        OPTIONAL MATCH (a)-[:{RelationType.HAS_PAPER.name}]->(p:Paper)
+        RETURN a.name as name, COLLECT(p.id) as pids, COLLECT(p.title) as paper_titles
+        """
+        result = tx.run(query, old_name=old_name, new_name=new_name)
+        return GraphService._record_to_author(result.single())
 
     def update_paper(
         self,
         paper_id: str,
         new_title: Optional[str] = None,
         new_abstract: Optional[str] = None,
-    ):
-        with self.driver.session() as session:
-            session.execute_write(self._update_paper, paper_id, new_title, new_abstract)
+    ) -> Optional[db.Paper]:
+        with self.db.write_session() as session:
+            paper = session.execute_write(
+                self._update_paper, paper_id, new_title, new_abstract
+            )
 
-        # Invalidate paper and search cache
+        get_index_lag_tracker().record_write()
+        if paper is not None:
+            self.suggest_index.add(PAPER, paper_id, paper.title)
+            if self.search_index is not None:
+                self.search_index.add(paper)
+            if self.similarity_index is not None:
+                self.similarity_index.add(paper)
+
+        # Invalidate paper and search cache, then write the updated paper back
         self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
+        self._cache_paper(paper)
+
+        return paper
 
     @staticmethod
     def _update_paper(
@@ -332,81 +961,114 @@ class GraphService:
         paper_id: str,
         new_title: Optional[str] = None,
         new_abstract: Optional[str] = None,
-    ):
+    ) -> Optional[db.Paper]:
         assert (
             new_title is not None or new_abstract is not None
         ), "At least one of new_title or new_abstract must be provided"
         if new_title is None:
-            tx.run(
-                "MATCH (p:Paper {id: $paper_id}) SET p.abstract = $new_abstract",
-                paper_id=paper_id,
-                new_abstract=new_abstract,
-            )
+            set_clause = "SET p.abstract = $new_abstract"
         elif new_abstract is None:
-            tx.run(
-                "MATCH (p:Paper {id: $paper_id}) SET p.title = $new_title",
-                paper_id=paper_id,
-                new_title=new_title,
-            )
+            set_clause = "SET p.title = $new_title"
         else:
-            tx.run(
-                "MATCH (p:Paper {id: $paper_id}) SET p.title = $new_title, p.abstract = $new_abstract",
-                paper_id=paper_id,
-                new_title=new_title,
-                new_abstract=new_abstract,
-            )
+            set_clause = "SET p.title = $new_title, p.abstract = $new_abstract"
+        query = f"""
+        MATCH (p:Paper {{id: $paper_id}})
+        {set_clause}
+        WITH p
+        {_PAPER_PROJECTION}
+        """
+        result = tx.run(
+            query,
+            paper_id=paper_id,
+            new_title=new_title,
+            new_abstract=new_abstract,
+        )
+        return GraphService._record_to_paper(result.single())
 
-    def update_category(self, old_name: str, new_name: str):
-        with self.driver.session() as session:
-            session.execute_write(self._update_category, old_name, new_name)
+    def update_category(self, old_name: str, new_name: str) -> Optional[db.Category]:
+        with self.db.write_session() as session:
+            category = session.execute_write(self._update_category, old_name, new_name)
+        if category is not None:
+            self.suggest_index.rename(CATEGORY, old_name, new_name, new_name)
+            if self.search_index is not None:
+                self.search_index.rename_link(CATEGORY, old_name, new_name)
+
+        # Invalidate both old and new category cache, then write the renamed
+        # category back so the next read is a hit
+        self.cache_manager.invalidate_by_entity(f"category:{old_name}")
+        self.cache_manager.invalidate_by_entity(f"category:{new_name}")
+        self._invalidate_listings()
+        self._cache_category(category)
+
+        return category
 
     @staticmethod
-    def _update_category(tx, old_name: str, new_name: str):
-        tx.run(
-            "MATCH (c:Category {name: $old_name}) SET c.name = $new_name",
-            old_name=old_name,
-            new_name=new_name,
-        )
+    def _update_category(tx, old_name: str, new_name: str) -> Optional[db.Category]:
+        query = f"""
+        MATCH (c:Category {{name: $old_name}})
+        SET c.name = $new_name
+        WITH c
+        OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
+        RETURN c.name as name, COLLECT(p.id) as pids, COLLECT(p.title) as paper_titles
+        """
+        result = tx.run(query, old_name=old_name, new_name=new_name)
+        return GraphService._record_to_category(result.single())
 
     def delete_author(self, name: str):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._delete_author, name)
+        self.suggest_index.remove(AUTHOR, name)
+        if self.search_index is not None:
+            self.search_index.rename_link(AUTHOR, name, None)
 
         # Invalidate author and search cache
         self.cache_manager.invalidate_by_entity(f"author:{name}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
 
     @staticmethod
     def _delete_author(tx, name: str):
         tx.run("MATCH (a:Author {name: $name}) DETACH DELETE a", name=name)
 
     def delete_paper(self, paper_id: str):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._delete_paper, paper_id)
+        self.suggest_index.remove(PAPER, paper_id)
+        if self.search_index is not None:
+            self.search_index.remove(paper_id)
+        if self.similarity_index is not None:
+            self.similarity_index.remove(paper_id)
 
         # Invalidate paper and search cache
         self.cache_manager.invalidate_by_entity(f"paper:{paper_id}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
 
     @staticmethod
     def _delete_paper(tx, paper_id: str):
         tx.run("MATCH (p:Paper {id: $paper_id}) DETACH DELETE p", paper_id=paper_id)
 
     def delete_category(self, name: str):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._delete_category, name)
+        self.suggest_index.remove(CATEGORY, name)
+        if self.search_index is not None:
+            self.search_index.rename_link(CATEGORY, name, None)
 
         # Invalidate category and search cache
         self.cache_manager.invalidate_by_entity(f"category:{name}")
-        self.cache_manager.invalidate_by_type(CacheType.SEARCH)
+        self._invalidate_listings()
 
     @staticmethod
     def _delete_category(tx, name: str):
         tx.run("MATCH (c:Category {name: $name}) DETACH DELETE c", name=name)
 
     def clear_all_data(self):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._clear_all_data)
+        self.suggest_index.clear()
+        if self.search_index is not None:
+            self.search_index.clear()
+        if self.similarity_index is not None:
+            self.similarity_index.clear()
 
         # Clear all cache
         self.cache_manager.clear()
@@ -420,127 +1082,218 @@ class GraphService:
         query_string: str,
         limit: int = 50,
         skip: int = 0,
+        filters: Optional[db.SearchFilters] = None,
     ) -> List[db.Paper]:
         """
-        Search papers using full-text index with pagination support and intelligent caching.
+        Search papers using the full-text index, best match first.
 
         Args:
             query_string: Search query string
             limit: Maximum number of results to return (default: 50)
             skip: Number of results to skip for pagination (default: 0)
-            include_metadata: Whether to include authors and categories (default: True)
+            filters: Only return papers matching these (default: no filters)
 
         Returns:
             List of Paper objects matching the search criteria
         """
+        page = self.search_papers_page(query_string, limit, skip=skip, filters=filters)
+        return list(page.papers)
 
-        # Try to get from new cache system first
-        cached_result = self.cache_manager.get(
-            CacheType.SEARCH,
+    def search_papers_page(
+        self,
+        query_string: str,
+        limit: int = 50,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[db.SearchFilters] = None,
+        snippets: bool = False,
+    ) -> db.SearchPage:
+        """
+        Search one page of papers, with caching.
+
+        Uses the Neo4j full-text index, or the local BM25 index once it is
+        built if SEARCH_BACKEND=local. A cursor only continues a search on
+        the backend that returned it.
+
+        The query is normalised first, and cached under its canonical form;
+        malformed Lucene syntax is searched as plain words rather than
+        failing.
+
+        Args:
+            query_string: Search query string
+            limit: Maximum number of results to return (default: 50)
+            skip: Number of results to skip, for page numbers (default: 0)
+            cursor: `next_cursor` of the previous page; the page then starts
+                right after it, and `skip` must be 0
+            filters: Only return papers matching these; applied in the query,
+                before results are ordered and paged (default: no filters)
+            snippets: Also return a highlighted title and abstract snippet
+                per paper, computed once and cached with the page
+
+        Returns:
+            SearchPage with the papers and the cursor of the next page
+
+        Raises:
+            ValueError: If the cursor is malformed, or given with a `skip`
+        """
+        query_string = normalize_search_query(query_string)
+        if not query_string:
+            return db.SearchPage()
+        filters = filters or db.SearchFilters()
+        index = self._local_search_index()
+        key = dict(
             query_string=query_string,
             limit=limit,
             skip=skip,
+            cursor=cursor,
+            filters=filters,
+            snippets=snippets,
         )
+
+        # Try to get from new cache system first
+        cached_result = self.cache_manager.get(CacheType.SEARCH, **key)
         if cached_result:
             return cached_result
 
-        # Cache miss - execute query
-        with self.driver.session() as session:
-            result = session.execute_read(
-                self._search_papers, query_string, limit, skip
+        read_started = self.cache_manager.begin_read()
+        if snippets:
+            # Highlighted from the plain page, itself cached for plain requests
+            page = self.search_papers_page(
+                query_string, limit, skip, cursor, filters
             )
+            return self._highlight_search_page(page, read_started, **key)
 
-            # If no results found but there are papers in DB, index might need time to update
-            if not result and skip == 0:  # Only retry for first page
-                paper_count = session.execute_read(self._count_papers)
-                if paper_count > 0:
-                    time.sleep(0.5)  # Wait for index to catch up
-                    result = session.execute_read(
-                        self._search_papers, query_string, limit, skip
-                    )
+        # Cache miss - execute query
+        try:
+            if index is not None:
+                result = self._search_papers_locally(
+                    index, query_string, limit, skip, cursor, filters
+                )
+            else:
+                params = self._search_params(query_string, limit, skip, cursor, filters)
+                with self.db.read_session() as session:
+                    hits = session.execute_read(self._search_hits, params)
+
+                    # A paper written a moment ago may not be indexed yet; only
+                    # then is an empty first page worth waiting for the index
+                    first_page = skip == 0 and cursor is None
+                    index_lag = get_index_lag_tracker()
+                    if not hits and first_page and index_lag.lagging():
+                        refresh_started = time.monotonic()
+                        session.execute_read(self._await_index_refresh)
+                        index_lag.record_refresh(refresh_started)
+                        hits = session.execute_read(self._search_hits, params)
+
+                # Papers seen by earlier searches or reads come from cache
+                papers = self.find_papers_by_ids([hit[0] for hit in hits[:limit]])
+                result = self._hits_to_search_page(hits, papers, limit)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.SEARCH, **key)
 
         # Cache the result with dependencies
-        # Search results depend on all papers in the result set
-        dependencies = [f"paper:{paper.pid}" for paper in result]
-        dependencies.append("search:global")  # Global search dependency
+        self._cache_search(result, read_started, **key)
 
-        self.cache_manager.put(
-            CacheType.SEARCH,
-            result,
-            dependencies=dependencies,
+        return result
+
+    @staticmethod
+    def _search_hits(tx, params: Dict) -> List[Tuple[str, float, int]]:
+        result = tx.run(SEARCH_HITS_QUERY, params)
+        rows = [(record["pid"], record["score"]) for record in result]
+        tied_before = GraphService._tied_before(params, rows)
+        if tied_before is None:
+            result = tx.run(SEARCH_HIGHER_HITS_QUERY, params, score=rows[0][1])
+            tied_before = params["skip"] - result.single()["higher"]
+        return GraphService._number_ties(rows, tied_before)
+
+    def _search_papers_locally(
+        self,
+        index,
+        query_string: str,
+        limit: int,
+        skip: int,
+        cursor: Optional[str],
+        filters: db.SearchFilters,
+    ) -> db.SearchPage:
+        """Rank with the local index, then read only the papers on the page."""
+        hits = self._local_search_hits(
+            index, query_string, limit, skip, cursor, filters
+        )
+        papers = self.find_papers_by_ids([pid for pid, _ in hits[:limit]])
+        return self._hits_to_search_page(hits, papers, limit)
+
+    @staticmethod
+    def _find_papers(tx, paper_ids: List[str]) -> List[db.Paper]:
+        result = tx.run(FIND_PAPERS_QUERY, paper_ids=paper_ids)
+        return GraphService._records_to_papers(result)
+
+    def search_stats(
+        self, query_string: str, filters: Optional[db.SearchFilters] = None
+    ) -> db.SearchStats:
+        """
+        Count the hits of a search and facet them by category and author.
+
+        Hits are counted exactly up to SEARCH_TOTAL_EXACT_LIMIT; above it,
+        `total` is that limit and `total_exact` is False. The local backend
+        counts every hit and facets the best SEARCH_TOTAL_EXACT_LIMIT. Cached
+        separately from the result pages, so every page of a search reuses it.
+        """
+        query_string = normalize_search_query(query_string)
+        if not query_string:
+            return db.SearchStats(total=0)
+        filters = filters or db.SearchFilters()
+        index = self._local_search_index()
+        key = dict(
             query_string=query_string,
-            limit=limit,
-            skip=skip,
+            filters=filters,
         )
+        params = self._search_stats_params(query_string, filters)
+        cached_result = self.cache_manager.get(CacheType.SEARCH, stats=True, **key)
+        if cached_result:
+            return cached_result
+
+        read_started = self.cache_manager.begin_read()
+        if index is not None:
+            result = index.stats(
+                query_string, filters, SEARCH_TOTAL_EXACT_LIMIT, SEARCH_FACET_SIZE
+            )
+            self._cache_search_stats(result, read_started, **key)
+            return result
+
+        try:
+            with self.db.read_session() as session:
+                result = session.execute_read(self._search_stats, params)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.SEARCH, stats=True, **key)
 
+        self._cache_search_stats(result, read_started, **key)
         return result
 
     @staticmethod
-    def _search_papers(tx, query_string: str, limit: int, skip: int) -> List[db.Paper]:
-        # Use fulltext search with built-in pagination
-        query = f"""
-        CALL db.index.fulltext.queryNodes("paper_fulltext_index", $query_string, {{skip: $skip, limit: $limit}}) 
-        YIELD node, score
-        WITH node, score
-        MATCH (p:Paper) WHERE elementId(p) = elementId(node)
-        OPTIONAL MATCH (p)-[:{RelationType.AUTHORED_BY.name}]->(a:Author)
-        WITH p, score, COLLECT(DISTINCT a.name) as authors
-        OPTIONAL MATCH (p)-[:{RelationType.BELONGS_TO.name}]->(c:Category)
-        RETURN p.id as pid, p.title as title, p.abstract as abstract,
-               authors, COLLECT(DISTINCT c.name) as categories, score
-        ORDER BY score DESC
-        SKIP $skip
-        LIMIT $limit
-        """
-        result = tx.run(query, query_string=query_string, skip=skip, limit=limit)
-
-        papers = []
-        for record in result:
-            if record and record["pid"]:
-                # Safely handle authors and categories
-                authors = []
-                categories = []
-
-                authors = [author for author in record["authors"] if author is not None]
-                categories = [
-                    category
-                    for category in record["categories"]
-                    if category is not None
-                ]
-                papers.append(
-                    db.Paper.make_meta(
-                        pid=record["pid"],
-                        title=record["title"],
-                        abstract=record["abstract"],
-                        authors=authors,
-                        categories=categories,
-                    )
-                )
-        return papers
+    def _search_stats(tx, params: Dict) -> db.SearchStats:
+        result = tx.run(SEARCH_STATS_QUERY, params)
+        return GraphService._record_to_search_stats(
+            result.single(), params["max_hits"]
+        )
 
     @staticmethod
-    def _count_papers(tx) -> int:
-        """Count total number of papers in the database."""
-        result = tx.run("MATCH (p:Paper) RETURN count(p) as count")
-        record = result.single()
-        return record["count"] if record else 0
+    def _await_index_refresh(tx):
+        tx.run(AWAIT_INDEX_REFRESH_QUERY).consume()
 
     def check_fulltext_index_exists(self) -> bool:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             result = session.execute_read(self._check_fulltext_index_exists, self)
-            return result
+        self.fulltext_index_exists = result
+        return result
 
     @staticmethod
     def _check_fulltext_index_exists(tx, gs: "GraphService") -> bool:
-        result = tx.run(
-            f"SHOW INDEXES YIELD name WHERE name = '{gs.fulltext_index_name}'"
-        )
+        result = tx.run(CHECK_INDEX_QUERY, name=gs.fulltext_index_name)
         return result.single() is not None
 
     def create_fulltext_index(self):
         if self.fulltext_index_exists:
             return
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._create_fulltext_index, self)
 
     @staticmethod
@@ -563,7 +1316,7 @@ class GraphService:
     def drop_fulltext_index(self):
         if not self.fulltext_index_exists:
             return
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._drop_fulltext_index, self)
 
     @staticmethod
@@ -578,100 +1331,56 @@ class GraphService:
             print(f"\033[31mERROR: Failed to drop full-text index: {e}\033[0m")
 
     def get_all_authors(self) -> List[db.Author]:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             return session.execute_read(self._get_all_authors)
 
     @staticmethod
     def _get_all_authors(tx) -> List[db.Author]:
-        query = f"""
-        MATCH (a:Author)
-        OPTIONAL MATCH (a)-[:{RelationType.HAS_PAPER.name}]->(p:Paper)
-        RETURN a.name AS name, COLLECT(p.id) AS pids, COLLECT(p.title) AS paper_titles
-        """
-        result = tx.run(query)
-        authors = []
-        for record in result:
-            if record and record["name"]:
-                authors.append(
-                    db.Author.make_meta(
-                        name=record["name"],
-                        papers=[
-                            (pid, title)
-                            for pid, title in zip(
-                                record["pids"], record["paper_titles"]
-                            )
-                            if pid is not None and title is not None
-                        ],
-                    )
-                )
-        return authors
+        result = tx.run(ALL_AUTHORS_QUERY)
+        return [
+            author
+            for author in map(GraphService._record_to_author, result)
+            if author is not None
+        ]
 
     def get_all_papers(self) -> List[db.Paper]:
-        with self.driver.session() as session:
-            return session.execute_read(self._get_all_papers)
+        # Try cache first
+        cached_result = self.cache_manager.get(CacheType.PAPER, listing="all")
+        if cached_result is not None:
+            return cached_result
+
+        # Cache miss - query database
+        read_started = self.cache_manager.begin_read()
+        try:
+            with self.db.read_session() as session:
+                result = session.execute_read(self._get_all_papers)
+        except db.Neo4jUnavailable as e:
+            return self._serve_stale(e, CacheType.PAPER, listing="all")
+
+        self._cache_paper_listing(result, read_started)
+
+        return result
 
     @staticmethod
     def _get_all_papers(tx) -> List[db.Paper]:
-        query = f"""
-        MATCH (p:Paper)
-        OPTIONAL MATCH (p)-[:{RelationType.AUTHORED_BY.name}]->(a:Author)
-        WITH p, COLLECT(DISTINCT a.name) AS authors
-        OPTIONAL MATCH (p)-[:{RelationType.BELONGS_TO.name}]->(c:Category)
-        WITH p, authors, COLLECT(DISTINCT c.name) AS categories
-        RETURN p.id AS pid, p.title AS title, p.abstract AS abstract, authors, categories
-        """
-        result = tx.run(query)
-        papers = []
-        for record in result:
-            if record and record["pid"]:
-                authors = [author for author in record["authors"] if author is not None]
-                categories = [
-                    category
-                    for category in record["categories"]
-                    if category is not None
-                ]
-                papers.append(
-                    db.Paper.make_meta(
-                        pid=record["pid"],
-                        title=record["title"],
-                        abstract=record["abstract"],
-                        authors=authors,
-                        categories=categories,
-                    )
-                )
-        return papers
+        result = tx.run(ALL_PAPERS_QUERY)
+        return GraphService._records_to_papers(result)
 
     def get_all_categories(self) -> List[db.Category]:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             return session.execute_read(self._get_all_categories)
 
     @staticmethod
     def _get_all_categories(tx) -> List[db.Category]:
-        query = f"""
-        MATCH (c:Category)
-        OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
-        RETURN c.name AS name, COLLECT(p.id) AS pids, COLLECT(p.title) AS paper_titles
-        """
-        result = tx.run(query)
-        categories = []
-        for record in result:
-            if record and record["name"]:
-                categories.append(
-                    db.Category.make_meta(
-                        name=record["name"],
-                        papers=[
-                            (pid, title)
-                            for pid, title in zip(
-                                record["pids"], record["paper_titles"]
-                            )
-                            if pid is not None and title is not None
-                        ],
-                    )
-                )
-        return categories
+        result = tx.run(ALL_CATEGORIES_QUERY)
+        return [
+            category
+            for category in map(GraphService._record_to_category, result)
+            if category is not None
+        ]
 
     def load_data_from_json(self, data: Dict):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._load_data_from_json, self, data)
 
     @staticmethod
@@ -710,40 +1419,62 @@ class GraphService:
                 gs.add_category(category)
                 gs.link_paper_to_category(paper_id, category)
 
+    def suggest(
+        self, prefix: str, kinds: Iterable[str] = KINDS, limit: int = 10
+    ) -> List[Dict]:
+        """
+        Typeahead suggestions for authors, categories and paper titles.
+
+        The first call starts building the index in the background; until it
+        is ready, no suggestions are returned.
+        """
+        if not self.suggest_index.ready:
+            self.suggest_index.start_build(self._suggestion_rows)
+        return self.suggest_index.suggest(prefix, kinds, limit)
+
+    def find_similar_papers(
+        self, paper_id: str, k: int = 10
+    ) -> Optional[List[Tuple[db.Paper, float]]]:
+        """
+        The `k` papers closest in content to a paper, with their similarity.
+
+        The first call starts building the vector index in the background;
+        until it is ready, no papers are returned. Returns None if the paper
+        does not exist.
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        paper = self.find_paper_by_id(paper_id)
+        if paper is None:
+            return None
+        if self.similarity_index is None:
+            # Needs numpy, so only imported when used
+            from .similarity_index import get_similarity_index
+
+            self.similarity_index = get_similarity_index()
+        self.similarity_index.start_build(self.get_all_papers)
+        if not self.similarity_index.ready:
+            return []
+
+        hits = self.similarity_index.similar([paper], k)[0]
+        papers = self.find_papers_by_ids([pid for pid, _ in hits])
+        return [
+            (similar, score)
+            for similar, (_, score) in zip(papers, hits)
+            if similar is not None
+        ]
+
+    def _suggestion_rows(self):
+        return suggestion_rows(
+            self.get_all_authors(), self.get_all_categories(), self.get_all_papers()
+        )
+
     def get_overview_info(self) -> db.OverviewInfo:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             return session.execute_read(self._get_overview_info)
 
     @staticmethod
     def _get_overview_info(tx) -> db.OverviewInfo:
-        query = f"""
-        MATCH (a:Author)
-        WITH COUNT(a) AS total_authors
-        MATCH (p:Paper)
-        WITH total_authors, COUNT(p) AS total_papers
-        MATCH (c:Category)
-        WITH total_authors, total_papers, COUNT(c) AS total_categories
-        OPTIONAL MATCH (c)-[:{RelationType.CONTAINS.name}]->(p:Paper)
-        WITH total_authors, total_papers, total_categories, c.name AS category_name, COUNT(p) AS num_papers
-        RETURN total_authors, total_papers, total_categories, COLLECT({{category: category_name, num_papers: num_papers}}) AS papers_per_category
-        """
-        result = tx.run(query)
-        record = result.single()
-        if record:
-            num_papers_per_category = {
-                item["category"]: item["num_papers"]
-                for item in record["papers_per_category"]
-                if item["category"] is not None
-            }
-            return db.OverviewInfo(
-                total_authors=record["total_authors"],
-                total_papers=record["total_papers"],
-                total_categories=record["total_categories"],
-                num_papers_per_category=num_papers_per_category,
-            )
-        return db.OverviewInfo(
-            total_authors=0,
-            total_papers=0,
-            total_categories=0,
-            num_papers_per_category={},
-        )
+        result = tx.run(OVERVIEW_QUERY)
+        return GraphService._record_to_overview(result.single())
@@ -0,0 +1,128 @@
+"""
+Highlighted snippets of search hits.
+
+The terms of a search are the words of the clauses of its query that a hit
+can match, leaving out prohibited clauses (-, ! or NOT), operators, field
+names and boost or fuzziness suffixes; a term ending in * matches every
+word starting with it. Words are compared casefolded, as the full-text and
+BM25 indexes do.
+
+A snippet is the part of an abstract, about `length` characters long and
+cut at word boundaries, holding the most distinct matching words. Text is
+HTML-escaped and matches are wrapped in <strong> tags.
+"""
+
+import html
+import re
+from typing import FrozenSet, List, Tuple
+
+from .. import db
+from .search_query import parse_search_query
+
+_WORD = re.compile(r"\w+")
+
+_ELLIPSIS = "…"
+# Part of a snippet kept before its first match, for context
+_LEAD = 0.2
+
+
+class QueryTerms:
+    def __init__(self, query_string: str):
+        words = set()
+        prefixes = set()
+        for clause in parse_search_query(query_string).terms():
+            # A phrase's words, or a term's; a trailing * makes the last a prefix
+            if isinstance(clause.body, tuple):
+                text, star = " ".join(clause.body), False
+            else:
+                text, star = clause.body, clause.body.endswith("*")
+            found = [word.casefold() for word in _WORD.findall(text)]
+            if found and star:
+                prefixes.add(found.pop())
+            words.update(found)
+        self.words: FrozenSet[str] = frozenset(words)
+        self.prefixes: Tuple[str, ...] = tuple(sorted(prefixes))
+
+    def matches(self, word: str) -> bool:
+        word = word.casefold()
+        return word in self.words or word.startswith(self.prefixes)
+
+
+def _matches(text: str, terms: QueryTerms) -> List[Tuple[int, int]]:
+    return [
+        match.span() for match in _WORD.finditer(text) if terms.matches(match.group())
+    ]
+
+
+def _mark(text: str, spans: List[Tuple[int, int]], start: int, end: int) -> str:
+    """Escaped text[start:end], with the spans inside it in <strong> tags."""
+    parts = []
+    position = start
+    for span_start, span_end in spans:
+        if span_start < start or span_end > end:
+            continue
+        parts.append(html.escape(text[position:span_start]))
+        parts.append(f"<strong>{html.escape(text[span_start:span_end])}</strong>")
+        position = span_end
+    parts.append(html.escape(text[position:end]))
+    return "".join(parts)
+
+
+def highlight(text: str, terms: QueryTerms) -> str:
+    """All of `text`, escaped, with every matching word highlighted."""
+    return _mark(text, _matches(text, terms), 0, len(text))
+
+
+def snippet(text: str, terms: QueryTerms, length: int) -> str:
+    """The highlighted part of `text` around its most distinct matching words."""
+    text = " ".join(text.split())
+    spans = _matches(text, terms)
+    if len(text) <= length:
+        return _mark(text, spans, 0, len(text))
+
+    # The window starting at a match that holds the most distinct matching
+    # words, then the most matches; the earliest of equals
+    span = length - int(length * _LEAD)
+    best = (0, 0, 0)
+    j = 0
+    for i, (window_start, _) in enumerate(spans):
+        j = max(j, i)
+        while j < len(spans) and spans[j][1] - window_start <= span:
+            j += 1
+        window = spans[i:j]
+        distinct = len({text[s:e].casefold() for s, e in window})
+        if (distinct, len(window)) > best[:2]:
+            best = (distinct, len(window), window_start)
+
+    start = max(best[2] - (length - span), 0)
+    if start > 0:
+        # Start at a word; at the first match if no word starts before it
+        space = text.find(" ", start, best[2])
+        start = space + 1 if space >= 0 else best[2]
+    end = min(start + length, len(text))
+    if end < len(text):
+        cut = text.rfind(" ", start, end + 1)
+        if cut > start:
+            end = cut
+
+    marked = _mark(text, spans, start, end)
+    prefix = _ELLIPSIS if start > 0 else ""
+    suffix = _ELLIPSIS if end < len(text) else ""
+    return f"{prefix}{marked}{suffix}"
+
+
+def highlight_page(
+    page: db.SearchPage, query_string: str, length: int
+) -> db.SearchPage:
+    """The page with a highlighted title and abstract snippet for each paper."""
+    terms = QueryTerms(query_string)
+    highlights = tuple(
+        db.SearchHighlight(
+            title=highlight(paper.title or "", terms),
+            snippet=snippet(paper.abstract or "", terms, length),
+        )
+        for paper in page.papers
+    )
+    return db.SearchPage(
+        papers=page.papers, next_cursor=page.next_cursor, highlights=highlights
+    )
@@ -0,0 +1,46 @@
+"""
+Tracking of writes the full-text index may not reflect yet.
+
+The paper index is eventually consistent: a paper written a moment ago may
+be missing from search results until the index refreshes. Paper writes are
+recorded here, so a search that finds nothing only waits for the index
+when such a write happened within FULLTEXT_INDEX_LAG_WINDOW seconds and the
+index has not been refreshed since. Writes are tracked per process.
+"""
+
+import threading
+import time
+from ..config import FULLTEXT_INDEX_LAG_WINDOW
+
+
+class IndexLagTracker:
+    def __init__(self, window: float):
+        self.window = window
+        self._written_at = float("-inf")
+        self._refreshed_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def record_write(self):
+        """Note a write of indexed paper properties."""
+        with self._lock:
+            self._written_at = time.monotonic()
+
+    def record_refresh(self, started_at: float):
+        """Note an index refresh that began at monotonic time `started_at`."""
+        with self._lock:
+            self._refreshed_at = max(self._refreshed_at, started_at)
+
+    def lagging(self) -> bool:
+        """Whether the index may still be missing a recent write."""
+        with self._lock:
+            return (
+                self._written_at > self._refreshed_at
+                and time.monotonic() - self._written_at < self.window
+            )
+
+
+_TRACKER = IndexLagTracker(FULLTEXT_INDEX_LAG_WINDOW)
+
+
+def get_index_lag_tracker() -> IndexLagTracker:
+    return _TRACKER
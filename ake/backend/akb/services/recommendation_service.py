@@ -1,20 +1,19 @@
-from typing import List
+from typing import List, Optional
 from ..db import get_neo4j_db, Paper
 from ..const import RelationType
 from .graph_service import GraphService
 
 
 class RecommendationService:
-    def __init__(self):
+    def __init__(self, graph_service: Optional[GraphService] = None):
         self.db = get_neo4j_db()
-        self.driver = self.db.get_driver()
-        self.graph_service = GraphService()
+        self.graph_service = graph_service or GraphService()
 
     def close(self):
         self.db.close()
 
     def get_recommendations(self, username: str) -> List[Paper]:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             papers = session.execute_read(self._get_recommendations, username)
             # Ensure we have a list of unique papers
             unique_papers = []
@@ -43,7 +42,7 @@ class RecommendationService:
         return papers
 
     def record_feedback(self, username: str, paper_id: str, liked: bool):
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             session.execute_write(self._record_feedback, username, paper_id, liked)
 
     @staticmethod
@@ -63,7 +62,7 @@ class RecommendationService:
             tx.run(query, username=username, paper_id=paper_id)
 
     def get_liked_papers(self, username: str) -> List[Paper]:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             return session.execute_read(self._get_liked_papers, username)
 
     @staticmethod
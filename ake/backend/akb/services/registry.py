@@ -0,0 +1,82 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class ServiceRegistry:
+    """
+    Builds each service once per process and hands out the same instance.
+
+    All services share the process-wide Neo4j driver and cache manager, so
+    constructing a service is only paid for on first use.
+    """
+
+    def __init__(self):
+        self._services: Dict[type, Any] = {}
+        # Reentrant: a factory may get the services it depends on
+        self._lock = threading.RLock()
+
+    def get(self, service_type: Type[T], factory: Optional[Callable[[], T]] = None) -> T:
+        """Return the shared instance of `service_type`, building it on first use."""
+        service = self._services.get(service_type)
+        if service is None:
+            with self._lock:
+                service = self._services.get(service_type)
+                if service is None:
+                    service = (factory or service_type)()
+                    self._services[service_type] = service
+        return service
+
+    def register(self, service_type: Type[T], service: T):
+        """Replace the shared instance of `service_type`, e.g. with a test double."""
+        with self._lock:
+            self._services[service_type] = service
+
+    def clear(self):
+        """Forget every built service; the next `get` builds them again."""
+        with self._lock:
+            self._services.clear()
+
+    def _reset_after_fork(self):
+        # Services built in the parent may wait on threads that did not survive
+        self._services = {}
+        self._lock = threading.RLock()
+
+
+# Global service registry instance
+_REGISTRY = ServiceRegistry()
+os.register_at_fork(after_in_child=_REGISTRY._reset_after_fork)
+
+
+def get_registry() -> ServiceRegistry:
+    """Get the global service registry."""
+    return _REGISTRY
+
+
+def get_graph_service():
+    from .graph_service import GraphService
+
+    return _REGISTRY.get(GraphService)
+
+
+def get_async_graph_service():
+    from .async_graph_service import AsyncGraphService
+
+    return _REGISTRY.get(AsyncGraphService)
+
+
+def get_user_service():
+    from .user_service import UserService
+
+    return _REGISTRY.get(UserService)
+
+
+def get_recommendation_service():
+    from .recommendation_service import RecommendationService
+
+    return _REGISTRY.get(
+        RecommendationService,
+        lambda: RecommendationService(graph_service=get_graph_service()),
+    )
@@ -0,0 +1,37 @@
+"""
+Opaque cursors for paging through full-text search results.
+
+A cursor holds the score of the last paper on a page and its position among
+the hits with that score. The next page continues strictly after it, so
+pages neither skip nor repeat papers while the index is unchanged, and
+return only their own hits; the Neo4j full-text index still scores every
+hit of the query for each page, however deep. Neo4j hits come in the
+index's own order, so the position is how many hits with that score were
+shown; the local search backend orders ties by paper id and stores that
+id. A cursor only continues a search on the backend that made it.
+"""
+
+import base64
+import json
+from typing import Tuple, Union
+
+
+def encode_search_cursor(score: float, position: Union[int, str]) -> str:
+    raw = json.dumps([score, position], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, Union[int, str]]:
+    """Return (score, position); raise ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, position = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid search cursor") from e
+    if (
+        not isinstance(score, (int, float))
+        or isinstance(position, bool)
+        or not isinstance(position, (int, str))
+    ):
+        raise ValueError("Invalid search cursor")
+    return float(score), position
@@ -0,0 +1,278 @@
+"""
+Canonical form of full-text search queries.
+
+Queries are parsed as the subset of Lucene syntax the search supports:
+terms (with * and ? wildcards), "phrases", field:value, (groups), the +, -,
+NOT and ! modifiers, the AND, OR, && and || operators, and ~ and ^
+suffixes. The canonical form lowercases terms and phrases (the index
+analyzer does too), collapses whitespace, writes NOT and ! as - and && and
+|| as AND and OR, and sorts the clauses of a query or group that has no
+AND/OR operator, since their order then does not change the hits or their
+scores. "Graph  Neural" and "neural graph" both become "graph neural", so
+they share one SEARCH cache entry.
+
+A query that does not parse (unbalanced quotes or brackets, a dangling
+operator, a leading wildcard, range or regex syntax) is searched as plain
+words instead: each word is escaped, so Lucene never sees invalid syntax.
+The canonical form is itself canonical, so normalising twice changes
+nothing.
+
+`parse_search_query` returns the parsed form, for the search backends that
+evaluate queries themselves instead of passing them to Lucene.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple, Union
+
+# Characters that end a term or start a clause modifier unless escaped
+_SPECIAL = set('+-!():^[]"{}~*?\\/&|')
+_TERM_END = set(' \t\r\n():^[]"{}~\\/!')
+_OPERATORS = {"AND": "AND", "OR": "OR", "&&": "AND", "||": "OR"}
+_NUMBER = re.compile(r"\d+(\.\d+)?|\.\d+")
+_WORD = re.compile(r"\w")
+
+# Deeper nesting of groups is rejected, which bounds the recursion
+_MAX_DEPTH = 16
+
+
+@dataclass(frozen=True)
+class Clause:
+    # "+" required, "-" prohibited (written -, ! or NOT), "" neither
+    modifier: str
+    # "name:" or ""
+    field: str
+    # A term, the lowercased words of a phrase, or the query of a group
+    body: Union[str, Tuple[str, ...], "Query"]
+    # Fuzziness and boost, as written: "~0.8", "^2"
+    suffix: str = ""
+
+    def __str__(self) -> str:
+        if isinstance(self.body, Query):
+            body = f"({self.body})"
+        elif isinstance(self.body, tuple):
+            body = '"' + " ".join(self.body) + '"'
+        else:
+            body = self.body
+        return self.modifier + self.field + body + self.suffix
+
+
+@dataclass(frozen=True)
+class Query:
+    # Clauses, with "AND" or "OR" between those an operator joins
+    parts: Tuple[Union[Clause, str], ...] = ()
+
+    def __str__(self) -> str:
+        return " ".join(str(part) for part in self.parts)
+
+    def occurs(self) -> Iterator[Tuple[str, Clause]]:
+        """
+        Each clause with how it must occur, as Lucene reads it: "-" if
+        prohibited, "+" if required (by its modifier or an AND next to it),
+        "" if optional.
+        """
+        parts = ("",) + self.parts + ("",)
+        for i, part in enumerate(parts):
+            if isinstance(part, str):
+                continue
+            if part.modifier:
+                yield part.modifier, part
+            elif "AND" in (parts[i - 1], parts[i + 1]):
+                yield "+", part
+            else:
+                yield "", part
+
+    def terms(self) -> Iterator[Clause]:
+        """
+        The term and phrase clauses a hit can match on, leaving out those
+        prohibited, directly or by a group.
+        """
+        for occur, clause in self.occurs():
+            if occur == "-":
+                continue
+            if isinstance(clause.body, Query):
+                yield from clause.body.terms()
+            else:
+                yield clause
+
+
+class _Invalid(Exception):
+    pass
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def peek(self, ahead: int = 0) -> str:
+        pos = self.pos + ahead
+        return self.text[pos] if pos < len(self.text) else ""
+
+    def skip_space(self):
+        while self.peek().isspace():
+            self.pos += 1
+
+    def operator(self) -> Optional[str]:
+        """The AND/OR operator at the current position, consumed, or None."""
+        self.skip_space()
+        for token, canonical in _OPERATORS.items():
+            end = self.pos + len(token)
+            if self.text.startswith(token, self.pos) and (
+                token[0] in "&|"
+                or end == len(self.text)
+                or self.text[end].isspace()
+                or self.text[end] == "("
+            ):
+                self.pos = end
+                return canonical
+        return None
+
+    def query(self, depth: int) -> Query:
+        """Clauses up to the end of the text or the closing bracket."""
+        if depth > _MAX_DEPTH:
+            raise _Invalid()
+        parts: List[Union[Clause, str]] = []
+        has_operator = False
+        while True:
+            self.skip_space()
+            if self.peek() in ("", ")"):
+                break
+            operator = self.operator()
+            if operator is not None:
+                if not parts or parts[-1] in ("AND", "OR"):
+                    raise _Invalid()
+                parts.append(operator)
+                has_operator = True
+                continue
+            parts.append(self.clause(depth))
+        if not parts or parts[-1] in ("AND", "OR"):
+            raise _Invalid()
+        if not has_operator:
+            parts.sort(key=str)
+        return Query(tuple(parts))
+
+    def clause(self, depth: int) -> Clause:
+        modifier = ""
+        if self.peek() in "+-!":
+            modifier = "+" if self.peek() == "+" else "-"
+            self.pos += 1
+        elif self.text.startswith("NOT", self.pos) and self.peek(3) in (" ", "("):
+            modifier = "-"
+            self.pos += 3
+        self.skip_space()
+
+        field = ""
+        if self.peek() not in ('"', "("):
+            start = self.pos
+            name = self.term_text()
+            if name and self.peek() == ":":
+                self.pos += 1
+                field = name + ":"
+                self.skip_space()
+            else:
+                self.pos = start
+
+        char = self.peek()
+        if char == '"':
+            body = self.phrase()
+            suffix = self.suffixes(allow_fuzzy=True)
+        elif char == "(":
+            self.pos += 1
+            body = self.query(depth + 1)
+            if self.peek() != ")":
+                raise _Invalid()
+            self.pos += 1
+            suffix = self.suffixes(allow_fuzzy=False)
+        else:
+            body = self.term_text().lower()
+            if not body or body[0] in "*?":
+                # The query parser rejects leading wildcards by default
+                raise _Invalid()
+            suffix = self.suffixes(allow_fuzzy=True)
+        return Clause(modifier, field, body, suffix)
+
+    def term_text(self) -> str:
+        start = self.pos
+        while True:
+            char = self.peek()
+            if char == "\\":
+                if not self.peek(1):
+                    raise _Invalid()
+                self.pos += 2
+            elif char and char not in _TERM_END and not (
+                self.pos == start and char in "+-"
+            ):
+                if char == ":" or self.text.startswith(("&&", "||"), self.pos):
+                    break
+                self.pos += 1
+            else:
+                break
+        return self.text[start : self.pos]
+
+    def phrase(self) -> Tuple[str, ...]:
+        self.pos += 1
+        start = self.pos
+        while self.peek() not in ('"', ""):
+            self.pos += 2 if self.peek() == "\\" else 1
+        if self.peek() != '"':
+            raise _Invalid()
+        words = self.text[start : self.pos].split()
+        self.pos += 1
+        if not words:
+            raise _Invalid()
+        return tuple(word.lower() for word in words)
+
+    def suffixes(self, allow_fuzzy: bool) -> str:
+        suffix = ""
+        while self.peek() in ("~", "^"):
+            char = self.peek()
+            if char == "~" and not allow_fuzzy:
+                raise _Invalid()
+            self.pos += 1
+            number = _NUMBER.match(self.text, self.pos)
+            if number is None and char == "^":
+                raise _Invalid()
+            if number is not None:
+                self.pos = number.end()
+                suffix += char + number.group()
+            else:
+                suffix += char
+        if self.peek() and not self.peek().isspace() and self.peek() != ")":
+            raise _Invalid()
+        return suffix
+
+
+def _escape(word: str) -> str:
+    return "".join("\\" + char if char in _SPECIAL else char for char in word)
+
+
+def parse_search_query(query_string: str) -> Query:
+    """
+    The parsed canonical form of a search query.
+
+    Syntax errors never raise: the query is then a query of plain words.
+    """
+    parser = _Parser(query_string)
+    try:
+        query = parser.query(depth=0)
+        if parser.peek():
+            # A closing bracket without an opening one
+            raise _Invalid()
+        return query
+    except _Invalid:
+        words = [
+            _escape(word.lower())
+            for word in query_string.split()
+            if _WORD.search(word)
+        ]
+        return Query(tuple(Clause("", "", word) for word in sorted(words)))
+
+
+def normalize_search_query(query_string: str) -> str:
+    """
+    The canonical form of a search query; "" if it has nothing to search for.
+
+    Syntax errors never raise: the query is then searched as plain words.
+    """
+    return str(parse_search_query(query_string))
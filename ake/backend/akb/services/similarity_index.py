@@ -0,0 +1,531 @@
+"""
+Content vectors of papers, for "similar papers".
+
+A paper's title (counted twice) and abstract become a hashed TF-IDF
+vector: each word is hashed into one of 2**20 buckets and weighted by
+(1 + log tf) times the inverse document frequency of its bucket. The
+buckets are folded with a pseudo-random sign into SIMILAR_DIMENSIONS
+dimensions, and the vector is L2-normalised. The dot product of two
+vectors then approximates the cosine similarity of their TF-IDF vectors.
+
+The vectors of all papers are a float32 matrix in a `.npy` file under
+SIMILAR_INDEX_DIR, memory-mapped read-only. Worker processes on one host
+share one copy of it in the page cache, and a process starting within
+SIMILAR_REFRESH_INTERVAL seconds of the last build reuses the matrix
+instead of building its own. Neighbours are found by scoring blocks of
+rows, one matrix product per block, and keeping a running top k per query.
+With SIMILAR_IVF_LISTS > 0, rows are also grouped around k-means centroids
+(an IVF coarse index), and a query scans only the SIMILAR_IVF_PROBES lists
+with the closest centroids.
+
+Papers written since the matrix was built are held in a small in-memory
+matrix that every query scans as well; their rows in the file are masked.
+Queries scan without holding the index lock: writers replace the mask and
+the recent matrix rather than editing them.
+Builds sharing a directory take turns on a lock file, so a build can drop
+the generations it replaces without removing one still being written; a
+process that waited for the lock reuses the matrix published meanwhile.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .. import db
+from ..config import (
+    SIMILAR_INDEX_DIR,
+    SIMILAR_DIMENSIONS,
+    SIMILAR_IVF_LISTS,
+    SIMILAR_IVF_PROBES,
+    SIMILAR_REFRESH_INTERVAL,
+)
+from .bm25_index import tokenize
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where gunicorn does not run: one process builds at a time
+    fcntl = None
+
+_BUCKETS = 2**20
+
+# Rows scored per matrix product
+_BLOCK_ROWS = 65536
+
+# Lloyd iterations, and rows sampled per list, when fitting IVF centroids
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE_PER_LIST = 64
+
+# File naming the published generation, and the file builds lock, inside
+# the index directory
+_CURRENT = "CURRENT"
+_LOCK = "LOCK"
+
+
+@lru_cache(maxsize=2**18)
+def _bucket(token: str) -> int:
+    # Stable across processes, unlike hash()
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % _BUCKETS
+
+
+def _fold_tables(dimensions: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Dimension and sign of every bucket."""
+    mixed = np.arange(_BUCKETS, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    dims = ((mixed >> np.uint64(32)) % np.uint64(dimensions)).astype(np.intp)
+    signs = np.where((mixed >> np.uint64(31)) & np.uint64(1), 1.0, -1.0)
+    return dims, signs.astype(np.float32)
+
+
+def _term_counts(paper: db.Paper) -> Tuple[np.ndarray, np.ndarray]:
+    tokens = tokenize(paper.title) * 2 + tokenize(paper.abstract)
+    counts = Counter(map(_bucket, tokens))
+    return (
+        np.fromiter(counts.keys(), dtype=np.intp, count=len(counts)),
+        np.fromiter(counts.values(), dtype=np.float32, count=len(counts)),
+    )
+
+
+class _Generation:
+    """A built matrix with its idf weights and optional IVF lists."""
+
+    def __init__(self, path, ids, vectors, idf, centroids=None, lists=None):
+        self.path = path
+        self.ids: List[str] = list(ids)
+        self.rows: Dict[str, int] = {pid: row for row, pid in enumerate(self.ids)}
+        self.vectors = vectors
+        self.idf = idf
+        # (k, dimensions), and rows of each list: list_rows[offsets[i]:offsets[i+1]]
+        self.centroids = centroids
+        self.lists = lists
+
+    @staticmethod
+    def load(path: str) -> "_Generation":
+        def array(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        lists = None
+        centroids = None
+        if os.path.exists(os.path.join(path, "centroids.npy")):
+            centroids = np.asarray(array("centroids.npy"))
+            lists = (array("list_rows.npy"), np.asarray(array("list_offsets.npy")))
+        return _Generation(
+            path,
+            array("ids.npy").tolist(),
+            array("vectors.npy"),
+            np.asarray(array("idf.npy")),
+            centroids,
+            lists,
+        )
+
+
+class SimilarityIndex:
+    NOT_BUILT = "not_built"
+    BUILDING = "building"
+    READY = "ready"
+
+    def __init__(
+        self,
+        directory: Optional[str] = SIMILAR_INDEX_DIR,
+        dimensions: int = SIMILAR_DIMENSIONS,
+        ivf_lists: int = SIMILAR_IVF_LISTS,
+        ivf_probes: int = SIMILAR_IVF_PROBES,
+        refresh_interval: float = SIMILAR_REFRESH_INTERVAL,
+    ):
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), "akb-similar"
+        )
+        self.dimensions = dimensions
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.refresh_interval = refresh_interval
+        self._dims, self._signs = _fold_tables(dimensions)
+        self.state = self.NOT_BUILT
+        self._generation: Optional[_Generation] = None
+        self._load: Optional[Callable[[], Iterable[db.Paper]]] = None
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Base rows of papers rewritten or deleted since the build
+        self._dead = np.zeros(0, dtype=bool)
+        # Papers written since the build: pid -> vector
+        self._recent: Dict[str, np.ndarray] = {}
+        self._recent_matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        # Changes made while (re)building, replayed on the new generation
+        self._pending: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def start_build(self, load: Callable[[], Iterable[db.Paper]]):
+        """Load a recent published matrix, or build one in the background."""
+        with self._lock:
+            if self.state != self.NOT_BUILT:
+                return
+            self.state = self.BUILDING
+            self._load = load
+            self._start_rebuild(reuse=True)
+
+    def _start_rebuild(self, reuse: bool):
+        # Caller holds self._lock
+        self._rebuilding = True
+        threading.Thread(
+            target=self._build, args=(reuse,), name="similar-index-build", daemon=True
+        ).start()
+
+    def _build(self, reuse: bool):
+        try:
+            generation = self._load_published() if reuse else None
+            if generation is None:
+                requested = time.time()
+                with self._building():
+                    # Published by a build this one waited for
+                    generation = self._load_published(
+                        since=None if reuse else requested
+                    )
+                    if generation is None:
+                        generation = self._publish(list(self._load()))
+        except Exception as e:
+            print(f"\033[31mERROR: Failed to build similarity index: {e}\033[0m")
+            with self._lock:
+                if self.state == self.BUILDING:
+                    self.state = self.NOT_BUILT
+                self._rebuilding = False
+                self._built_at = time.monotonic()
+                self._pending.clear()
+            return
+
+        with self._lock:
+            self._generation = generation
+            self._dead = np.zeros(len(generation.ids), dtype=bool)
+            self._recent = {}
+            self._recent_matrix = None
+            for change in self._pending:
+                change()
+            self._pending.clear()
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+            self.state = self.READY
+
+    def _load_published(
+        self, since: Optional[float] = None
+    ) -> Optional[_Generation]:
+        """
+        The published generation if it fits this index and is recent: built
+        within the refresh interval, or after the time `since`.
+        """
+        try:
+            with open(os.path.join(self.directory, _CURRENT)) as f:
+                path = os.path.join(self.directory, f.read().strip())
+            built = os.path.getmtime(path)
+            generation = _Generation.load(path)
+        except (OSError, ValueError):
+            return None
+        if since is not None:
+            recent = built >= since
+        else:
+            recent = (
+                not self.refresh_interval
+                or time.time() - built < self.refresh_interval
+            )
+        fits = (
+            generation.vectors.shape[1] == self.dimensions
+            and (generation.centroids is not None) == (self.ivf_lists > 0)
+            and recent
+        )
+        return generation if fits else None
+
+    @contextmanager
+    def _building(self):
+        """Hold the directory's build lock, shared by every process using it."""
+        os.makedirs(self.directory, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, _LOCK), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _publish(self, papers: List[db.Paper]) -> _Generation:
+        """
+        Vectorise a snapshot into a new generation directory and publish it.
+        Caller holds the build lock.
+        """
+        name = f"{int(time.time() * 1000)}-{os.getpid()}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path)
+
+        # Document frequency of each bucket, then the weighted vectors; two
+        # passes, rather than holding the terms of every paper
+        df = np.zeros(_BUCKETS, dtype=np.float32)
+        for paper in papers:
+            df[_term_counts(paper)[0]] += 1
+        idf = np.log((1 + len(papers)) / (1 + df)).astype(np.float32) + 1
+        vectors = np.lib.format.open_memmap(
+            os.path.join(path, "vectors.npy"),
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(papers), self.dimensions),
+        )
+        for row, paper in enumerate(papers):
+            vectors[row] = self._fold(*_term_counts(paper), idf)
+        vectors.flush()
+
+        np.save(os.path.join(path, "ids.npy"), np.array([p.pid for p in papers]))
+        np.save(os.path.join(path, "idf.npy"), idf)
+        if self.ivf_lists > 0 and len(papers):
+            centroids, rows, offsets = _fit_ivf(vectors, self.ivf_lists)
+            np.save(os.path.join(path, "centroids.npy"), centroids)
+            np.save(os.path.join(path, "list_rows.npy"), rows)
+            np.save(os.path.join(path, "list_offsets.npy"), offsets)
+        del vectors
+
+        # Switch readers over atomically, then drop older generations; no
+        # other build is writing one while this holds the lock, and processes
+        # still mapping one keep their pages until they move on
+        current = os.path.join(self.directory, f"{_CURRENT}.{os.getpid()}")
+        with open(current, "w") as f:
+            f.write(name)
+        os.replace(current, os.path.join(self.directory, _CURRENT))
+        for other in os.listdir(self.directory):
+            other_path = os.path.join(self.directory, other)
+            if other != name and os.path.isdir(other_path):
+                shutil.rmtree(other_path, ignore_errors=True)
+        return _Generation.load(path)
+
+    def _fold(self, buckets, tf, idf) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        weights = (1 + np.log(tf)) * idf[buckets] * self._signs[buckets]
+        np.add.at(vector, self._dims[buckets], weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def vectorize(self, paper: db.Paper) -> np.ndarray:
+        # Caller holds self._lock; the index is ready
+        buckets, tf = _term_counts(paper)
+        return self._fold(buckets, tf, self._generation.idf)
+
+    def _apply(self, change: Callable[[], None]):
+        with self._lock:
+            if self._generation is not None:
+                change()
+            if self._rebuilding:
+                self._pending.append(change)
+
+    def _maybe_refresh(self):
+        # Caller holds self._lock; the index is ready
+        if (
+            self.refresh_interval
+            and not self._rebuilding
+            and time.monotonic() - self._built_at > self.refresh_interval
+        ):
+            self._start_rebuild(reuse=False)
+
+    # Write hooks
+
+    def add(self, paper: db.Paper):
+        """Index a new or rewritten paper."""
+
+        def change():
+            self._forget(paper.pid)
+            self._recent[paper.pid] = self.vectorize(paper)
+            self._recent_matrix = None
+
+        self._apply(change)
+
+    def remove(self, paper_id: str):
+        self._apply(lambda: self._forget(paper_id))
+
+    def clear(self):
+        def change():
+            self._dead = np.ones_like(self._dead)
+            self._recent.clear()
+            self._recent_matrix = None
+
+        self._apply(change)
+
+    def _forget(self, paper_id: str):
+        # Caller holds self._lock
+        row = self._generation.rows.get(paper_id)
+        if row is not None and not self._dead[row]:
+            # Replaced, not edited: scans read it without the lock
+            self._dead = self._dead.copy()
+            self._dead[row] = True
+        if self._recent.pop(paper_id, None) is not None:
+            self._recent_matrix = None
+
+    # Reads
+
+    def similar(
+        self, papers: List[db.Paper], k: int
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        The `k` papers most similar to each of `papers`, as (paper id,
+        similarity) best first, leaving out the paper itself.
+        """
+        with self._lock:
+            self._maybe_refresh()
+            queries = np.stack([self._vector(paper) for paper in papers])
+            generation, dead = self._generation, self._dead
+            recent_ids, recent = self._recent_rows()
+        # Scanned without the lock; writers replace what they change
+        return self._nearest(
+            generation,
+            dead,
+            (recent_ids, recent),
+            queries,
+            k + 1,
+            [paper.pid for paper in papers],
+            k,
+        )
+
+    def _vector(self, paper: db.Paper) -> np.ndarray:
+        # Caller holds self._lock
+        vector = self._recent.get(paper.pid)
+        if vector is not None:
+            return vector
+        row = self._generation.rows.get(paper.pid)
+        if row is not None and not self._dead[row]:
+            return np.asarray(self._generation.vectors[row])
+        # Written by another process since the build
+        return self.vectorize(paper)
+
+    def _nearest(self, generation, dead, recent_rows, queries, fetch, exclude, k):
+        best = [_TopK(fetch) for _ in range(len(queries))]
+
+        if generation.lists is not None:
+            rows, offsets = generation.lists
+            probes = min(self.ivf_probes, len(generation.centroids))
+            nearest_lists = np.argsort(-(queries @ generation.centroids.T), axis=1)
+            for query, top, lists in zip(queries, best, nearest_lists[:, :probes]):
+                candidates = np.sort(
+                    np.concatenate([rows[offsets[i] : offsets[i + 1]] for i in lists])
+                )
+                candidates = candidates[~dead[candidates]]
+                scores = generation.vectors[candidates] @ query
+                top.push(scores, candidates)
+        else:
+            for start in range(0, len(generation.ids), _BLOCK_ROWS):
+                block = generation.vectors[start : start + _BLOCK_ROWS]
+                scores = queries @ block.T
+                scores[:, dead[start : start + len(block)]] = -np.inf
+                rows = np.arange(start, start + len(block))
+                for top, row_scores in zip(best, scores):
+                    top.push(row_scores, rows)
+
+        recent_ids, recent = recent_rows
+        results = []
+        for query, top, pid in zip(queries, best, exclude):
+            hits = [
+                (generation.ids[row], score)
+                for score, row in top.items()
+                if score > -np.inf
+            ]
+            if recent_ids:
+                scores = recent @ query
+                hits.extend(zip(recent_ids, scores.tolist()))
+            hits.sort(key=lambda hit: (-hit[1], hit[0]))
+            results.append([hit for hit in hits if hit[0] != pid][:k])
+        return results
+
+    def _recent_rows(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        # Caller holds self._lock
+        if self._recent_matrix is None:
+            ids = list(self._recent)
+            matrix = np.stack([self._recent[pid] for pid in ids]) if ids else None
+            self._recent_matrix = (ids, matrix)
+        return self._recent_matrix
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            generation = self._generation
+            return {
+                "state": self.state,
+                "papers": len(generation.ids) if generation else 0,
+                "dead": int(self._dead.sum()),
+                "recent": len(self._recent),
+                "dimensions": self.dimensions,
+                "ivf_lists": (
+                    len(generation.centroids)
+                    if generation and generation.centroids is not None
+                    else 0
+                ),
+                "path": generation.path if generation else None,
+            }
+
+
+class _TopK:
+    """Running top k of (score, row) pairs over blocks of candidates."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores = np.empty(0, dtype=np.float32)
+        self.rows = np.empty(0, dtype=np.intp)
+
+    def push(self, scores: np.ndarray, rows: np.ndarray):
+        scores = np.concatenate((self.scores, scores))
+        rows = np.concatenate((self.rows, rows))
+        if len(scores) > self.k:
+            keep = np.argpartition(-scores, self.k - 1)[: self.k]
+            scores, rows = scores[keep], rows[keep]
+        self.scores, self.rows = scores, rows
+
+    def items(self) -> List[Tuple[float, int]]:
+        return list(zip(self.scores.tolist(), self.rows.tolist()))
+
+
+def _fit_ivf(vectors: np.ndarray, lists: int):
+    """Spherical k-means centroids on a sample, and every row's list."""
+    n = len(vectors)
+    lists = min(lists, n)
+    rng = np.random.default_rng(0)
+    sample = np.sort(
+        rng.choice(n, size=min(n, lists * _KMEANS_SAMPLE_PER_LIST), replace=False)
+    )
+    points = np.asarray(vectors[sample])
+    centroids = points[rng.choice(len(points), size=lists, replace=False)]
+    for _ in range(_KMEANS_ITERATIONS):
+        assignment = np.argmax(points @ centroids.T, axis=1)
+        for i in range(lists):
+            members = points[assignment == i]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[i] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+    assignment = np.concatenate(
+        [
+            np.argmax(vectors[start : start + _BLOCK_ROWS] @ centroids.T, axis=1)
+            for start in range(0, n, _BLOCK_ROWS)
+        ]
+    )
+    rows = np.argsort(assignment, kind="stable").astype(np.int64)
+    offsets = np.searchsorted(assignment[rows], np.arange(lists + 1))
+    return centroids.astype(np.float32), rows, offsets
+
+
+_INDEX = SimilarityIndex()
+
+
+def _reset_after_fork():
+    # A build thread started in the parent did not survive
+    global _INDEX
+    _INDEX = SimilarityIndex()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """The process-wide index."""
+    return _INDEX
@@ -0,0 +1,221 @@
+"""
+In-memory prefix index for typeahead suggestions.
+
+Author names, category names and paper titles are kept in one sorted array
+of (key, kind, id) entries, where key is the casefolded text. All entries
+starting with a prefix are a contiguous slice found by binary search; the
+most frequent of them are returned first. Authors are also found by each
+later word of their name ("vas" finds "Ashish Vaswani").
+
+Authors and categories are weighted by their number of papers. GraphService
+builds the index once from its listings and keeps it current from its write
+hooks; weights can drift slightly when a link is written twice, until the
+next rebuild.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Tuple
+
+AUTHOR = "author"
+CATEGORY = "category"
+PAPER = "paper"
+KINDS = (AUTHOR, CATEGORY, PAPER)
+
+# Sorts after every character a key can contain
+_KEY_END = "\U0010ffff"
+
+# Prefixes matching more entries than this (typically one or two letters)
+# are ranked once and cached until the next change
+_CACHE_MIN_MATCHES = 1000
+
+
+def _keys(kind: str, text: str) -> List[str]:
+    key = " ".join(text.casefold().split())
+    if kind != AUTHOR:
+        return [key] if key else []
+    words = key.split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class SuggestIndex:
+    NOT_BUILT = "not_built"
+    BUILDING = "building"
+    READY = "ready"
+
+    def __init__(self):
+        # (key, kind, id), sorted
+        self._entries: List[Tuple[str, str, str]] = []
+        # (kind, id) -> [text, weight]
+        self._items: Dict[Tuple[str, str], List] = {}
+        # Changes made while building, applied once the build is done
+        self._pending: List[Callable[[], None]] = []
+        # (prefix, kinds, limit) -> suggestions, for broad prefixes
+        self._ranked: Dict[Tuple, List[Dict]] = {}
+        self.state = self.NOT_BUILT
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def start_build(self, load: Callable[[], Iterable[Tuple[str, str, str, int]]]):
+        """Build the index in the background from (kind, id, text, weight) rows."""
+        with self._lock:
+            if self.state != self.NOT_BUILT:
+                return
+            self.state = self.BUILDING
+        threading.Thread(
+            target=self._build, args=(load,), name="suggest-index-build", daemon=True
+        ).start()
+
+    def _build(self, load):
+        try:
+            rows = list(load())
+        except Exception as e:
+            print(f"\033[31mERROR: Failed to build suggest index: {e}\033[0m")
+            with self._lock:
+                self.state = self.NOT_BUILT
+                self._pending.clear()
+            return
+
+        items = {(kind, id): [text, weight] for kind, id, text, weight in rows}
+        entries = sorted(
+            (key, kind, id)
+            for (kind, id), (text, _) in items.items()
+            for key in _keys(kind, text)
+        )
+        with self._lock:
+            self._items = items
+            self._entries = entries
+            for change in self._pending:
+                change()
+            self._pending.clear()
+            self._ranked.clear()
+            self.state = self.READY
+
+    def _apply(self, change: Callable[[], None]):
+        with self._lock:
+            if self.state == self.READY:
+                change()
+            elif self.state == self.BUILDING:
+                self._pending.append(change)
+
+    # Write hooks
+
+    def add(self, kind: str, id: str, text: str, weight: int = 0):
+        self._apply(lambda: self._add(kind, id, text, weight))
+
+    def remove(self, kind: str, id: str):
+        self._apply(lambda: self._remove(kind, id))
+
+    def rename(self, kind: str, old_id: str, new_id: str, text: str):
+        """Give an item a new id and text, keeping its weight."""
+
+        def change():
+            item = self._items.get((kind, old_id))
+            self._remove(kind, old_id)
+            self._add(kind, new_id, text, item[1] if item else 0)
+
+        self._apply(change)
+
+    def bump(self, kind: str, id: str, delta: int):
+        def change():
+            item = self._items.get((kind, id))
+            if item is not None:
+                item[1] = max(item[1] + delta, 0)
+                self._forget_ranked(_keys(kind, item[0]))
+
+        self._apply(change)
+
+    def clear(self):
+        def change():
+            self._items.clear()
+            self._entries.clear()
+            self._ranked.clear()
+
+        self._apply(change)
+
+    def _add(self, kind, id, text, weight):
+        # Caller holds self._lock
+        self._remove(kind, id)
+        self._items[(kind, id)] = [text, weight]
+        keys = _keys(kind, text)
+        for key in keys:
+            insort(self._entries, (key, kind, id))
+        self._forget_ranked(keys)
+
+    def _remove(self, kind, id):
+        # Caller holds self._lock
+        item = self._items.pop((kind, id), None)
+        if item is None:
+            return
+        keys = _keys(kind, item[0])
+        for key in keys:
+            i = bisect_left(self._entries, (key, kind, id))
+            if i < len(self._entries) and self._entries[i] == (key, kind, id):
+                del self._entries[i]
+        self._forget_ranked(keys)
+
+    def _forget_ranked(self, keys: List[str]):
+        # Caller holds self._lock; drop cached rankings these keys fall under
+        stale = [
+            cache_key
+            for cache_key in self._ranked
+            if any(key.startswith(cache_key[0]) for key in keys)
+        ]
+        for cache_key in stale:
+            del self._ranked[cache_key]
+
+    # Reads
+
+    def suggest(
+        self, prefix: str, kinds: Iterable[str] = KINDS, limit: int = 10
+    ) -> List[Dict]:
+        """Items with a key starting with `prefix`, most frequent first."""
+        prefix = " ".join(prefix.casefold().split())
+        if not prefix:
+            return []
+        kinds = frozenset(kinds)
+        with self._lock:
+            lo = bisect_left(self._entries, (prefix,))
+            hi = bisect_left(self._entries, (prefix + _KEY_END,), lo)
+            cache_key = (prefix, kinds, limit)
+            if hi - lo > _CACHE_MIN_MATCHES and cache_key in self._ranked:
+                return self._ranked[cache_key]
+            matches = {
+                (kind, id): self._items[(kind, id)]
+                for _, kind, id in self._entries[lo:hi]
+                if kind in kinds
+            }
+            best = heapq.nsmallest(
+                limit,
+                matches.items(),
+                key=lambda match: (-match[1][1], len(match[1][0]), match[1][0]),
+            )
+            suggestions = [
+                {"type": kind, "id": id, "text": text, "weight": weight}
+                for (kind, id), (text, weight) in best
+            ]
+            if hi - lo > _CACHE_MIN_MATCHES:
+                self._ranked[cache_key] = suggestions
+            return suggestions
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "items": len(self._items),
+                "entries": len(self._entries),
+            }
+
+
+def suggestion_rows(authors, categories, papers) -> Iterable[Tuple[str, str, str, int]]:
+    """(kind, id, text, weight) rows from the full listings of each kind."""
+    for author in authors:
+        yield AUTHOR, author.name, author.name, len(author.papers)
+    for category in categories:
+        yield CATEGORY, category.name, category.name, len(category.papers)
+    for paper in papers:
+        yield PAPER, paper.pid, paper.title, 0
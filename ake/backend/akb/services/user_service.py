@@ -6,14 +6,13 @@ import bcrypt
 class UserService:
     def __init__(self):
         self.db = get_neo4j_db()
-        self.driver = self.db.get_driver()
 
     def close(self):
         self.db.close()
 
     def create_user(self, username: str, password: str) -> Optional[User]:
         password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-        with self.driver.session() as session:
+        with self.db.write_session() as session:
             result = session.execute_write(
                 self._create_user, username, password_hash.decode("utf-8")
             )
@@ -32,7 +31,7 @@ class UserService:
         return record[0] if record else None
 
     def find_user(self, username: str) -> Optional[User]:
-        with self.driver.session() as session:
+        with self.db.read_session() as session:
             return session.execute_read(self._find_user, username)
 
     @staticmethod
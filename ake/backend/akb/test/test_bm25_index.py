@@ -0,0 +1,175 @@
+import sys
+import os
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+pytest.importorskip("numpy")
+
+from akb.db import Paper, SearchFilters
+from akb.services.bm25_index import BM25Index, arxiv_month
+from akb.services.search_query import normalize_search_query, parse_search_query
+from akb.services.suggest_index import AUTHOR
+
+
+def paper(pid, title, abstract="", authors=(), categories=()):
+    return Paper.make_meta(
+        pid=pid,
+        title=title,
+        abstract=abstract,
+        authors=authors,
+        categories=categories,
+    )
+
+
+PAPERS = [
+    paper(
+        "1706.03762",
+        "Attention Is All You Need",
+        "The Transformer, based solely on attention mechanisms.",
+        ["Ashish Vaswani"],
+        ["cs.CL"],
+    ),
+    paper(
+        "1810.04805",
+        "BERT: Pre-training of Deep Bidirectional Transformers",
+        "Language representation model; self-attention layers.",
+        ["Jacob Devlin"],
+        ["cs.CL"],
+    ),
+    paper(
+        "1512.03385",
+        "Deep Residual Learning",
+        "Residual networks.",
+        ["Kaiming He"],
+        ["cs.CV"],
+    ),
+]
+
+
+def built_index(papers=PAPERS):
+    index = BM25Index(refresh_interval=0)
+    index.start_build(lambda: papers)
+    deadline = time.monotonic() + 5
+    while not index.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.ready
+    return index
+
+
+def ids(hits):
+    return [pid for pid, _ in hits]
+
+
+def test_ranks_title_matches_first():
+    """
+    Tests that matches are ranked by BM25, with title words boosted.
+    """
+    index = built_index()
+    assert ids(index.search("attention", 10)) == ["1706.03762", "1810.04805"]
+    assert ids(index.search("DEEP residual", 10)) == ["1512.03385", "1810.04805"]
+    assert index.search("graph", 10) == []
+
+
+def test_pages_by_position_and_skip():
+    """
+    Tests that pages continue after a (score, paper id) position without repeats.
+    """
+    index = built_index(
+        [paper(f"2101.0000{i}", "neural networks") for i in range(5)]
+    )
+    first = index.search("neural", 2)
+    second = index.search("neural", 2, after=(first[-1][1], first[-1][0]))
+    assert ids(first + second) == [f"2101.0000{i}" for i in range(4)]
+    assert ids(index.search("neural", 2, skip=3)) == ["2101.00003", "2101.00004"]
+
+
+def test_filters_and_stats():
+    """
+    Tests the structured filters and the hit count and facets of a search.
+    """
+    index = built_index()
+    assert ids(index.search("deep", 10, filters=SearchFilters(author="devlin"))) == [
+        "1810.04805"
+    ]
+    assert ids(
+        index.search("deep", 10, filters=SearchFilters(categories=("cs.CV",)))
+    ) == ["1512.03385"]
+    before_2018 = SearchFilters(month_to="201712")
+    assert ids(index.search("attention", 10, filters=before_2018)) == ["1706.03762"]
+    stats = index.stats("attention", SearchFilters(), max_hits=10, facet_size=5)
+    assert stats.total == 2
+    assert stats.categories == (("cs.CL", 2),)
+    assert arxiv_month("cs/9901001") == "199901"
+
+
+def test_incremental_updates():
+    """
+    Tests that added, rewritten, relinked and removed papers are searched correctly.
+    """
+    index = built_index()
+    index.add(paper("2005.14165", "Language Models are Few-Shot Learners", "GPT-3"))
+    assert ids(index.search("gpt", 10)) == ["2005.14165"]
+
+    index.add(paper("2005.14165", "Few-Shot Learners", "In-context learning"))
+    assert index.search("gpt", 10) == []
+    assert ids(index.search("context", 10)) == ["2005.14165"]
+
+    index.set_links(paper("2005.14165", "", authors=["Tom Brown"]))
+    index.rename_link(AUTHOR, "Tom Brown", "Tom B. Brown")
+    by_author = SearchFilters(author="b. brown")
+    assert ids(index.search("learners", 10, filters=by_author)) == ["2005.14165"]
+
+    index.remove("1706.03762")
+    assert ids(index.search("attention", 10)) == ["1810.04805"]
+    assert index.stats("attention", SearchFilters(), 10, 5).total == 1
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("deep -residual", ["1810.04805"]),
+        ("deep NOT residual", ["1810.04805"]),
+        ("+attention deep", ["1810.04805", "1706.03762"]),
+        ("attention AND transformer", ["1706.03762"]),
+        ("-deep", []),
+        ("deep -(residual OR bidirectional)", []),
+    ],
+)
+def test_required_and_prohibited_clauses(query, expected):
+    """
+    Tests that required clauses must match and prohibited ones must not.
+    """
+    index = built_index()
+    assert ids(index.search(normalize_search_query(query), 10)) == expected
+
+
+def test_phrase_needs_all_its_words():
+    """
+    Tests that a phrase matches only papers containing all of its words.
+    """
+    index = built_index()
+    assert ids(index.search(normalize_search_query('"Deep Residual"'), 10)) == [
+        "1512.03385"
+    ]
+    assert index.search(normalize_search_query('"residual attention"'), 10) == []
+    stats = index.stats('"deep residual"', SearchFilters(), 10, 5)
+    assert stats.total == 1
+
+
+def test_search_reads_a_view_writes_do_not_change():
+    """
+    Tests that writes made while a search reads its view leave the view as taken.
+    """
+    index = built_index()
+    query = parse_search_query("attention")
+    corpus, view = index._view(query)
+    index.remove("1706.03762")
+    index.add(paper("2005.14165", "Attention"))
+
+    slots, scores = index._hits(view, query, SearchFilters())
+    assert ids(index._top(view, slots, scores, 10)) == ["1706.03762", "1810.04805"]
+    assert ids(index.search("attention", 10)) == ["2005.14165", "1810.04805"]
+    # The search folded the new posting into the corpus
+    assert "attention" not in corpus.tails
@@ -0,0 +1,258 @@
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db.cache_manager import CacheManager, CacheType
+
+
+def test_put_and_get():
+    """
+    Tests that a value put in cache is returned by a get with the same key.
+    """
+    cache = CacheManager()
+    cache.put(CacheType.PAPER, "paper", dependencies=["paper:1"], paper_id="1")
+
+    assert cache.get(CacheType.PAPER, paper_id="1") == "paper"
+    assert cache.get(CacheType.PAPER, paper_id="2") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["cache_size"] == 1
+
+
+def test_invalidate_by_entity_across_shards():
+    """
+    Tests that invalidating an entity drops dependents living in any shard.
+    """
+    cache = CacheManager(num_shards=8)
+    for i in range(64):
+        cache.put(
+            CacheType.PAPER, i, dependencies=[f"paper:{i}", "author:x"], paper_id=i
+        )
+    cache.put(CacheType.AUTHOR, "other", dependencies=["author:y"], name="y")
+
+    cache.invalidate_by_entity("author:x")
+
+    assert all(cache.get(CacheType.PAPER, paper_id=i) is None for i in range(64))
+    assert cache.get(CacheType.AUTHOR, name="y") == "other"
+    assert cache.get_stats()["invalidations"] == 64
+    assert cache.get_stats()["dependency_count"] == 1
+
+
+def test_replaced_entry_keeps_new_dependencies():
+    """
+    Tests that replacing an entry does not drop the new entry's dependencies.
+    """
+    cache = CacheManager()
+    cache.put(CacheType.PAPER, "old", dependencies=["author:x"], paper_id="1")
+    cache.put(CacheType.PAPER, "new", dependencies=["author:x"], paper_id="1")
+
+    cache.invalidate_by_entity("author:x")
+    assert cache.get(CacheType.PAPER, paper_id="1") is None
+
+
+def test_invalidate_by_type():
+    """
+    Tests that invalidating a type only drops entries of that type.
+    """
+    cache = CacheManager(num_shards=4)
+    for i in range(20):
+        cache.put(CacheType.SEARCH, i, dependencies=["search:global"], q=i)
+    cache.put(CacheType.PAPER, "paper", dependencies=["paper:1"], paper_id="1")
+
+    cache.invalidate_by_type(CacheType.SEARCH)
+
+    assert cache.get_cache_info()["entries_by_type"] == {CacheType.PAPER.value: 1}
+    assert cache.get_stats()["dependency_count"] == 1
+
+
+def test_lru_eviction_per_shard():
+    """
+    Tests that a full shard evicts its least recently used entry.
+    """
+    cache = CacheManager(max_size=2, num_shards=1)
+    cache.put(CacheType.PAPER, "a", paper_id="a")
+    cache.put(CacheType.PAPER, "b", paper_id="b")
+    cache.get(CacheType.PAPER, paper_id="a")
+    cache.put(CacheType.PAPER, "c", paper_id="c")
+
+    assert cache.get(CacheType.PAPER, paper_id="a") == "a"
+    assert cache.get(CacheType.PAPER, paper_id="b") is None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_concurrent_put_and_invalidate():
+    """
+    Tests that entries put concurrently with invalidation never outlive it.
+    """
+    cache = CacheManager(num_shards=8)
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            cache.put(CacheType.PAPER, i, dependencies=["author:x"], paper_id=i % 50)
+            i += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(200):
+        cache.invalidate_by_entity("author:x")
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    cache.invalidate_by_entity("author:x")
+    assert cache.get_stats()["cache_size"] == 0
+    assert cache.get_stats()["dependency_count"] == 0
+
+
+def test_derived_entries_follow_their_source():
+    """
+    Tests that entries derived from another type are invalidated with it.
+    """
+    cache = CacheManager()
+    cache.put(CacheType.SEARCH, ["paper"], dependencies=["paper:1"], q="graph")
+    source = cache.peek(CacheType.SEARCH, q="graph")
+    assert source is not None and source.dependencies == {"paper:1"}
+
+    cache.put(
+        CacheType.RESPONSE,
+        b"{}",
+        dependencies=list(source.dependencies),
+        source_type=CacheType.SEARCH,
+        source=CacheType.SEARCH.name,
+        q="graph",
+    )
+    cache.invalidate_by_type(CacheType.SEARCH)
+    assert cache.get(CacheType.RESPONSE, source=CacheType.SEARCH.name, q="graph") is None
+
+    cache.put(CacheType.RESPONSE, b"{}", dependencies=["paper:1"], paper_id="1")
+    cache.invalidate_by_entity("paper:1")
+    assert cache.get(CacheType.RESPONSE, paper_id="1") is None
+
+
+def test_stats_by_type():
+    """
+    Tests that stats are broken down per cache type.
+    """
+    cache = CacheManager()
+    cache.put(CacheType.PAPER, "paper", dependencies=["paper:1"], paper_id="1")
+    cache.put(CacheType.SEARCH, ["paper"], dependencies=["paper:1"], q="graph")
+    cache.get(CacheType.PAPER, paper_id="1")
+    cache.get(CacheType.AUTHOR, name="x")
+    cache.invalidate_by_type(CacheType.SEARCH)
+
+    stats = cache.get_stats()
+    assert stats["by_type"]["PAPER"]["hits"] == 1
+    assert stats["by_type"]["PAPER"]["entries"] == 1
+    assert stats["by_type"]["PAPER"]["estimated_bytes"] > 0
+    assert stats["by_type"]["PAPER"]["age_seconds"]["10"] == 1
+    assert stats["by_type"]["AUTHOR"]["misses"] == 1
+    assert stats["by_type"]["SEARCH"]["invalidations"] == 1
+    assert stats["by_type"]["SEARCH"]["entries"] == 0
+    assert stats["lock"]["hold_seconds"] > 0
+
+
+def test_get_stale_after_expiry():
+    """
+    Tests that expired entries are kept for stale reads within `stale_ttl`.
+    """
+    cache = CacheManager(default_ttl=300, stale_ttl=60)
+    cache.put(CacheType.PAPER, "paper", dependencies=["paper:1"], ttl=-1, paper_id="1")
+
+    assert cache.get(CacheType.PAPER, paper_id="1") is None
+    assert cache.get_stale(CacheType.PAPER, paper_id="1") == "paper"
+    assert cache.get_stats()["stale_hits"] == 1
+
+    cache.invalidate_by_entity("paper:1")
+    assert cache.get_stale(CacheType.PAPER, paper_id="1") is None
+
+
+def test_put_derived_skips_replaced_source():
+    """
+    Tests that a value derived from an entry replaced by a write is not cached.
+    """
+    cache = CacheManager()
+    cache.put(CacheType.PAPER, "old", dependencies=["paper:1"], paper_id="1")
+    source = cache.peek(CacheType.PAPER, paper_id="1")
+
+    # A write invalidates the entry and writes the new paper through
+    cache.invalidate_by_entity("paper:1")
+    cache.put(CacheType.PAPER, "new", dependencies=["paper:1"], paper_id="1")
+
+    stored = cache.put_derived(source, CacheType.RESPONSE, "old body", paper_id="1")
+    assert stored is None
+    assert cache.get(CacheType.RESPONSE, paper_id="1") is None
+
+    current = cache.peek(CacheType.PAPER, paper_id="1")
+    cache.put_derived(current, CacheType.RESPONSE, "new body", paper_id="1")
+    assert cache.get(CacheType.RESPONSE, paper_id="1") == "new body"
+    cache.invalidate_by_entity("paper:1")
+    assert cache.get(CacheType.RESPONSE, paper_id="1") is None
+
+
+def test_lagging_read_does_not_replace_write_through():
+    """
+    Tests that a value read before or shortly after a write is not cached
+    over the entry the write put back, and that later reads are.
+    """
+    cache = CacheManager(replica_lag=60)
+    before_write = cache.begin_read()
+
+    # A write invalidates the paper and writes the new version through
+    cache.invalidate_by_entity("paper:1")
+    cache.put(CacheType.PAPER, "new", dependencies=["paper:1"], paper_id="1")
+
+    # Read while the write ran, or just after it from a replica without it
+    stored = cache.put(
+        CacheType.PAPER,
+        "old",
+        dependencies=["paper:1"],
+        read_started=before_write,
+        paper_id="1",
+    )
+    assert stored is None
+    stored = cache.put(
+        CacheType.PAPER,
+        "old",
+        dependencies=["paper:1"],
+        read_started=cache.begin_read(),
+        paper_id="1",
+    )
+    assert stored is None
+    assert cache.get(CacheType.PAPER, paper_id="1") == "new"
+
+    # Reads of entities not written recently are cached as usual
+    cache.put(
+        CacheType.PAPER,
+        "other",
+        dependencies=["paper:2"],
+        read_started=cache.begin_read(),
+        paper_id="2",
+    )
+    assert cache.get(CacheType.PAPER, paper_id="2") == "other"
+
+
+def test_read_started_before_type_invalidation_is_not_cached():
+    """
+    Tests that a value read before its cache type was invalidated is not cached.
+    """
+    cache = CacheManager()
+    read_started = cache.begin_read()
+    cache.invalidate_by_type(CacheType.SEARCH)
+
+    stored = cache.put(
+        CacheType.SEARCH,
+        "page",
+        dependencies=["search:global"],
+        read_started=read_started,
+        query_string="graph",
+    )
+    assert stored is None
+    assert cache.get(CacheType.SEARCH, query_string="graph") is None
+    assert cache.get_stats()["cache_size"] == 0
@@ -0,0 +1,91 @@
+import sys
+import os
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from neo4j.exceptions import ServiceUnavailable, ClientError, TransientError
+from akb.db.circuit_breaker import CircuitBreaker, Neo4jUnavailable
+
+
+def fail():
+    raise ServiceUnavailable("connection refused")
+
+
+def test_opens_after_consecutive_failures():
+    """
+    Tests that the circuit opens after the threshold and then fails fast.
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    calls = []
+
+    for _ in range(2):
+        with pytest.raises(Neo4jUnavailable):
+            breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(Neo4jUnavailable):
+        breaker.call(calls.append, 1)
+    assert calls == []
+    assert breaker.retry_after() > 0
+
+
+def test_probe_closes_circuit():
+    """
+    Tests that a successful probe after the reset timeout closes the circuit.
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    with pytest.raises(Neo4jUnavailable):
+        breaker.call(fail)
+    time.sleep(0.02)
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_other_errors_do_not_count():
+    """
+    Tests that errors returned by a reachable server do not open the circuit.
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    def bad_query():
+        raise ClientError("syntax error")
+
+    with pytest.raises(ClientError):
+        breaker.call(bad_query)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class CodedTransientError(TransientError):
+    """A TransientError with a given status code, as the server would send."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self._code = code
+
+    @property
+    def code(self):
+        return self._code
+
+
+def test_only_unavailability_transient_errors_count():
+    """
+    Tests that deadlocks do not open the circuit but an unavailable database does.
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    def deadlock():
+        raise CodedTransientError("Neo.TransientError.Transaction.DeadlockDetected")
+
+    with pytest.raises(TransientError):
+        breaker.call(deadlock)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    def database_unavailable():
+        raise CodedTransientError("Neo.TransientError.General.DatabaseUnavailable")
+
+    with pytest.raises(Neo4jUnavailable):
+        breaker.call(database_unavailable)
+    assert breaker.state == CircuitBreaker.OPEN
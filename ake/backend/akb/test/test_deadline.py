@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db import deadline
+from akb.db.deadline import (
+    DeadlineExceeded,
+    DeadlineSession,
+    deadline_exceeded,
+    start_deadline,
+)
+
+
+class StubSession:
+    """Runs transaction functions directly, recording their timeouts."""
+
+    def __init__(self):
+        self.timeouts = []
+
+    def execute_read(self, transaction_function, *args):
+        self.timeouts.append(getattr(transaction_function, "timeout", None))
+        return transaction_function(None, *args)
+
+
+def test_transactions_get_remaining_budget():
+    """
+    Tests that transaction functions run with the time left as their timeout.
+    """
+    stub = StubSession()
+    start_deadline(5)
+    assert DeadlineSession(stub).execute_read(lambda tx, x: x, 1) == 1
+    assert 4 < stub.timeouts[-1] <= 5
+
+    start_deadline(None)
+    DeadlineSession(stub).execute_read(lambda tx: None)
+    assert stub.timeouts[-1] is None
+
+
+def test_expired_deadline_raises():
+    """
+    Tests that a transaction is not started once the deadline has passed.
+    """
+    start_deadline(-1)
+    with pytest.raises(DeadlineExceeded):
+        DeadlineSession(StubSession()).execute_read(lambda tx: None)
+    assert deadline_exceeded()
+
+    start_deadline(5)
+    assert not deadline_exceeded()
+
+
+class BackoffSession(StubSession):
+    """Waits before its first attempt, as the driver does before a retry."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def execute_read(self, transaction_function, *args):
+        if not self.timeouts:
+            time.sleep(self.delay)
+        return super().execute_read(transaction_function, *args)
+
+
+def test_stale_attempt_restarts_with_time_left(monkeypatch):
+    """
+    Tests that an attempt begun with a timeout longer than the time left is
+    run again with the time left as its timeout.
+    """
+    monkeypatch.setattr(deadline, "_TIMEOUT_SLACK", 0.05)
+    stub = BackoffSession(delay=0.2)
+    start_deadline(5)
+    assert DeadlineSession(stub).execute_read(lambda tx, x: x, 1) == 1
+
+    first, second = stub.timeouts
+    assert first - second >= 0.2
+    assert second <= 4.8
@@ -132,6 +132,25 @@ def test_search_papers_by_title_and_abstract(graph_service):
     graph_service.clear_all_data()
 
 
+def test_search_papers_with_negation_and_phrase(graph_service):
+    """
+    Tests that prohibited terms exclude papers and phrases match as phrases.
+    """
+    graph_service.add_paper("search_paper_1", "Graph Neural Networks", "")
+    graph_service.add_paper("search_paper_2", "Graph Databases", "Neural storage.")
+    graph_service.add_paper("search_paper_3", "Neural Graph Embeddings", "")
+
+    results = graph_service.search_papers("graph NOT neural")
+    assert [paper.pid for paper in results] == []
+    results = graph_service.search_papers("graph -networks")
+    assert {paper.pid for paper in results} == {"search_paper_2", "search_paper_3"}
+
+    results = graph_service.search_papers('"graph neural"')
+    assert [paper.pid for paper in results] == ["search_paper_1"]
+
+    graph_service.clear_all_data()
+
+
 def test_update_paper_with_abstract(graph_service):
     """
     Tests updating a paper's title and abstract.
@@ -151,6 +170,34 @@ def test_update_paper_with_abstract(graph_service):
     graph_service.clear_all_data()
 
 
+def test_update_paper_writes_through_cache(graph_service):
+    """
+    Tests that updating a paper returns the new state and caches it.
+    """
+    paper_id = "update_paper_002"
+    author_name = "Write Through Author"
+    graph_service.add_paper(paper_id, "Old Title", "Old abstract.")
+    graph_service.add_author(author_name)
+    linked = graph_service.link_author_to_paper(author_name, paper_id)
+    assert linked is not None and author_name in linked.authors
+
+    updated = graph_service.update_paper(paper_id, new_title="New Title")
+    assert updated is not None and isinstance(updated, Paper)
+    assert updated.title == "New Title"
+    assert updated.abstract == "Old abstract."
+    assert author_name in updated.authors
+
+    hits_before = graph_service.cache_manager.get_stats()["hits"]
+    assert graph_service.find_paper_by_id(paper_id) is updated
+    assert graph_service.cache_manager.get_stats()["hits"] == hits_before + 1
+
+    unlinked = graph_service.unlink_author_from_paper(author_name, paper_id)
+    assert unlinked is not None and author_name not in unlinked.authors
+    assert graph_service.find_paper_by_id(paper_id) is unlinked
+
+    graph_service.clear_all_data()
+
+
 def test_update_category(graph_service):
     """
     Tests updating a category's name.
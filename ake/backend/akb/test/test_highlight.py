@@ -0,0 +1,70 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db import Paper, SearchPage
+from akb.services.highlight import QueryTerms, highlight, highlight_page, snippet
+
+
+def test_query_terms():
+    """
+    Tests that operators, field names and suffixes are left out of query terms.
+    """
+    terms = QueryTerms('title:"Graph Neural" AND transform* OR cnn^2 bert~0.8')
+    assert terms.words == {"graph", "neural", "cnn", "bert"}
+    assert terms.prefixes == ("transform",)
+    assert terms.matches("Transformers") and not terms.matches("and")
+
+
+def test_query_terms_leave_out_prohibited_clauses():
+    """
+    Tests that words of negated terms, phrases and groups are not highlighted.
+    """
+    terms = QueryTerms('graph NOT neural -"deep learning" !cnn* -(rnn OR lstm)')
+    assert terms.words == {"graph"}
+    assert terms.prefixes == ()
+    assert "<strong>" not in highlight("Neural and deep CNNs, not RNNs", terms)
+
+
+def test_highlight_escapes_and_marks_words():
+    """
+    Tests that matching words are wrapped in strong tags and other text escaped.
+    """
+    terms = QueryTerms("attention")
+    assert (
+        highlight("Attention <is> all; self-attention", terms)
+        == "<strong>Attention</strong> &lt;is&gt; all; "
+        "self-<strong>attention</strong>"
+    )
+
+
+def test_snippet_centres_on_distinct_matches():
+    """
+    Tests that the snippet is the window with the most distinct matching words.
+    """
+    filler = "lorem ipsum dolor sit amet " * 10
+    text = f"graph {filler}graph neural networks {filler}end"
+    result = snippet(text, QueryTerms("graph neural"), 80)
+    assert result.startswith("…") and result.endswith("…")
+    assert "<strong>graph</strong> <strong>neural</strong> networks" in result
+    assert len(result.replace("<strong>", "").replace("</strong>", "")) <= 82
+
+    assert snippet(text, QueryTerms("missing"), 40) == (
+        "graph lorem ipsum dolor sit amet lorem…"
+    )
+    assert snippet("Short abstract.", QueryTerms("short"), 40) == (
+        "<strong>Short</strong> abstract."
+    )
+
+
+def test_highlight_page():
+    """
+    Tests that a highlighted page keeps its papers and cursor.
+    """
+    paper = Paper.make_meta(pid="1706.03762", title="Attention", abstract="")
+    page = SearchPage(papers=(paper,), next_cursor="c")
+    page = highlight_page(page, "attention", 200)
+    assert page.papers == (paper,) and page.next_cursor == "c"
+    assert page.highlights[0].title == "<strong>Attention</strong>"
+    assert page.highlights[0].snippet == ""
@@ -0,0 +1,39 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.services.index_lag import IndexLagTracker
+
+
+def test_lagging_only_after_recent_write():
+    """
+    Tests that the index only counts as lagging shortly after a write.
+    """
+    tracker = IndexLagTracker(window=0.05)
+    assert not tracker.lagging()
+
+    tracker.record_write()
+    assert tracker.lagging()
+
+    time.sleep(0.06)
+    assert not tracker.lagging()
+
+
+def test_refresh_clears_lag():
+    """
+    Tests that only a refresh started after the last write ends the lag.
+    """
+    tracker = IndexLagTracker(window=60)
+    before_write = time.monotonic()
+    tracker.record_write()
+
+    tracker.record_refresh(before_write)
+    assert tracker.lagging()
+
+    tracker.record_refresh(time.monotonic())
+    assert not tracker.lagging()
+
+    tracker.record_write()
+    assert tracker.lagging()
@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db import query_log
+from akb.db.query_log import QueryLog, fingerprint, timed
+
+
+class FakeResult:
+    def __init__(self, records, delay=0.0):
+        self.records = records
+        self.delay = delay
+
+    def __iter__(self):
+        time.sleep(self.delay)
+        return iter(self.records)
+
+    def consume(self):
+        return SimpleNamespace(result_available_after=3, result_consumed_after=1)
+
+
+class FakeTx:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def run(self, query, parameters=None, **kwargs):
+        return FakeResult([{"n": 1}, {"n": 2}], self.delay)
+
+
+def list_rows(tx, limit):
+    return [record["n"] for record in tx.run("MATCH (n) RETURN n", limit=limit)]
+
+
+def test_records_rows_and_timing(monkeypatch):
+    """
+    Tests that a timed transaction function records rows and server timing.
+    """
+    log = QueryLog()
+    monkeypatch.setattr(query_log, "_QUERY_LOG", log)
+
+    assert timed(list_rows, write=False)(FakeTx(), 10) == [1, 2]
+
+    stats = log.get_stats()["list_rows"]
+    assert stats["calls"] == 1
+    assert stats["rows"] == 2
+    assert stats["server_ms"] == 4
+    assert stats["slow"] == 0
+    assert log.get_slow() == []
+
+
+def test_slow_queries_are_logged(monkeypatch):
+    """
+    Tests that queries over the threshold are kept with a parameter fingerprint.
+    """
+    log = QueryLog()
+    monkeypatch.setattr(query_log, "_QUERY_LOG", log)
+    monkeypatch.setattr(query_log, "SLOW_QUERY_THRESHOLD_MS", 10)
+    monkeypatch.setattr(query_log, "SLOW_QUERY_PLAN_SAMPLE_RATE", 0)
+
+    timed(list_rows, write=False)(FakeTx(delay=0.02), 10)
+
+    (entry,) = log.get_slow()
+    assert entry["name"] == "list_rows"
+    assert entry["rows"] == 2
+    assert entry["wall_ms"] >= 10
+    assert entry["parameters"] == fingerprint({"limit": 10})
+    assert fingerprint({"limit": 10}) != fingerprint({"limit": 11})
+
+
+def test_plan_operators():
+    """
+    Tests that plan operators are collected without their runtime suffix.
+    """
+    plan = {
+        "operatorType": "ProduceResults@neo4j",
+        "children": [
+            {
+                "operatorType": "CartesianProduct@neo4j",
+                "children": [{"operatorType": "NodeByLabelScan@neo4j"}],
+            }
+        ],
+    }
+    assert query_log._operators(plan) == {
+        "ProduceResults",
+        "CartesianProduct",
+        "NodeByLabelScan",
+    }
@@ -0,0 +1,56 @@
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.services.registry import ServiceRegistry
+
+
+class Service:
+    built = 0
+
+    def __init__(self):
+        Service.built += 1
+
+
+def test_get_builds_once():
+    """
+    Tests that concurrent gets of the same service build it only once.
+    """
+    Service.built = 0
+    registry = ServiceRegistry()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get(Service)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Service.built == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_register_and_clear():
+    """
+    Tests that a registered instance is returned until the registry is cleared.
+    """
+    registry = ServiceRegistry()
+    double = object()
+    registry.register(Service, double)
+    assert registry.get(Service) is double
+
+    registry.clear()
+    assert isinstance(registry.get(Service, factory=Service), Service)
+
+
+def test_factory_may_get_dependencies():
+    """
+    Tests that a factory can get the services it depends on from the registry.
+    """
+    registry = ServiceRegistry()
+    dependent = registry.get(tuple, factory=lambda: (registry.get(Service),))
+    assert dependent[0] is registry.get(Service)
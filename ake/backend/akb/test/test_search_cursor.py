@@ -0,0 +1,96 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db import SearchFilters
+from akb.services.graph_service import GraphService
+from akb.services.search_cursor import encode_search_cursor, decode_search_cursor
+
+
+def test_cursor_round_trip():
+    """
+    Tests that a cursor decodes to the exact score and element id it encodes.
+    """
+    score = 0.1 + 0.2
+    cursor = encode_search_cursor(score, "4:abc:12")
+    assert decode_search_cursor(cursor) == (score, "4:abc:12")
+    assert "=" not in cursor
+    assert decode_search_cursor(encode_search_cursor(score, 3)) == (score, 3)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not a cursor",
+        encode_search_cursor(1.0, "x")[:-2],
+        encode_search_cursor(1.0, True),
+    ],
+)
+def test_malformed_cursor(cursor):
+    """
+    Tests that malformed cursors raise ValueError.
+    """
+    with pytest.raises(ValueError):
+        decode_search_cursor(cursor)
+
+
+def test_search_params_push_limit_into_index():
+    """
+    Tests that only unfiltered searches without a cursor limit the index, and
+    that a cursor pages on from its score past the hits already shown.
+    """
+    params = GraphService._search_params("graph", 20, 40, None, SearchFilters())
+    assert params["index_options"] == {"limit": 61}
+    assert params["skip"] == 40 and params["after_score"] is None
+
+    filters = SearchFilters.make_meta(categories=["cs.CL"])
+    params = GraphService._search_params("graph", 20, 40, None, filters)
+    assert params["index_options"] == {}
+
+    cursor = encode_search_cursor(1.5, 2)
+    params = GraphService._search_params("graph", 20, 0, cursor, SearchFilters())
+    assert params["index_options"] == {}
+    assert params["skip"] == 2 and params["after_score"] == 1.5
+
+    local_cursor = encode_search_cursor(1.5, "1706.03762")
+    with pytest.raises(ValueError):
+        GraphService._search_params("graph", 20, 0, local_cursor, SearchFilters())
+
+
+def test_cursor_cannot_be_combined_with_skip():
+    """
+    Tests that both backends reject a skip given together with a cursor.
+    """
+    with pytest.raises(ValueError):
+        GraphService._search_params(
+            "graph", 20, 5, encode_search_cursor(1.5, 2), SearchFilters()
+        )
+    with pytest.raises(ValueError):
+        GraphService._local_search_hits(
+            None, "graph", 20, 5, encode_search_cursor(1.5, "a"), SearchFilters()
+        )
+
+
+def test_number_ties():
+    """
+    Tests that hits are numbered within their score, continuing a cursor's
+    count when the page starts at its score.
+    """
+    rows = [("a", 2.0), ("b", 1.0), ("c", 1.0), ("d", 0.5)]
+    params = {"after_score": 2.0, "skip": 3, "limit": 3}
+    tied_before = GraphService._tied_before(params, rows)
+    assert GraphService._number_ties(rows, tied_before) == [
+        ("a", 2.0, 4),
+        ("b", 1.0, 1),
+        ("c", 1.0, 2),
+        ("d", 0.5, 1),
+    ]
+
+    # A deep page that is one tie group needs the hits scoring above it
+    rows = [("a", 1.0), ("b", 1.0), ("c", 1.0)]
+    params = {"after_score": None, "skip": 10, "limit": 2}
+    assert GraphService._tied_before(params, rows) is None
+    assert GraphService._tied_before({**params, "skip": 0}, rows) == 0
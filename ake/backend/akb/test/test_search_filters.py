@@ -0,0 +1,51 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db import SearchFilters
+
+
+def test_make_meta_normalizes_filters():
+    """
+    Tests that filters are normalized into query parameters.
+    """
+    filters = SearchFilters.make_meta(
+        categories=["cs.LG", "", "cs.CL", "cs.LG"],
+        author="Vaswani",
+        date_from="2017-06",
+        date_to="2018-01",
+    )
+    assert filters.categories == ("cs.CL", "cs.LG")
+    assert filters.to_params() == {
+        "categories": ["cs.CL", "cs.LG"],
+        "author": "vaswani",
+        "id_prefix": None,
+        "month_from": "201706",
+        "month_to": "201801",
+    }
+    assert filters == SearchFilters.make_meta(
+        categories=["cs.CL", "cs.LG"],
+        author="Vaswani",
+        date_from="2017-06",
+        date_to="2018-01",
+    )
+
+
+def test_empty_filters():
+    """
+    Tests that no filters leave every query parameter null.
+    """
+    filters = SearchFilters.make_meta(categories=[""], author="", id_prefix="")
+    assert not filters
+    assert set(filters.to_params().values()) == {None}
+
+
+@pytest.mark.parametrize("month", ["2017", "2017-13", "17-01", "2017-1"])
+def test_invalid_month(month):
+    """
+    Tests that malformed months raise ValueError.
+    """
+    with pytest.raises(ValueError):
+        SearchFilters.make_meta(date_from=month)
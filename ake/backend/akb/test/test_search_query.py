@@ -0,0 +1,79 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.services.search_query import normalize_search_query, parse_search_query
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["Graph Neural", "graph  neural", "neural graph", "\tNEURAL graph "],
+)
+def test_order_case_and_whitespace(query):
+    """
+    Tests that queries differing only in case, spacing and term order coincide.
+    """
+    assert normalize_search_query(query) == "graph neural"
+
+
+def test_keeps_lucene_syntax():
+    """
+    Tests that valid syntax is kept, in canonical form, where order matters.
+    """
+    assert (
+        normalize_search_query('title:"Graph  Neural" && Transform*')
+        == 'title:"graph neural" AND transform*'
+    )
+    assert normalize_search_query("b OR a") == "b OR a"
+    assert normalize_search_query("c (B a) NOT d") == "(a b) -d c"
+    assert normalize_search_query("bert~0.8 cnn^2") == "bert~0.8 cnn^2"
+    assert normalize_search_query("self-attention c++") == "c++ self-attention"
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ('"unbalanced quote', r"\"unbalanced quote"),
+        ("graph AND", "and graph"),
+        ("(a b", r"\(a b"),
+        ("[2017 TO 2018]", r"2018\] \[2017 to"),
+        ("*former", r"\*former"),
+        ("title: *", r"title\:"),
+        ("() ** !", ""),
+    ],
+)
+def test_malformed_queries_become_escaped_words(query, expected):
+    """
+    Tests that malformed queries are searched as escaped words, never failing.
+    """
+    assert normalize_search_query(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query", ["Graph Neural", 'a AND "b c"', "(x", "title:(Y OR z)", "a\\"]
+)
+def test_idempotent(query):
+    """
+    Tests that normalising a canonical query leaves it unchanged.
+    """
+    canonical = normalize_search_query(query)
+    assert normalize_search_query(canonical) == canonical
+
+
+def test_parsed_clauses():
+    """
+    Tests how each parsed clause must occur, and which can match.
+    """
+    query = parse_search_query('graph NOT neural +"Deep  Learning" -(a b)')
+    assert [(occur, str(clause)) for occur, clause in query.occurs()] == [
+        ("+", '+"deep learning"'),
+        ("-", "-(a b)"),
+        ("-", "-neural"),
+        ("", "graph"),
+    ]
+    assert [clause.body for clause in query.terms()] == [("deep", "learning"), "graph"]
+
+    query = parse_search_query("a AND b OR c")
+    assert [occur for occur, _ in query.occurs()] == ["+", "+", ""]
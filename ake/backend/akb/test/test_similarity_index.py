@@ -0,0 +1,134 @@
+import sys
+import os
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+pytest.importorskip("numpy")
+
+from akb.db import Paper
+from akb.services.similarity_index import SimilarityIndex
+
+
+def paper(pid, title, abstract=""):
+    return Paper.make_meta(pid=pid, title=title, abstract=abstract)
+
+
+PAPERS = [
+    paper(
+        "1706.03762",
+        "Attention Is All You Need",
+        "The Transformer, a sequence transduction model based on attention.",
+    ),
+    paper(
+        "1810.04805",
+        "BERT: Pre-training of Deep Bidirectional Transformers",
+        "A language model pre-trained with self-attention Transformer layers.",
+    ),
+    paper(
+        "1512.03385",
+        "Deep Residual Learning for Image Recognition",
+        "Residual networks for image classification.",
+    ),
+    paper(
+        "1608.06993",
+        "Densely Connected Convolutional Networks",
+        "Convolutional networks for image recognition.",
+    ),
+]
+
+
+def built_index(directory, papers=PAPERS, **options):
+    index = SimilarityIndex(directory=str(directory), refresh_interval=0, **options)
+    index.start_build(lambda: papers)
+    deadline = time.monotonic() + 10
+    while not index.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.ready
+    return index
+
+
+def ids(hits):
+    return [pid for pid, _ in hits]
+
+
+def test_ranks_papers_by_shared_terms(tmp_path):
+    """
+    Tests that papers sharing more weighted terms rank first, without the paper itself.
+    """
+    index = built_index(tmp_path)
+    [attention, residual] = index.similar([PAPERS[0], PAPERS[2]], 3)
+    assert ids(attention)[0] == "1810.04805"
+    assert "1706.03762" not in ids(attention)
+    assert ids(residual)[0] == "1608.06993"
+    scores = [score for _, score in attention]
+    assert scores == sorted(scores, reverse=True) and scores[0] <= 1.0001
+
+
+def test_reuses_published_matrix(tmp_path):
+    """
+    Tests that a second index over the same directory loads the published matrix.
+    """
+    first = built_index(tmp_path)
+    second = built_index(tmp_path, papers=[])
+    assert second.get_stats()["papers"] == len(PAPERS)
+    assert second.similar([PAPERS[0]], 3) == first.similar([PAPERS[0]], 3)
+
+
+def test_build_waits_for_build_lock(tmp_path):
+    """
+    Tests that a build waits while another holds the lock, then reuses its matrix.
+    """
+    fcntl = pytest.importorskip("fcntl")
+    with open(tmp_path / "LOCK", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        waiting = SimilarityIndex(directory=str(tmp_path), refresh_interval=0)
+        waiting.start_build(lambda: [])
+        time.sleep(0.1)
+        assert not waiting.ready
+        SimilarityIndex(directory=str(tmp_path))._publish(PAPERS)
+        fcntl.flock(lock, fcntl.LOCK_UN)
+
+    deadline = time.monotonic() + 10
+    while not waiting.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert waiting.get_stats()["papers"] == len(PAPERS)
+    assert len([path for path in tmp_path.iterdir() if path.is_dir()]) == 1
+
+
+def test_ivf_probes_close_lists(tmp_path):
+    """
+    Tests that with an IVF coarse index, probing every list finds the exact answer.
+    """
+    exact = built_index(tmp_path / "exact")
+    ivf = built_index(tmp_path / "ivf", ivf_lists=2, ivf_probes=2)
+    for query in PAPERS:
+        assert ids(ivf.similar([query], 2)[0]) == ids(exact.similar([query], 2)[0])
+
+
+def test_incremental_updates(tmp_path):
+    """
+    Tests that added, rewritten and removed papers are reflected immediately.
+    """
+    index = built_index(tmp_path)
+    new = paper("2005.14165", "Attention Transformer language model pre-training")
+    index.add(new)
+    assert ids(index.similar([PAPERS[1]], 1)[0]) == ["2005.14165"]
+
+    index.add(paper("2005.14165", "Graph neural networks"))
+    assert ids(index.similar([PAPERS[1]], 1)[0]) == ["1706.03762"]
+
+    index.remove("1810.04805")
+    assert "1810.04805" not in ids(index.similar([PAPERS[0]], 4)[0])
+
+
+def test_writes_replace_the_row_mask(tmp_path):
+    """
+    Tests that removing a paper replaces the row mask a running scan may be reading.
+    """
+    index = built_index(tmp_path)
+    scanned = index._dead
+    index.remove("1810.04805")
+    assert not scanned.any() and index._dead.sum() == 1
+    assert "1810.04805" not in ids(index.similar([PAPERS[0]], 3)[0])
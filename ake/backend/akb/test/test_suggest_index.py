@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.services.suggest_index import SuggestIndex, AUTHOR, CATEGORY, PAPER
+
+
+def built_index(rows):
+    index = SuggestIndex()
+    index.start_build(lambda: rows)
+    deadline = time.monotonic() + 5
+    while not index.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.ready
+    return index
+
+
+def texts(suggestions):
+    return [suggestion["text"] for suggestion in suggestions]
+
+
+def test_prefix_matches_ranked_by_weight():
+    """
+    Tests that suggestions match by prefix, ignoring case, most frequent first.
+    """
+    index = built_index(
+        [
+            (AUTHOR, "Ashish Vaswani", "Ashish Vaswani", 3),
+            (AUTHOR, "Anna Smith", "Anna Smith", 7),
+            (CATEGORY, "cs.AI", "cs.AI", 5),
+            (PAPER, "1706.03762", "Attention Is All You Need", 0),
+        ]
+    )
+    assert texts(index.suggest("A")) == [
+        "Anna Smith",
+        "Ashish Vaswani",
+        "Attention Is All You Need",
+    ]
+    assert texts(index.suggest("vas")) == ["Ashish Vaswani"]
+    assert texts(index.suggest("a", kinds=[PAPER])) == ["Attention Is All You Need"]
+    assert texts(index.suggest("cs.", limit=1)) == ["cs.AI"]
+    assert index.suggest("   ") == []
+
+
+def test_incremental_updates():
+    """
+    Tests that write hooks add, rename, re-rank and remove suggestions.
+    """
+    index = built_index([(AUTHOR, "Alan Turing", "Alan Turing", 1)])
+
+    index.add(AUTHOR, "Alonzo Church", "Alonzo Church")
+    index.bump(AUTHOR, "Alonzo Church", 2)
+    assert texts(index.suggest("al")) == ["Alonzo Church", "Alan Turing"]
+
+    index.rename(AUTHOR, "Alan Turing", "A. M. Turing", "A. M. Turing")
+    assert texts(index.suggest("tur")) == ["A. M. Turing"]
+    assert index.suggest("tur")[0]["weight"] == 1
+
+    index.remove(AUTHOR, "Alonzo Church")
+    assert texts(index.suggest("al")) == []
+    assert index.get_stats()["items"] == 1
+
+
+def test_changes_during_build_are_kept():
+    """
+    Tests that writes made while the index builds are applied afterwards.
+    """
+    index = SuggestIndex()
+    started = []
+
+    def load():
+        started.append(True)
+        time.sleep(0.05)
+        return [(CATEGORY, "cs.CL", "cs.CL", 1)]
+
+    index.start_build(load)
+    while not started:
+        time.sleep(0.001)
+    index.add(CATEGORY, "cs.LG", "cs.LG")
+    assert index.suggest("cs") == []
+
+    deadline = time.monotonic() + 5
+    while not index.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert texts(index.suggest("cs")) == ["cs.CL", "cs.LG"]
@@ -0,0 +1,232 @@
+"""
+Admission control for expensive endpoints.
+
+Endpoints are put in a class with `@admission_class(...)`. Each class has its
+own concurrency budget per process and a bounded queue, so a burst of
+full-graph scans waits or is shed on its own budget instead of taking every
+worker thread and pool connection from cheap lookups. Endpoints without a
+class are not limited. Queued requests, from worker threads and the ASGI
+event loop alike, are handed released slots in arrival order.
+
+A request that finds its class's queue full gets a 429; one that waited in
+the queue longer than ADMISSION_QUEUE_TIMEOUT (or its deadline) gets a 503.
+Both carry Retry-After.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from flask import current_app, g, request
+from akb.config import (
+    ADMISSION_HEAVY_CONCURRENCY,
+    ADMISSION_HEAVY_QUEUE,
+    ADMISSION_BULK_CONCURRENCY,
+    ADMISSION_BULK_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+)
+from akb.db import remaining_time
+from core import create_response
+
+HEAVY = "heavy"  # Full scans and multi-query reads
+BULK = "bulk"  # Bulk writes and schema changes
+
+
+class Shed(Exception):
+    """A request was not admitted."""
+
+    def __init__(self, status: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A queued request; `granted` once a released slot is handed to it."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionLimiter:
+    """At most `max_concurrent` requests in flight, `max_queue` more waiting."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.shed = 0
+        # Moving average of how long an admitted request holds its slot
+        self.avg_hold_seconds = 1.0
+        # Thread and event loop waiters in arrival order; a released slot goes
+        # to the first of them, so neither kind can starve the other
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained."""
+        rounds = (self.waiting + self.active) / self.max_concurrent
+        return max(1, math.ceil(rounds * self.avg_hold_seconds))
+
+    def _enter_or_queue(self, waiter: _Waiter) -> bool:
+        """Take a free slot, or queue `waiter`; sheds if the queue is full."""
+        # Caller holds self._lock
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise Shed(429, f"Too many {self.name} requests", self.retry_after())
+        self._waiters.append(waiter)
+        return False
+
+    def _leave_queue(self, waiter: _Waiter) -> bool:
+        """Whether `waiter` was granted a slot; if not, it leaves the queue."""
+        # Caller holds self._lock
+        if waiter.granted:
+            return True
+        self._waiters.remove(waiter)
+        return False
+
+    def _timed_out(self):
+        # Caller holds self._lock
+        self.shed += 1
+        raise Shed(503, f"Timed out waiting for a {self.name} slot", self.retry_after())
+
+    def _hand_on(self):
+        """Give a released slot to the first waiter, or free it."""
+        # Caller holds self._lock
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            waiter.wake()
+        else:
+            self.active -= 1
+
+    def acquire(self, timeout: float) -> float:
+        """Take a slot, waiting up to `timeout` seconds; returns the start time."""
+        waiter = _Waiter()
+        with self._lock:
+            if self._enter_or_queue(waiter):
+                return time.monotonic()
+        waiter.event.wait(timeout)
+        with self._lock:
+            if not self._leave_queue(waiter):
+                self._timed_out()
+        return time.monotonic()
+
+    async def acquire_async(self, timeout: float) -> float:
+        """Like `acquire`, without blocking the event loop while queued."""
+        waiter = _Waiter(asyncio.get_running_loop())
+        with self._lock:
+            if self._enter_or_queue(waiter):
+                return time.monotonic()
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                if self._leave_queue(waiter):
+                    self._hand_on()
+            raise
+        with self._lock:
+            if not self._leave_queue(waiter):
+                self._timed_out()
+        return time.monotonic()
+
+    def release(self, started_at: float):
+        with self._lock:
+            held = time.monotonic() - started_at
+            self.avg_hold_seconds += 0.2 * (held - self.avg_hold_seconds)
+            self._hand_on()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "shed": self.shed,
+                "avg_hold_seconds": self.avg_hold_seconds,
+            }
+
+
+LIMITERS = {
+    HEAVY: AdmissionLimiter(HEAVY, ADMISSION_HEAVY_CONCURRENCY, ADMISSION_HEAVY_QUEUE),
+    BULK: AdmissionLimiter(BULK, ADMISSION_BULK_CONCURRENCY, ADMISSION_BULK_QUEUE),
+}
+
+
+def admission_class(name: str):
+    """Put an endpoint in an admission class."""
+
+    def decorator(f):
+        f.admission_class = name
+        return f
+
+    return decorator
+
+
+def limiter_for(view) -> Optional[AdmissionLimiter]:
+    name = getattr(view, "admission_class", None)
+    return LIMITERS[name] if name is not None else None
+
+
+def queue_timeout() -> float:
+    """How long a request may wait for a slot: the queue timeout or its deadline."""
+    left = remaining_time()
+    if left is None:
+        return ADMISSION_QUEUE_TIMEOUT
+    return max(0.0, min(ADMISSION_QUEUE_TIMEOUT, left))
+
+
+def shed_response(shed: Shed):
+    body = create_response(
+        False, error=str(shed), message="Server is busy, please try again later"
+    )
+    body.status_code = shed.status
+    body.headers["Retry-After"] = str(shed.retry_after)
+    return body
+
+
+def admit_request():
+    """Wait for a slot in the endpoint's admission class, or shed the request."""
+    limiter = limiter_for(current_app.view_functions.get(request.endpoint))
+    if limiter is None:
+        return None
+    try:
+        g.admission = (limiter, limiter.acquire(queue_timeout()))
+    except Shed as shed:
+        return shed_response(shed)
+    return None
+
+
+def release_admission(error=None):
+    admission = g.pop("admission", None)
+    if admission is not None:
+        limiter, started_at = admission
+        limiter.release(started_at)
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify, session
-from akb.services.user_service import UserService
+from akb.services import get_user_service
 from core import create_response
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
@@ -14,7 +14,7 @@ def register():
     if not username or not password:
         return create_response(False, message="Missing username or password"), 400
 
-    user_service = UserService()
+    user_service = get_user_service()
     if user_service.find_user(username):
         return create_response(False, message="User already exists"), 409
 
@@ -34,7 +34,7 @@ def login():
     if not username or not password:
         return create_response(False, message="Missing username or password"), 400
 
-    user_service = UserService()
+    user_service = get_user_service()
     if user_service.verify_user(username, password):
         session["username"] = username
         return create_response(message="Login successful")
@@ -1,6 +1,11 @@
+from typing import Any, Dict
 from flask import Blueprint, request
 from marshmallow import Schema, fields, ValidationError
 from core import create_response, graph_service
+from akb.db import CacheType
+from .response_cache import cached_response, get_cached_response
+from .utils import request_timeout
+from .admission import admission_class, HEAVY
 
 
 class AuthorSchema(Schema):
@@ -18,6 +23,14 @@ author_schema = AuthorSchema()
 author_update_schema = AuthorUpdateSchema()
 
 
+def author_data(author) -> Dict[str, Any]:
+    """An author and the ids and titles of their papers."""
+    return {
+        "name": author.name,
+        "papers": [{"id": paper[0], "title": paper[1]} for paper in author.papers],
+    }
+
+
 @authors_bp.route("", methods=["POST"])
 def add_author():
     try:
@@ -51,19 +64,21 @@ def add_author():
 @authors_bp.route("/<string:name>", methods=["GET"])
 def get_author(name: str):
     try:
+        response = get_cached_response(CacheType.AUTHOR, name=name)
+        if response is not None:
+            return response
+
         author = graph_service.find_author_info(name)
         if not author:
             return create_response(False, error=f"Author '{name}' not found"), 404
 
-        author_data = {
-            "name": author.name,
-            "papers": [{"id": paper[0], "title": paper[1]} for paper in author.papers],
-        }
-
-        return create_response(
+        return cached_response(
+            CacheType.AUTHOR,
             True,
-            data=author_data,
+            data=author_data(author),
             message=f"Author '{name}' information retrieved successfully",
+            rendered_from=author,
+            name=name,
         )
 
     except Exception as e:
@@ -71,6 +86,8 @@ def get_author(name: str):
 
 
 @authors_bp.route("", methods=["GET"])
+@admission_class(HEAVY)
+@request_timeout(30)
 def list_authors():
     try:
         authors = graph_service.get_all_authors()
@@ -108,9 +125,10 @@ def update_author(old_name: str):
                     409,
                 )
 
-        graph_service.update_author(old_name, new_name)
+        updated_author = graph_service.update_author(old_name, new_name)
+        if not updated_author:
+            return create_response(False, error=f"Author '{old_name}' not found"), 404
 
-        updated_author = graph_service.find_author_info(new_name)
         author_data = {
             "name": updated_author.name,
             "papers": [
@@ -0,0 +1,145 @@
+from flask import Blueprint, Response, request
+from marshmallow import Schema, fields, validate, ValidationError
+from akb.db import CacheType, get_cache_manager
+from core import create_response
+from .utils import admin_required
+
+cache_bp = Blueprint("cache", __name__, url_prefix="/api/kg/cache")
+
+
+class CacheInvalidateSchema(Schema):
+    type = fields.Str(validate=validate.OneOf([t.name for t in CacheType]))
+    entity = fields.Str(validate=validate.Length(min=1))
+    all = fields.Bool()
+
+
+cache_invalidate_schema = CacheInvalidateSchema()
+
+
+@cache_bp.route("/stats", methods=["GET"])
+@admin_required
+def get_cache_stats():
+    """Cache statistics, overall and per cache type"""
+    try:
+        return create_response(
+            True,
+            data=get_cache_manager().get_stats(),
+            message="Get cache stats successfully",
+        )
+
+    except Exception as e:
+        return create_response(False, error=str(e)), 500
+
+
+@cache_bp.route("/metrics", methods=["GET"])
+@admin_required
+def get_cache_metrics():
+    """Cache statistics in Prometheus text exposition format"""
+    stats = get_cache_manager().get_stats()
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples):
+        lines.append(f"# HELP akb_cache_{name} {help_text}")
+        lines.append(f"# TYPE akb_cache_{name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            if label_str:
+                label_str = f"{{{label_str}}}"
+            lines.append(f"akb_cache_{name}{label_str} {value}")
+
+    by_type = stats["by_type"].items()
+    metric(
+        "requests_total",
+        "counter",
+        "Cache lookups by type and result.",
+        [
+            ({"type": name, "result": result}, type_stats[counter])
+            for name, type_stats in by_type
+            for result, counter in (
+                ("hit", "hits"),
+                ("miss", "misses"),
+                ("stale", "stale_hits"),
+            )
+        ],
+    )
+    for counter in ("evictions", "invalidations"):
+        metric(
+            f"{counter}_total",
+            "counter",
+            f"Cache {counter} by type.",
+            [({"type": name}, type_stats[counter]) for name, type_stats in by_type],
+        )
+    metric(
+        "entries",
+        "gauge",
+        "Live cache entries by type.",
+        [({"type": name}, type_stats["entries"]) for name, type_stats in by_type],
+    )
+    metric(
+        "estimated_bytes",
+        "gauge",
+        "Estimated bytes held by cache entries by type.",
+        [
+            ({"type": name}, type_stats["estimated_bytes"])
+            for name, type_stats in by_type
+        ],
+    )
+    metric(
+        "entry_age_seconds_bucket",
+        "gauge",
+        "Live cache entries by type with age at most `le` seconds.",
+        [
+            ({"type": name, "le": le}, count)
+            for name, type_stats in by_type
+            for le, count in type_stats["age_seconds"].items()
+        ],
+    )
+    for counter in ("wait_seconds", "hold_seconds"):
+        metric(
+            f"lock_{counter}_total",
+            "counter",
+            f"Total time spent {counter.split('_')[0]}ing on cache locks.",
+            [({}, stats["lock"][counter])],
+        )
+
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+@cache_bp.route("/invalidate", methods=["POST"])
+@admin_required
+def invalidate_cache():
+    """Invalidate cache entries by type, by entity id, or all of them"""
+    try:
+        json_data = request.get_json()
+        if not json_data:
+            return create_response(False, error="Empty Request Data"), 400
+
+        result = cache_invalidate_schema.load(json_data)
+        targets = [name for name in ("type", "entity", "all") if name in result]
+        if len(targets) != 1:
+            return (
+                create_response(
+                    False, error="Exactly one of type, entity or all must be provided"
+                ),
+                400,
+            )
+
+        cache_manager = get_cache_manager()
+        if "type" in result:
+            cache_manager.invalidate_by_type(CacheType[result["type"]])
+            target = f"type {result['type']}"
+        elif "entity" in result:
+            cache_manager.invalidate_by_entity(result["entity"])
+            target = f"entity '{result['entity']}'"
+        elif result["all"]:
+            cache_manager.clear()
+            target = "all entries"
+        else:
+            return create_response(False, error="Nothing to invalidate"), 400
+
+        return create_response(True, message=f"Cache invalidated for {target}")
+
+    except ValidationError as err:
+        return create_response(False, error=str(err.messages)), 400
+    except Exception as e:
+        return create_response(False, error=str(e)), 500
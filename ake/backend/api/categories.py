@@ -1,6 +1,9 @@
+from typing import Any, Dict
 from flask import Blueprint, request
 from marshmallow import Schema, fields, ValidationError
 from core import create_response, graph_service
+from .utils import request_timeout
+from .admission import admission_class, HEAVY
 
 
 class CategorySchema(Schema):
@@ -20,6 +23,14 @@ category_schema = CategorySchema()
 category_update_schema = CategoryUpdateSchema()
 
 
+def category_data(category) -> Dict[str, Any]:
+    """A category and the ids and titles of its papers."""
+    return {
+        "name": category.name,
+        "papers": [{"id": paper[0], "title": paper[1]} for paper in category.papers],
+    }
+
+
 @categories_bp.route("", methods=["POST"])
 def add_category():
     try:
@@ -60,16 +71,9 @@ def get_category(name: str):
         if not category:
             return create_response(False, error=f"Category '{name}' not found"), 404
 
-        category_data = {
-            "name": category.name,
-            "papers": [
-                {"id": paper[0], "title": paper[1]} for paper in category.papers
-            ],
-        }
-
         return create_response(
             True,
-            data=category_data,
+            data=category_data(category),
             message=f"Category '{name}' info retrieved successfully",
         )
 
@@ -101,9 +105,10 @@ def update_category(old_name: str):
                     409,
                 )
 
-        graph_service.update_category(old_name, new_name)
+        updated_category = graph_service.update_category(old_name, new_name)
+        if not updated_category:
+            return create_response(False, error=f"Category '{old_name}' not found"), 404
 
-        updated_category = graph_service.find_category(new_name)
         category_data = {
             "name": updated_category.name,
             "papers": [
@@ -138,21 +143,16 @@ def delete_category(name: str):
 
 
 @categories_bp.route("", methods=["GET"])
+@admission_class(HEAVY)
+@request_timeout(30)
 def list_categories():
     """获取所有分类列表"""
     try:
         categories = graph_service.get_all_categories()
-        all_categories = [
-            {
-                "name": category.name,
-                "papers": [
-                    {"id": paper[0], "title": paper[1]} for paper in category.papers
-                ],
-            }
-            for category in categories
-        ]
         return create_response(
-            True, data=all_categories, message="Get categories list successfully"
+            True,
+            data=[category_data(category) for category in categories],
+            message="Get categories list successfully",
         )
 
     except Exception as e:
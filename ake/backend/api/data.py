@@ -1,6 +1,8 @@
 from flask import Blueprint, request
 from marshmallow import Schema, fields, ValidationError, INCLUDE
 from core import create_response, graph_service
+from .utils import request_timeout
+from .admission import admission_class, HEAVY, BULK
 
 data_bp = Blueprint("data", __name__, url_prefix="/api/kg/data")
 
@@ -21,12 +23,16 @@ class JsonDataSchema(Schema):
 
 
 @data_bp.route("/info", methods=["GET"])
+@admission_class(HEAVY)
+@request_timeout(30)
 def get_overview_info():
     info = graph_service.get_overview_info()
     return create_response(data=info)
 
 
 @data_bp.route("/load", methods=["POST"])
+@admission_class(BULK)
+@request_timeout(300)
 def load_data():
     json_data = request.get_json()
     try:
@@ -37,6 +43,8 @@ def load_data():
 
 
 @data_bp.route("/clear", methods=["DELETE"])
+@admission_class(BULK)
+@request_timeout(120)
 def clear_all_data():
     graph_service.clear_all_data()
     return create_response(message="All data cleared successfully")
@@ -52,12 +60,16 @@ def check_index():
 
 
 @data_bp.route("/create_index", methods=["POST"])
+@admission_class(BULK)
+@request_timeout(60)
 def create_index():
     graph_service.create_fulltext_index()
     return create_response(True, message="Full-text index created successfully")
 
 
 @data_bp.route("/drop_index", methods=["POST"])
+@admission_class(BULK)
+@request_timeout(60)
 def drop_index():
     graph_service.drop_fulltext_index()
     return create_response(True, message="Full-text index dropped successfully")
@@ -1,6 +1,13 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
 from flask import Blueprint, request
 from core import create_response, graph_service
+from akb.db import CacheType, SearchFilters, SearchPage, SearchStats
+from akb.services.search_query import normalize_search_query
 from marshmallow import Schema, fields, ValidationError
+from .response_cache import cached_response, get_cached_response
+from .utils import request_timeout
+from .admission import admission_class, HEAVY
 
 
 class PaperSchema(Schema):
@@ -23,6 +30,122 @@ paper_schema = PaperSchema()
 paper_update_schema = PaperUpdateSchema()
 
 
+def paper_data(paper) -> Dict[str, Any]:
+    """The fields every paper endpoint returns for a paper."""
+    return {
+        "id": paper.pid,
+        "title": paper.title,
+        "abstract": paper.abstract,
+        "authors": paper.authors,
+        "categories": paper.categories,
+    }
+
+
+@dataclass(frozen=True)
+class SearchRequest:
+    """The arguments of a search request; see `parse_search_args`."""
+
+    page: int
+    facets: bool
+    # Arguments of search_papers_page, which are also its cache key
+    key: Dict[str, Any]
+
+    @property
+    def variant(self) -> str:
+        """The response cache variant: responses with facets are cached apart."""
+        return "facets" if self.facets else ""
+
+
+def _int_arg(args, name: str, default: int) -> int:
+    value = args.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def parse_search_args(args) -> SearchRequest:
+    """
+    Read a search request from its query arguments (a MultiDict, as in
+    `request.args`); raises ValueError with the message to answer 400 with.
+    """
+    # 规范化后的查询, 也是缓存键; 语法有误时按普通单词搜索
+    query = normalize_search_query(args.get("q", ""))
+    if not query:
+        raise ValueError("Search query cannot be empty")
+
+    # 获取分页参数，设置默认值
+    page = _int_arg(args, "page", 1)
+    page_size = _int_arg(args, "page_size", 20)
+    # 上一页返回的 next_cursor; 指定后从该位置继续, 忽略 page
+    cursor = args.get("cursor") or None
+    # 是否同时返回命中总数和按分类/作者的分面统计
+    facets = args.get("facets", "").lower() in ("1", "true")
+    # 是否以高亮的标题和摘要片段代替完整摘要
+    snippets = args.get("snippets", "").lower() in ("1", "true")
+    # 结构化过滤条件, 在查询内部先于排序和分页生效
+    filters = SearchFilters.make_meta(
+        categories=[
+            name.strip()
+            for value in args.getlist("category")
+            for name in value.split(",")
+        ],
+        author=args.get("author", "").strip(),
+        id_prefix=args.get("id_prefix", "").strip(),
+        date_from=args.get("from"),
+        date_to=args.get("to"),
+    )
+
+    # 验证分页参数
+    if page < 1:
+        raise ValueError("Page must be at least 1")
+    if page_size < 1 or page_size > 100:
+        raise ValueError("Page size must be between 1 and 100")
+    skip = 0 if cursor is not None else (page - 1) * page_size
+
+    key = dict(
+        query_string=query,
+        limit=page_size,
+        skip=skip,
+        cursor=cursor,
+        filters=filters,
+        snippets=snippets,
+    )
+    return SearchRequest(page=page, facets=facets, key=key)
+
+
+def search_data(
+    search: SearchRequest, result: SearchPage, stats: Optional[SearchStats]
+) -> Dict[str, Any]:
+    """The response data of a search page, with its facets if `stats` is given."""
+    papers_data = [paper_data(paper) for paper in result.papers]
+    for data, highlight in zip(papers_data, result.highlights):
+        del data["abstract"]
+        data["highlight"] = {
+            "title": highlight.title,
+            "snippet": highlight.snippet,
+        }
+
+    data = {
+        "papers": papers_data,
+        "pagination": {
+            "page": search.page,
+            "page_size": search.key["limit"],
+            "total": len(papers_data),
+            "has_more": result.next_cursor is not None,
+            "next_cursor": result.next_cursor,
+        },
+    }
+    if stats is not None:
+        stats_data = stats.to_dict()
+        data["pagination"]["total"] = stats_data["total"]
+        data["pagination"]["total_exact"] = stats_data["total_exact"]
+        data["facets"] = stats_data["facets"]
+    return data
+
+
 @papers_bp.route("", methods=["POST"])
 def add_paper():
     try:
@@ -66,24 +189,59 @@ def add_paper():
 @papers_bp.route("/<string:id>", methods=["GET"])
 def get_paper(id: str):
     try:
+        response = get_cached_response(CacheType.PAPER, paper_id=id)
+        if response is not None:
+            return response
+
         paper = graph_service.find_paper_by_id(id)
         if not paper:
             return create_response(False, error=f"paper '{id}' not found"), 404
 
-        paper_data = {
-            "id": paper.pid,
-            "title": paper.title,
-            "abstract": paper.abstract,
-            "authors": paper.authors,
-            "categories": paper.categories,
-        }
+        return cached_response(
+            CacheType.PAPER,
+            True,
+            data=paper_data(paper),
+            message=f"Paper '{id}' info retrieved successfully",
+            rendered_from=paper,
+            paper_id=id,
+        )
+
+    except Exception as e:
+        return create_response(False, error=str(e)), 500
+
+
+@papers_bp.route("/<string:id>/similar", methods=["GET"])
+def similar_papers(id: str):
+    """按标题和摘要内容返回最相似的论文"""
+    try:
+        k = request.args.get("k", 10, type=int)
+        if k < 1 or k > 100:
+            return create_response(False, error="k must be between 1 and 100"), 400
+
+        similar = graph_service.find_similar_papers(id, k)
+        if similar is None:
+            return create_response(False, error=f"paper '{id}' not found"), 404
 
+        papers_data = [
+            {**paper_data(paper), "similarity": round(score, 4)}
+            for paper, score in similar
+        ]
         return create_response(
             True,
-            data=paper_data,
-            message=f"Paper '{id}' info retrieved successfully",
+            data={
+                "ready": graph_service.similarity_index.ready,
+                "papers": papers_data,
+            },
+            message=f"Found {len(papers_data)} similar papers",
         )
 
+    except ImportError:
+        return (
+            create_response(
+                False, error="Similar papers require numpy to be installed"
+            ),
+            501,
+        )
     except Exception as e:
         return create_response(False, error=str(e)), 500
 
@@ -111,19 +269,16 @@ def update_paper(id: str):
 
         maybe_new_title = result.get("title")
         maybe_new_abstract = result.get("abstract")
-        graph_service.update_paper(id, maybe_new_title, maybe_new_abstract)
-
-        updated_paper = graph_service.find_paper_by_id(id)
-        paper_data = {
-            "id": updated_paper.pid,
-            "title": updated_paper.title,
-            "abstract": updated_paper.abstract,
-            "authors": updated_paper.authors,
-            "categories": updated_paper.categories,
-        }
+        updated_paper = graph_service.update_paper(
+            id, maybe_new_title, maybe_new_abstract
+        )
+        if not updated_paper:
+            return create_response(False, error=f"paper '{id}' not found"), 404
 
         return create_response(
-            True, data=paper_data, message=f"Paper '{id}' updated successfully"
+            True,
+            data=paper_data(updated_paper),
+            message=f"Paper '{id}' updated successfully",
         )
 
     except ValidationError as err:
@@ -151,74 +306,58 @@ def delete_paper(id):
 def search_papers():
     """搜索论文（支持分页）"""
     try:
-        query = request.args.get("q", "").strip()
-        if not query:
-            return create_response(False, error="Search query cannot be empty"), 400
-
-        # 获取分页参数，设置默认值
-        page = request.args.get("page", 1, type=int)
-        page_size = request.args.get("page_size", 20, type=int)
-        
-        # 验证分页参数
-        if page < 1:
-            return create_response(False, error="Page must be at least 1"), 400
-        if page_size < 1 or page_size > 100:
-            return create_response(False, error="Page size must be between 1 and 100"), 400
-        skip = (page - 1) * page_size
-        
-        # 调用支持分页的搜索方法，传递正确的参数
-        papers = graph_service.search_papers(
-            query_string=query,
-            limit=page_size,
-            skip=skip
+        search = parse_search_args(request.args)
+        response = get_cached_response(
+            CacheType.SEARCH, variant=search.variant, **search.key
         )
+        if response is not None:
+            return response
 
-        papers_data = [
-            {
-                "id": paper.pid,
-                "title": paper.title,
-                "abstract": paper.abstract,
-                "authors": paper.authors,
-                "categories": paper.categories,
-            }
-            for paper in papers
-        ]
+        # 调用支持分页的搜索方法，传递正确的参数
+        result = graph_service.search_papers_page(**search.key)
+        stats = (
+            graph_service.search_stats(
+                search.key["query_string"], search.key["filters"]
+            )
+            if search.facets
+            else None
+        )
+        data = search_data(search, result, stats)
 
-        return create_response(
-            True, 
-            data={
-                "papers": papers_data,
-                "pagination": {
-                    "page": page,
-                    "page_size": page_size,
-                    "total": len(papers_data),
-                    "has_more": len(papers_data) == page_size
-                }
-            }, 
-            message=f"Found {len(papers_data)} related papers"
+        return cached_response(
+            CacheType.SEARCH,
+            True,
+            data=data,
+            message=f"Found {len(data['papers'])} related papers",
+            variant=search.variant,
+            rendered_from=result,
+            **search.key,
         )
 
+    except ValueError as e:
+        return create_response(False, error=str(e)), 400
     except Exception as e:
         return create_response(False, error=str(e)), 500
 
 
 @papers_bp.route("", methods=["GET"])
+@admission_class(HEAVY)
+@request_timeout(30)
 def list_papers():
     """获取所有论文列表"""
     try:
+        response = get_cached_response(CacheType.PAPER, listing="all")
+        if response is not None:
+            return response
+
         papers = graph_service.get_all_papers()
-        all_papers = [
-            {
-                "id": paper.pid,
-                "title": paper.title,
-                "abstract": paper.abstract,
-                "authors": paper.authors,
-                "categories": paper.categories,
-            }
-            for paper in papers
-        ]
-        return create_response(
-            True, data=all_papers, message="Get papers list successfully"
+        return cached_response(
+            CacheType.PAPER,
+            True,
+            data=[paper_data(paper) for paper in papers],
+            message="Get papers list successfully",
+            rendered_from=papers,
+            listing="all",
         )
 
     except Exception as e:
@@ -0,0 +1,36 @@
+from flask import Blueprint
+from akb.db import get_query_log
+from core import create_response
+from .utils import admin_required
+
+queries_bp = Blueprint("queries", __name__, url_prefix="/api/kg/queries")
+
+
+@queries_bp.route("/stats", methods=["GET"])
+@admin_required
+def get_query_stats():
+    """Calls, rows and timings per query name"""
+    try:
+        return create_response(
+            True,
+            data=get_query_log().get_stats(),
+            message="Get query stats successfully",
+        )
+
+    except Exception as e:
+        return create_response(False, error=str(e)), 500
+
+
+@queries_bp.route("/slow", methods=["GET"])
+@admin_required
+def get_slow_queries():
+    """Most recent slow queries, with their plans where captured"""
+    try:
+        return create_response(
+            True,
+            data=get_query_log().get_slow(),
+            message="Get slow queries successfully",
+        )
+
+    except Exception as e:
+        return create_response(False, error=str(e)), 500
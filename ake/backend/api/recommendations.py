@@ -1,18 +1,20 @@
 from flask import Blueprint, request, session
-from akb.services.recommendation_service import RecommendationService
+from akb.services import get_recommendation_service
 from core import create_response
 from .utils import login_required
+from .admission import admission_class, HEAVY
 
 recommendations_bp = Blueprint("recommendations", __name__, url_prefix="/api")
 
 
 @recommendations_bp.route("/recommendations", methods=["GET"])
+@admission_class(HEAVY)
 def get_recommendations():
     username = request.args.get("username")
     if not username:
         return create_response(False, message="Missing username parameter"), 400
     
-    recommendation_service = RecommendationService()
+    recommendation_service = get_recommendation_service()
     papers = recommendation_service.get_recommendations(username)
     return create_response(data=[paper.to_dict() for paper in papers])
 
@@ -27,15 +29,16 @@ def feedback():
     if not username or not paper_id or liked is None:
         return create_response(False, message="Missing username, paper_id or liked status"), 400
 
-    recommendation_service = RecommendationService()
+    recommendation_service = get_recommendation_service()
     recommendation_service.record_feedback(username, paper_id, liked)
     return create_response(message="Feedback recorded")
 
 
 @recommendations_bp.route("/liked", methods=["GET"])
+@admission_class(HEAVY)
 @login_required
 def get_liked_papers():
     username = session["username"]
-    recommendation_service = RecommendationService()
+    recommendation_service = get_recommendation_service()
     papers = recommendation_service.get_liked_papers(username)
     return create_response(data=[paper.to_dict() for paper in papers])
@@ -0,0 +1,123 @@
+import gzip
+from dataclasses import dataclass
+from typing import Any, Optional
+from flask import current_app, request
+from akb.config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_GZIP,
+    RESPONSE_CACHE_GZIP_MIN_BYTES,
+)
+from akb.db import CacheType, get_cache_manager
+
+
+@dataclass
+class EncodedResponse:
+    """Final response bytes, plus a gzip copy for large bodies."""
+
+    body: bytes
+    gzipped: Optional[bytes] = None
+
+
+def get_cached_response(source_type: CacheType, variant: str = "", **key):
+    """
+    Return a ready Flask response for a GET endpoint if its encoded body is cached.
+
+    `source_type` and `key` are the cache type and keyword key of the
+    CacheManager entry the response was rendered from. `variant` tells apart
+    different responses rendered from the same entry.
+    """
+    encoded = find_encoded_response(source_type, variant, **key)
+    if encoded is None:
+        return None
+    return _make_response(encoded)
+
+
+def cached_response(
+    source_type: CacheType,
+    success: bool = True,
+    data: Any = None,
+    message: str = "",
+    error: str = "",
+    variant: str = "",
+    rendered_from: Any = None,
+    **key,
+):
+    """
+    Encode a `create_response` body once and cache the bytes.
+
+    The encoded body gets the same dependencies as the CacheManager entry it
+    was rendered from (and at most its remaining TTL), so any write that
+    invalidates that entry drops the response too. `rendered_from` is the
+    object the body was built from, as returned by the service: the body is
+    only cached while that object is still the cached entry's value, so a
+    write racing with the request cannot leave an old body behind a new
+    entry. Otherwise the response is served without being cached.
+    """
+    payload = {"success": success, "data": data, "message": message, "error": error}
+    encoded = encode_response(
+        current_app.json, payload, source_type, variant, rendered_from, **key
+    )
+    return _make_response(encoded)
+
+
+def find_encoded_response(
+    source_type: CacheType, variant: str = "", **key
+) -> Optional[EncodedResponse]:
+    """The cached body behind `get_cached_response`; needs no Flask request."""
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    return get_cache_manager().get(
+        CacheType.RESPONSE, source=source_type.name, variant=variant, **key
+    )
+
+
+def encode_response(
+    json: Any,
+    payload: Any,
+    source_type: CacheType,
+    variant: str = "",
+    rendered_from: Any = None,
+    **key,
+) -> EncodedResponse:
+    """
+    Encode `payload` with the app's `json` provider and cache it as
+    `cached_response` does; needs no Flask request.
+    """
+    body = json.dumps(payload).encode("utf-8") + b"\n"
+    encoded = EncodedResponse(body=body)
+
+    if not RESPONSE_CACHE_ENABLED:
+        return encoded
+
+    if RESPONSE_CACHE_GZIP and len(body) >= RESPONSE_CACHE_GZIP_MIN_BYTES:
+        encoded.gzipped = gzip.compress(body, compresslevel=6)
+
+    cache_manager = get_cache_manager()
+    source = cache_manager.peek(source_type, **key)
+    if source is not None and source.data is rendered_from:
+        cache_manager.put_derived(
+            source,
+            CacheType.RESPONSE,
+            encoded,
+            source=source_type.name,
+            variant=variant,
+            **key,
+        )
+
+    return encoded
+
+
+def _make_response(encoded: EncodedResponse):
+    accepts_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+    if encoded.gzipped is not None and accepts_gzip:
+        response = current_app.response_class(
+            encoded.gzipped, mimetype="application/json"
+        )
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = current_app.response_class(
+            encoded.body, mimetype="application/json"
+        )
+    if encoded.gzipped is not None:
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,41 @@
+from flask import Blueprint, request
+from akb.services.suggest_index import KINDS
+from core import create_response, graph_service
+
+suggest_bp = Blueprint("suggest", __name__, url_prefix="/api/kg/suggest")
+
+
+@suggest_bp.route("", methods=["GET"])
+def suggest():
+    """输入联想: 按前缀返回作者, 分类和论文标题"""
+    try:
+        prefix = request.args.get("q", "")
+        limit = request.args.get("limit", 10, type=int)
+        kinds = [
+            kind.strip()
+            for kind in request.args.get("types", ",".join(KINDS)).split(",")
+            if kind.strip()
+        ]
+        if limit < 1 or limit > 50:
+            return create_response(False, error="Limit must be between 1 and 50"), 400
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            return (
+                create_response(
+                    False, error=f"Unknown types {sorted(unknown)}, expected {KINDS}"
+                ),
+                400,
+            )
+
+        suggestions = graph_service.suggest(prefix, kinds, limit)
+        return create_response(
+            True,
+            data={
+                "ready": graph_service.suggest_index.ready,
+                "suggestions": suggestions,
+            },
+            message=f"Found {len(suggestions)} suggestions",
+        )
+
+    except Exception as e:
+        return create_response(False, error=str(e)), 500
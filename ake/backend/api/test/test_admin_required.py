@@ -0,0 +1,39 @@
+import sys
+import os
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+import api.utils
+from api.utils import admin_required
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/stats")
+    @admin_required
+    def stats():
+        return "ok"
+
+    return app.test_client()
+
+
+def test_admin_token_required(client, monkeypatch):
+    """
+    Tests that operator endpoints need the configured admin token.
+    """
+    monkeypatch.setattr(api.utils, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/stats").status_code == 401
+    assert client.get("/stats", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/stats", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_refused_without_admin_token(client, monkeypatch):
+    """
+    Tests that operator endpoints are refused when no admin token is configured.
+    """
+    monkeypatch.setattr(api.utils, "ADMIN_TOKEN", None)
+    assert client.get("/stats", headers={"X-Admin-Token": "None"}).status_code == 403
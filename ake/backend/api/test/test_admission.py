@@ -0,0 +1,92 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from api.admission import AdmissionLimiter, Shed
+
+
+def test_sheds_when_queue_is_full():
+    """
+    Tests that requests beyond the budget and queue are shed with a 429.
+    """
+    limiter = AdmissionLimiter("heavy", max_concurrent=1, max_queue=0)
+    started_at = limiter.acquire(timeout=1)
+
+    with pytest.raises(Shed) as shed:
+        limiter.acquire(timeout=1)
+    assert shed.value.status == 429
+    assert shed.value.retry_after >= 1
+
+    limiter.release(started_at)
+    limiter.release(limiter.acquire(timeout=1))
+    assert limiter.get_stats()["shed"] == 1
+
+
+def test_queued_request_times_out():
+    """
+    Tests that a queued request gives up with a 503 after its timeout.
+    """
+    limiter = AdmissionLimiter("heavy", max_concurrent=1, max_queue=1)
+    limiter.acquire(timeout=1)
+
+    with pytest.raises(Shed) as shed:
+        limiter.acquire(timeout=0.01)
+    assert shed.value.status == 503
+    assert limiter.get_stats()["waiting"] == 0
+
+
+def test_queued_request_gets_released_slot():
+    """
+    Tests that a released slot goes to a queued request.
+    """
+    limiter = AdmissionLimiter("heavy", max_concurrent=1, max_queue=1)
+    started_at = limiter.acquire(timeout=1)
+    admitted = []
+    waiter = threading.Thread(
+        target=lambda: admitted.append(limiter.acquire(timeout=5))
+    )
+    waiter.start()
+
+    limiter.release(started_at)
+    waiter.join()
+    assert len(admitted) == 1
+    assert limiter.get_stats()["active"] == 1
+
+
+def test_thread_and_async_waiters_take_turns():
+    """
+    Tests that thread and event loop waiters get a released slot in arrival order.
+    """
+    limiter = AdmissionLimiter("heavy", max_concurrent=1, max_queue=2)
+    started_at = limiter.acquire(timeout=1)
+    admitted = []
+
+    def wait_in_thread():
+        started = limiter.acquire(timeout=5)
+        admitted.append("thread")
+        limiter.release(started)
+
+    waiter = threading.Thread(target=wait_in_thread)
+    waiter.start()
+    while limiter.waiting < 1:
+        time.sleep(0.001)
+
+    async def wait_in_loop():
+        queued = asyncio.ensure_future(limiter.acquire_async(timeout=5))
+        while limiter.waiting < 2:
+            await asyncio.sleep(0.001)
+        limiter.release(started_at)
+        started = await queued
+        admitted.append("async")
+        limiter.release(started)
+
+    asyncio.run(wait_in_loop())
+    waiter.join()
+    assert admitted == ["thread", "async"]
+    assert limiter.get_stats()["active"] == 0
+    assert limiter.get_stats()["waiting"] == 0
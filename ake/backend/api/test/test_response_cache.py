@@ -0,0 +1,31 @@
+import sys
+import os
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from akb.db import CacheType, get_cache_manager
+from api.response_cache import cached_response, get_cached_response
+
+
+def test_write_between_render_and_store():
+    """
+    Tests that a body rendered before a write is not cached under the new entry.
+    """
+    app = Flask(__name__)
+    cache = get_cache_manager()
+    cache.clear()
+    old = {"title": "old"}
+    cache.put(CacheType.PAPER, old, dependencies=["paper:x1"], paper_id="x1")
+
+    with app.test_request_context():
+        # The request read `old`; a write lands before the body is stored
+        cache.invalidate_by_entity("paper:x1")
+        new = {"title": "new"}
+        cache.put(CacheType.PAPER, new, dependencies=["paper:x1"], paper_id="x1")
+        cached_response(CacheType.PAPER, data=old, rendered_from=old, paper_id="x1")
+        assert get_cached_response(CacheType.PAPER, paper_id="x1") is None
+
+        cached_response(CacheType.PAPER, data=new, rendered_from=new, paper_id="x1")
+        response = get_cached_response(CacheType.PAPER, paper_id="x1")
+        assert response.get_json()["data"] == {"title": "new"}
@@ -0,0 +1,54 @@
+import sys
+import os
+import pytest
+from werkzeug.datastructures import MultiDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../"))
+
+from api.papers import parse_search_args
+
+
+def test_parse_search_args():
+    """
+    Tests that search arguments become the search_papers_page key, with
+    facets requests cached as their own variant.
+    """
+    search = parse_search_args(
+        MultiDict(
+            [
+                ("q", "Neural  Graph"),
+                ("page", "3"),
+                ("page_size", "10"),
+                ("facets", "true"),
+                ("category", "cs.CL,cs.LG"),
+            ]
+        )
+    )
+    assert search.page == 3
+    assert search.variant == "facets"
+    assert search.key["query_string"] == "graph neural"
+    assert search.key["limit"] == 10
+    assert search.key["skip"] == 20
+    assert search.key["filters"].categories == ("cs.CL", "cs.LG")
+
+    search = parse_search_args(MultiDict([("q", "graph"), ("page", "")]))
+    assert search.page == 1
+    assert search.variant == ""
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        [("q", "")],
+        [("q", "graph"), ("page", "abc")],
+        [("q", "graph"), ("page", "0")],
+        [("q", "graph"), ("page_size", "101")],
+        [("q", "graph"), ("from", "2017")],
+    ],
+)
+def test_parse_search_args_rejects_invalid(args):
+    """
+    Tests that invalid search arguments raise ValueError, answered with 400.
+    """
+    with pytest.raises(ValueError):
+        parse_search_args(MultiDict(args))
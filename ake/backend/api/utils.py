@@ -1,7 +1,24 @@
+import hmac
+import math
 from functools import wraps
-from flask import session
+from typing import Optional
+from flask import current_app, g, request, session
+from akb.config import ADMIN_TOKEN, REQUEST_TIMEOUT, REQUEST_TIMEOUT_MAX
+from akb.db import (
+    get_raw_bookmarks,
+    set_raw_bookmarks,
+    start_deadline,
+    deadline_exceeded,
+    get_circuit_breaker,
+    neo4j_unavailable,
+    clear_unavailable,
+)
 from core import create_response
 
+BOOKMARKS_SESSION_KEY = "neo4j_bookmarks"
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
 
 def login_required(f):
     @wraps(f)
@@ -11,3 +28,108 @@ def login_required(f):
         return f(*args, **kwargs)
 
     return decorated_function
+
+
+def admin_required(f):
+    """Only for operators: the request must carry ADMIN_TOKEN in X-Admin-Token."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = request.headers.get(ADMIN_TOKEN_HEADER)
+        if not token:
+            return create_response(False, message="Unauthorized"), 401
+        if not ADMIN_TOKEN or not hmac.compare_digest(
+            token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")
+        ):
+            return create_response(False, message="Forbidden"), 403
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def load_causal_bookmarks():
+    """Start the request from the client's last write bookmarks."""
+    raw = session.get(BOOKMARKS_SESSION_KEY)
+    set_raw_bookmarks(raw)
+    g.loaded_bookmarks = get_raw_bookmarks()
+
+
+def save_causal_bookmarks(response):
+    """Keep the bookmarks of this request's writes for the client's next reads."""
+    raw = get_raw_bookmarks()
+    if raw and raw != g.get("loaded_bookmarks"):
+        session[BOOKMARKS_SESSION_KEY] = sorted(raw)
+    return response
+
+
+def request_timeout(seconds):
+    """Give an endpoint its own default time budget in seconds."""
+
+    def decorator(f):
+        f.request_timeout = seconds
+        return f
+
+    return decorator
+
+
+def request_budget(header: Optional[str], endpoint_timeout: float) -> float:
+    """The budget asked for in the timeout header, else the endpoint's own."""
+    try:
+        seconds = float(header)
+    except (TypeError, ValueError):
+        return endpoint_timeout
+    if seconds <= 0:
+        return endpoint_timeout
+    return min(seconds, REQUEST_TIMEOUT_MAX)
+
+
+def start_request_deadline():
+    """Start the deadline every Neo4j query of this request runs against."""
+    clear_unavailable()
+    view = current_app.view_functions.get(request.endpoint)
+    start_deadline(
+        request_budget(
+            request.headers.get(REQUEST_TIMEOUT_HEADER),
+            getattr(view, "request_timeout", REQUEST_TIMEOUT),
+        )
+    )
+
+
+def deadline_exceeded_response(error=None):
+    return (
+        create_response(
+            False,
+            error="Request deadline exceeded",
+            message="The request took too long, please try again later",
+        ),
+        504,
+    )
+
+
+def unavailable_response(error=None):
+    body = create_response(
+        False,
+        error="Database unavailable",
+        message="The database is temporarily unavailable, please try again later",
+    )
+    body.status_code = 503
+    body.headers["Retry-After"] = str(
+        max(1, math.ceil(get_circuit_breaker().retry_after()))
+    )
+    return body
+
+
+def apply_failure_status(response):
+    """
+    Turn the 500 of a request that ran out of budget into a 504, and that of
+    a request that could not reach Neo4j into a 503 with Retry-After.
+    """
+    if response.status_code != 500:
+        return response
+    if deadline_exceeded():
+        body, status = deadline_exceeded_response()
+        body.status_code = status
+        return body
+    if neo4j_unavailable():
+        return unavailable_response()
+    return response
@@ -1,6 +1,6 @@
 from flask import Flask
 from flask_cors import CORS
-from core import create_response
+from core import create_response, graph_service
 from api.authors import authors_bp
 from api.papers import papers_bp
 from api.categories import categories_bp
@@ -8,34 +8,70 @@ from api.relationships import relationships_bp
 from api.data import data_bp
 from api.auth import auth_bp
 from api.recommendations import recommendations_bp
-from akb.services.graph_service import GraphService
+from api.cache import cache_bp
+from api.queries import queries_bp
+from api.suggest import suggest_bp
+from api.utils import (
+    load_causal_bookmarks,
+    save_causal_bookmarks,
+    start_request_deadline,
+    apply_failure_status,
+    deadline_exceeded_response,
+    unavailable_response,
+)
+from api.admission import admit_request, release_admission
+from akb.db import DeadlineExceeded, Neo4jUnavailable
 
-# 创建graph_service实例
-graph_service = GraphService()
-# 在应用启动前创建索引
-try:
+PORT = 5000
+
+
+def create_app() -> Flask:
+    """
+    Build the Flask application.
+
+    Does not connect to Neo4j: the driver and services are created on first
+    use, and the full-text index is created by the `init-schema` command.
+    """
+    app = Flask(__name__)
+    app.secret_key = "your-very-secret-key"  # Add a secret key for session management
+    CORS(app)
+    app.register_blueprint(authors_bp)
+    app.register_blueprint(papers_bp)
+    app.register_blueprint(categories_bp)
+    app.register_blueprint(relationships_bp)
+    app.register_blueprint(data_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(recommendations_bp)
+    app.register_blueprint(cache_bp)
+    app.register_blueprint(queries_bp)
+    app.register_blueprint(suggest_bp)
+    app.before_request(load_causal_bookmarks)
+    app.after_request(save_causal_bookmarks)
+    app.before_request(start_request_deadline)
+    app.after_request(apply_failure_status)
+    # After the deadline starts, so queueing counts against it
+    app.before_request(admit_request)
+    app.teardown_request(release_admission)
+
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(405, method_not_allowed)
+    app.register_error_handler(500, internal_error)
+    app.register_error_handler(DeadlineExceeded, deadline_exceeded_response)
+    app.register_error_handler(Neo4jUnavailable, unavailable_response)
+    app.add_url_rule("/health", view_func=health_check, methods=["GET"])
+    app.add_url_rule("/ready", view_func=readiness_check, methods=["GET"])
+    app.add_url_rule("/", view_func=index)
+    app.cli.command("init-schema")(init_schema)
+    return app
+
+
+def init_schema():
+    """Create the full-text index if it does not exist; run once per deploy."""
     print("正在创建全文索引...")
     graph_service.create_fulltext_index()
     print(f"全文索引创建状态: {graph_service.fulltext_index_exists}")
-except Exception as e:
-    print(f"创建索引时出错: {e}")
-    import traceback
-    traceback.print_exc()
-
-app = Flask(__name__)
-app.secret_key = "your-very-secret-key"  # Add a secret key for session management
-CORS(app)
-app.register_blueprint(authors_bp)
-app.register_blueprint(papers_bp)
-app.register_blueprint(categories_bp)
-app.register_blueprint(relationships_bp)
-app.register_blueprint(data_bp)
-app.register_blueprint(auth_bp)
-app.register_blueprint(recommendations_bp)
-PORT = 5000
 
 
-@app.errorhandler(404)
 def not_found(error):
     return (
         create_response(
@@ -45,7 +81,6 @@ def not_found(error):
     )
 
 
-@app.errorhandler(405)
 def method_not_allowed(error):
     return (
         create_response(
@@ -55,7 +90,6 @@ def method_not_allowed(error):
     )
 
 
-@app.errorhandler(500)
 def internal_error(error):
     return (
         create_response(
@@ -65,19 +99,47 @@ def internal_error(error):
     )
 
 
-@app.route("/health", methods=["GET"])
 def health_check():
-    """Health check endpoint"""
+    """Liveness check; does not touch Neo4j"""
     try:
         return create_response(data={"status": "healthy"}, message="Check passed")
     except Exception as e:
         return create_response(False, error=str(e), message="Health check failed"), 500
 
 
-@app.route("/")
+def readiness_check():
+    """Readiness check: Neo4j is reachable and the full-text index exists"""
+    try:
+        graph_service.db.verify_connectivity()
+        index_exists = graph_service.check_fulltext_index_exists()
+    except Exception as e:
+        return create_response(False, error=str(e), message="Neo4j is unavailable"), 503
+    if not index_exists:
+        return (
+            create_response(
+                False,
+                data={"neo4j": True, "fulltext_index": False},
+                error="Full-text index does not exist",
+                message="Run `flask --app app init-schema`",
+            ),
+            503,
+        )
+    return create_response(
+        data={"neo4j": True, "fulltext_index": True}, message="Ready"
+    )
+
+
 def index():
     return create_response(message="Welcome to the ArXiv Knowledge Base API!")
 
 
+app = create_app()
+
+
 if __name__ == "__main__":
+    try:
+        init_schema()
+    except Exception as e:
+        print(f"创建索引时出错: {e}")
+    # Development server only; see gunicorn.conf.py for production
     app.run(host="0.0.0.0", port=PORT, debug=True)
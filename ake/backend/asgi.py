@@ -0,0 +1,304 @@
+"""
+ASGI entry point: `uvicorn asgi:application`.
+
+Hot read endpoints are served natively on AsyncGraphService, so one process
+keeps many Neo4j queries in flight instead of one per worker thread. Every
+other route of the Flask blueprints is passed through to the WSGI app
+unchanged. Native handlers parse arguments and build response bodies with
+the same helpers as their Flask routes, and both sides share the
+process-wide cache, cached response bodies included.
+"""
+
+import math
+import re
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+from itsdangerous import BadSignature
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import MultiDict
+from akb.config import REQUEST_TIMEOUT
+from akb.db import (
+    CacheType,
+    DeadlineExceeded,
+    Neo4jUnavailable,
+    get_circuit_breaker,
+    set_raw_bookmarks,
+    start_deadline,
+)
+from akb.db.async_neo4j_connection import AsyncNeo4jConnection
+from akb.services import get_async_graph_service
+from api.authors import author_data
+from api.categories import category_data
+from api.papers import paper_data, parse_search_args, search_data
+from api.response_cache import EncodedResponse, encode_response, find_encoded_response
+from api.utils import (
+    BOOKMARKS_SESSION_KEY,
+    REQUEST_TIMEOUT_HEADER,
+    request_budget,
+    request_timeout,
+)
+from api.admission import HEAVY, Shed, admission_class, limiter_for, queue_timeout
+from app import app
+
+wsgi_application = WsgiToAsgi(app)
+
+# Handlers get the service on each request rather than at import: with
+# preload_app the module is imported in the gunicorn master, and a service
+# built there would lose its background threads in the forked workers.
+
+
+def _envelope(success=True, data=None, message="", error=""):
+    return {"success": success, "data": data, "message": message, "error": error}
+
+
+def _encode(payload, source_type, variant="", rendered_from=None, **key):
+    """Encode and cache a response body the way the Flask route does."""
+    return encode_response(
+        app.json, payload, source_type, variant, rendered_from, **key
+    )
+
+
+async def get_paper(query, id):
+    encoded = find_encoded_response(CacheType.PAPER, paper_id=id)
+    if encoded is not None:
+        return 200, encoded
+
+    paper = await get_async_graph_service().find_paper_by_id(id)
+    if not paper:
+        return 404, _envelope(False, error=f"paper '{id}' not found")
+    payload = _envelope(
+        data=paper_data(paper), message=f"Paper '{id}' info retrieved successfully"
+    )
+    return 200, _encode(payload, CacheType.PAPER, rendered_from=paper, paper_id=id)
+
+
+@admission_class(HEAVY)
+@request_timeout(30)
+async def list_papers(query):
+    encoded = find_encoded_response(CacheType.PAPER, listing="all")
+    if encoded is not None:
+        return 200, encoded
+
+    papers = await get_async_graph_service().get_all_papers()
+    payload = _envelope(
+        data=[paper_data(paper) for paper in papers],
+        message="Get papers list successfully",
+    )
+    return 200, _encode(payload, CacheType.PAPER, rendered_from=papers, listing="all")
+
+
+async def search_papers(query):
+    try:
+        search = parse_search_args(query)
+        encoded = find_encoded_response(
+            CacheType.SEARCH, search.variant, **search.key
+        )
+        if encoded is not None:
+            return 200, encoded
+
+        service = get_async_graph_service()
+        result = await service.search_papers_page(**search.key)
+        stats = (
+            await service.search_stats(
+                search.key["query_string"], search.key["filters"]
+            )
+            if search.facets
+            else None
+        )
+    except ValueError as e:
+        return 400, _envelope(False, error=str(e))
+    data = search_data(search, result, stats)
+    payload = _envelope(
+        data=data, message=f"Found {len(data['papers'])} related papers"
+    )
+    return 200, _encode(
+        payload, CacheType.SEARCH, search.variant, result, **search.key
+    )
+
+
+async def get_author(query, name):
+    encoded = find_encoded_response(CacheType.AUTHOR, name=name)
+    if encoded is not None:
+        return 200, encoded
+
+    author = await get_async_graph_service().find_author_info(name)
+    if not author:
+        return 404, _envelope(False, error=f"Author '{name}' not found")
+    payload = _envelope(
+        data=author_data(author),
+        message=f"Author '{name}' information retrieved successfully",
+    )
+    return 200, _encode(payload, CacheType.AUTHOR, rendered_from=author, name=name)
+
+
+@admission_class(HEAVY)
+@request_timeout(30)
+async def list_authors(query):
+    authors = await get_async_graph_service().get_all_authors()
+    return 200, _envelope(
+        data=[{"name": author.name, "publications": author.papers} for author in authors],
+        message="Get authors list successfully",
+    )
+
+
+async def get_category(query, name):
+    category = await get_async_graph_service().find_category(name)
+    if not category:
+        return 404, _envelope(False, error=f"Category '{name}' not found")
+    return 200, _envelope(
+        data=category_data(category),
+        message=f"Category '{name}' info retrieved successfully",
+    )
+
+
+@admission_class(HEAVY)
+@request_timeout(30)
+async def list_categories(query):
+    categories = await get_async_graph_service().get_all_categories()
+    return 200, _envelope(
+        data=[category_data(category) for category in categories],
+        message="Get categories list successfully",
+    )
+
+
+@admission_class(HEAVY)
+@request_timeout(30)
+async def get_overview_info(query):
+    return 200, _envelope(data=await get_async_graph_service().get_overview_info())
+
+
+# (method, path pattern, handler); unmatched requests go to the Flask app
+ROUTES = [
+    ("GET", re.compile(r"/api/kg/papers"), list_papers),
+    ("GET", re.compile(r"/api/kg/papers/search"), search_papers),
+    ("GET", re.compile(r"/api/kg/papers/(?P<id>[^/]+)"), get_paper),
+    ("GET", re.compile(r"/api/kg/authors"), list_authors),
+    ("GET", re.compile(r"/api/kg/authors/(?P<name>[^/]+)"), get_author),
+    ("GET", re.compile(r"/api/kg/categories"), list_categories),
+    ("GET", re.compile(r"/api/kg/categories/(?P<name>[^/]+)"), get_category),
+    ("GET", re.compile(r"/api/kg/data/info"), get_overview_info),
+]
+
+
+def _match(method, path):
+    for route_method, pattern, handler in ROUTES:
+        if route_method == method:
+            match = pattern.fullmatch(path)
+            if match:
+                return handler, match.groupdict()
+    return None, None
+
+
+def _load_causal_bookmarks(headers):
+    """Read the client's write bookmarks from the Flask session cookie."""
+    cookie = SimpleCookie(headers.get(b"cookie", b"").decode("latin-1"))
+    morsel = cookie.get(app.config["SESSION_COOKIE_NAME"])
+    raw = None
+    if morsel is not None:
+        serializer = app.session_interface.get_signing_serializer(app)
+        try:
+            session = serializer.loads(
+                morsel.value,
+                max_age=int(app.permanent_session_lifetime.total_seconds()),
+            )
+            raw = session.get(BOOKMARKS_SESSION_KEY)
+        except BadSignature:
+            pass
+    set_raw_bookmarks(raw)
+
+
+async def _send_json(send, status, payload, headers, extra_headers=()):
+    if isinstance(payload, EncodedResponse):
+        # A cached body, sent as get_cached_response would
+        extra_headers = list(extra_headers)
+        body = payload.body
+        if payload.gzipped is not None:
+            extra_headers.append((b"vary", b"Accept-Encoding"))
+            if b"gzip" in headers.get(b"accept-encoding", b""):
+                body = payload.gzipped
+                extra_headers.append((b"content-encoding", b"gzip"))
+    else:
+        # Compact, like jsonify outside debug mode
+        body = app.json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        body += b"\n"
+    response_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("ascii")),
+        *extra_headers,
+    ]
+    if b"origin" in headers:
+        # Same as flask_cors' default of allowing every origin
+        response_headers.append((b"access-control-allow-origin", b"*"))
+    await send(
+        {"type": "http.response.start", "status": status, "headers": response_headers}
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if AsyncNeo4jConnection._instance is not None:
+                await AsyncNeo4jConnection._instance.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+
+    handler = None
+    if scope["type"] == "http":
+        handler, path_args = _match(scope["method"], scope["path"])
+    if handler is None:
+        return await wsgi_application(scope, receive, send)
+
+    headers = dict(scope["headers"])
+    _load_causal_bookmarks(headers)
+    header = headers.get(REQUEST_TIMEOUT_HEADER.lower().encode("latin-1"))
+    start_deadline(
+        request_budget(
+            header and header.decode("latin-1"),
+            getattr(handler, "request_timeout", REQUEST_TIMEOUT),
+        )
+    )
+    query = MultiDict(
+        parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+    )
+    extra_headers = []
+    limiter = limiter_for(handler)
+    try:
+        if limiter is not None:
+            started_at = await limiter.acquire_async(queue_timeout())
+            try:
+                status, payload = await handler(query, **path_args)
+            finally:
+                limiter.release(started_at)
+        else:
+            status, payload = await handler(query, **path_args)
+    except Shed as shed:
+        status, payload = shed.status, _envelope(
+            False, error=str(shed), message="Server is busy, please try again later"
+        )
+        extra_headers.append((b"retry-after", str(shed.retry_after).encode("ascii")))
+    except DeadlineExceeded as e:
+        status, payload = 504, _envelope(
+            False,
+            error=str(e),
+            message="The request took too long, please try again later",
+        )
+    except Neo4jUnavailable:
+        status, payload = 503, _envelope(
+            False,
+            error="Database unavailable",
+            message="The database is temporarily unavailable, please try again later",
+        )
+        retry_after = max(1, math.ceil(get_circuit_breaker().retry_after()))
+        extra_headers.append((b"retry-after", str(retry_after).encode("ascii")))
+    except Exception as e:
+        status, payload = 500, _envelope(False, error=str(e))
+    await _send_json(send, status, payload, headers, extra_headers)
@@ -0,0 +1,111 @@
+"""
+Multi-threaded CacheManager throughput benchmark.
+
+Runs reader threads doing `get` on a warm cache while a writer thread keeps
+putting search results and invalidating them by type, the way edits do in
+GraphService. Compares a single shard (one global lock) with striped shards.
+On a GIL build total throughput stays bounded by the interpreter, so the
+difference shows mostly in reader tail latency and in how evenly readers and
+the invalidating writer share the CPU; free-threaded builds scale further.
+
+Usage (from ake/backend):
+    python -m benchmarks.cache_bench --threads 8 --seconds 3
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from akb.db.cache_manager import CacheManager, CacheType
+
+
+def run(num_shards: int, threads: int, seconds: float, keys: int) -> Dict:
+    cache = CacheManager(max_size=keys * 4, num_shards=num_shards)
+    for i in range(keys):
+        cache.put(CacheType.PAPER, i, dependencies=[f"paper:{i}"], paper_id=i)
+
+    stop = threading.Event()
+    counts = [0] * threads
+    latencies = [[] for _ in range(threads)]
+    rounds = [0]
+
+    def reader(idx: int):
+        n = 0
+        i = idx
+        samples = latencies[idx]
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            cache.get(CacheType.PAPER, paper_id=i % keys)
+            samples.append(time.perf_counter() - t0)
+            i += 7
+            n += 1
+        counts[idx] = n
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            for _ in range(200):
+                cache.put(
+                    CacheType.SEARCH, i, dependencies=["search:global"], q=i
+                )
+                i += 1
+            cache.invalidate_by_type(CacheType.SEARCH)
+            rounds[0] += 1
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(x for per_thread in latencies for x in per_thread)
+    return {
+        "gets_per_s": sum(counts) / elapsed,
+        "invalidations_per_s": rounds[0] / elapsed,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def report(label: str, result: Dict):
+    print(
+        f"  {label:<10}: {result['gets_per_s']:10,.0f} gets/s "
+        f"{result['invalidations_per_s']:8,.0f} invalidations/s  "
+        f"get p50 {result['p50_us']:7.1f}us p99 {result['p99_us']:9.1f}us "
+        f"max {result['max_us']:9.1f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args()
+
+    baseline = run(1, args.threads, args.seconds, args.keys)
+    sharded = run(args.shards, args.threads, args.seconds, args.keys)
+    print(f"threads={args.threads} keys={args.keys}")
+    report("1 shard", baseline)
+    report(f"{args.shards} shards", sharded)
+    print(
+        f"  speedup   : {sharded['gets_per_s'] / baseline['gets_per_s']:.2f}x gets, "
+        f"{sharded['invalidations_per_s'] / baseline['invalidations_per_s']:.2f}x "
+        "invalidations"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Memory footprint of cached Paper objects.
+
+Builds N papers the way GraphService does from Neo4j records (fresh string
+objects for every field of every record), keeps them alive, and reports the
+RSS growth per 100k papers. Compares the previous plain dataclass model with
+the current slotted, frozen, interned `akb.db.Paper`. Each model is measured
+in its own subprocess so the numbers don't share an allocator.
+
+Usage (from ake/backend):
+    python -m benchmarks.model_memory_bench --papers 100000
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+@dataclass
+class LegacyPaper:
+    """The Paper model before it was slotted and tuple-backed."""
+
+    pid: str
+    title: str
+    abstract: str
+    authors: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def build(model: str, n: int) -> int:
+    from akb.db import Paper
+
+    rng = random.Random(0)
+    author_pool = [f"Author Number {i}" for i in range(n // 4)]
+    category_pool = [f"cs.{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(150)]
+
+    def fresh(s: str) -> str:
+        # The driver decodes a new string object for every record field
+        return (s + " ")[:-1]
+
+    base = rss_bytes()
+    papers = []
+    for i in range(n):
+        pid = fresh(f"{2400 + i % 12:04d}.{i:05d}")
+        title = fresh(f"On the behaviour of model {i} under shift")
+        abstract = fresh("We study " + "x" * 200 + f" {i}.")
+        authors = [fresh(rng.choice(author_pool)) for _ in range(4)]
+        categories = [fresh(rng.choice(category_pool)) for _ in range(2)]
+        if model == "legacy":
+            papers.append(LegacyPaper(pid, title, abstract, authors, categories))
+        else:
+            papers.append(Paper.make_meta(pid, title, abstract, authors, categories))
+    return rss_bytes() - base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--model", choices=["legacy", "slotted"])
+    args = parser.parse_args()
+
+    if args.model:
+        print(build(args.model, args.papers))
+        return
+
+    results = {}
+    for model in ("legacy", "slotted"):
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.model_memory_bench",
+                "--papers",
+                str(args.papers),
+                "--model",
+                model,
+            ],
+            cwd=os.path.join(os.path.dirname(__file__), ".."),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[model] = int(out.stdout.strip()) * 100000 / args.papers
+
+    print(f"papers={args.papers}")
+    for model, per_100k in results.items():
+        print(f"  {model:<8}: {per_100k / 2**20:8.1f} MiB RSS per 100k papers")
+    print(f"  saving  : {1 - results['slotted'] / results['legacy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from flask import jsonify
 from typing import Any
-from akb import GraphService
+from werkzeug.local import LocalProxy
+from akb.services import get_graph_service
 
-graph_service = GraphService()
+# Resolved on first use, so importing the API modules does not touch Neo4j
+graph_service = LocalProxy(get_graph_service)
 
 
 def create_response(
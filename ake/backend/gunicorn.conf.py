@@ -0,0 +1,54 @@
+"""
+Production server settings: `gunicorn -c gunicorn.conf.py`.
+
+Serves `app:app` with threaded workers. For the ASGI entry point, run
+`gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:application`;
+the thread count then does not apply. Every setting below can be overridden
+by the environment variable next to it.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from akb.config import NEO4J_MAX_CONNECTION_POOL_SIZE
+
+wsgi_app = "app:app"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Request handling is mostly waiting on Neo4j, so use the usual
+# 2 * cores + 1 processes, each with a few threads.
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", 2 * multiprocessing.cpu_count() + 1))
+# Every in-flight query holds a pooled connection, and each worker has its own
+# pool, so more threads than pool connections would only queue on the pool.
+threads = min(
+    int(os.environ.get("GUNICORN_THREADS", 8)), NEO4J_MAX_CONNECTION_POOL_SIZE
+)
+
+# Import the app once in the master; workers fork from it. This is safe
+# because the Neo4j driver and services are created lazily, and are dropped
+# in the child if they were created before the fork.
+preload_app = True
+
+# On SIGTERM, stop accepting and let in-flight requests finish for this long
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+# Behind a load balancer, keep this above the balancer's idle timeout so it
+# never reuses a connection the worker has just closed.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 75))
+
+
+def worker_exit(server, worker):
+    from akb.db.async_neo4j_connection import AsyncNeo4jConnection
+    from akb.db.neo4j_connection import Neo4jConnection
+
+    # Close the worker's pools so the server sees clean disconnects
+    if Neo4jConnection._instance is not None:
+        Neo4jConnection._instance.close()
+    # The ASGI app closes the async driver on lifespan shutdown; this covers
+    # workers that exit without one, on a fresh loop as theirs has stopped
+    if AsyncNeo4jConnection._driver is not None:
+        try:
+            asyncio.run(AsyncNeo4jConnection._instance.close())
+        except Exception as e:
+            print(f"\033[31mERROR: Failed to close async Neo4j driver: {e}\033[0m")
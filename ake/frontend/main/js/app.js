@@ -648,7 +648,7 @@ function formatCategory(category) {
 }
 // 在 searchKeyword 函数中添加调试
 function searchKeyword(query, page = 1, pageSize = 20) {
-  const url = `${API_BASE}/papers/search?q=${encodeURIComponent(query)}&page=${page}&page_size=${pageSize}`;
+  const url = `${API_BASE}/papers/search?q=${encodeURIComponent(query)}&page=${page}&page_size=${pageSize}&snippets=true`;
   
   console.log('搜索URL:', url);
   
@@ -702,6 +702,16 @@ function displayKeywordResults(data, query, resultBox) {
       papers.forEach((paper, index) => {
         console.log('处理论文:', paper);
         
+        // 后端返回了高亮的标题和摘要片段时直接使用
+        if (paper.highlight) {
+          result += `${index + 1}. ${formatPaper({
+            ...paper,
+            title: paper.highlight.title,
+            abstract: paper.highlight.snippet
+          })}<br>`;
+          return;
+        }
+
         // 先格式化论文（包含链接换行）
         let formattedPaper = formatPaper(paper);
         